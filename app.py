@@ -1,8 +1,11 @@
 """
 app.py - 학생 정서 상담 Agent UI
 """
+import os
+import itertools
 import streamlit as st
 from src.agent import StudentCounselingAgent
+from src.resources import get_resources
 
 # 페이지 설정
 st.set_page_config(
@@ -11,10 +14,69 @@ st.set_page_config(
     layout="wide"
 )
 
-# 초기화
+
+@st.cache_resource
+def load_resources():
+    """LLM / 임베딩 / 벡터스토어 클라이언트 (모든 세션 공유)"""
+    return get_resources()
+
+
+def render_summary(summary):
+    """종합 결과 패널"""
+    if summary:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.metric("총 대화 턴", summary.get("총_대화_턴", 0))
+            st.write(f"**최고 위험 신호:** {summary.get('최고_위험_신호', '-')}")
+        
+        with col2:
+            st.write("**주요 이슈:**")
+            for issue in summary.get("주요_이슈", []):
+                st.write(f"• {issue}")
+        
+        st.markdown("**대화 요약:**")
+        st.write(summary.get("대화_요약", ""))
+        
+        st.markdown("**감지된 위험요인:**")
+        for risk in summary.get("감지된_위험요인", []):
+            st.write(f"• {risk}")
+        
+        if summary.get("정서_변화"):
+            st.markdown("**정서 변화:**")
+            st.write(summary.get("정서_변화"))
+        
+        st.markdown("**다음 대화 가이드:**")
+        st.write(summary.get("다음_대화_가이드", ""))
+    else:
+        st.error("종합 결과를 생성하지 못했습니다.")
+
+
+@st.fragment(run_every=1)
+def pending_summary_panel(msg):
+    """백그라운드 종합 결과 대기 (완성되면 메시지에 저장하고 다시 그리기)"""
+    summary = st.session_state.agent.poll_summary()
+    
+    if summary is None:
+        st.info("📝 종합 결과를 작성하고 있어요...")
+        return
+    
+    msg["종합_결과"] = summary
+    msg.pop("종합_결과_대기", None)
+    st.rerun()
+
+
+CRISIS_CONTACTS = "🚨 혼자 견디지 마세요. **1393**(자살예방상담) / **1577-0199**(정신건강위기) / **112, 119**"
+
+
+# 초기화 (세션에는 대화 히스토리와 턴 수만)
 if "messages" not in st.session_state:
     st.session_state.messages = []
-    st.session_state.agent = StudentCounselingAgent()
+    st.session_state.agent = StudentCounselingAgent(
+        resources=load_resources(),
+        background_summary=True,  # 긴급 종료 시 답변 먼저, 종합 결과는 나중에
+        tenant_id=os.getenv("TENANT_ID", "default")  # 학교별 토큰 / 비용 집계
+    )
     st.session_state.is_ended = False
 
 # 사이드바 - 정보
@@ -53,11 +115,27 @@ with st.sidebar:
     # 통계
     st.markdown("### 📊 대화 정보")
     st.metric("대화 턴 수", st.session_state.agent.turn_count)
+    
+    # 토큰 / 비용 (추정치)
+    usage = st.session_state.agent.usage()
+    session_usage = usage["세션"]
+    st.metric(
+        "세션 토큰",
+        f"{session_usage['input_tokens'] + session_usage['output_tokens']:,}",
+        help=f"입력 {session_usage['input_tokens']:,} (캐시 {session_usage['cached_tokens']:,}) / "
+             f"출력 {session_usage['output_tokens']:,} / 임베딩 {session_usage['embedding_tokens']:,}"
+    )
+    st.metric("세션 비용 (추정)", f"${session_usage['cost_usd']:.4f}")
+    st.caption(f"학교 누적 비용: ${usage['학교']['cost_usd']:.4f}")
 
 # 메인 화면
 st.title("💙 학생 정서 상담 AI")
 st.caption("친구처럼 편하게 이야기해보세요. 혼자가 아니에요.")
 
+# 위기 사전 분류가 높음이었으면 긴급 연락처 고정
+if st.session_state.agent.escalated:
+    st.error(CRISIS_CONTACTS)
+
 # 대화 종료 상태
 if st.session_state.is_ended:
     st.error("⚠️ 대화가 종료되었습니다. 새로운 대화를 시작하려면 '대화 초기화'를 눌러주세요.")
@@ -113,39 +191,13 @@ for msg in st.session_state.messages:
                 st.info(f"**권장 대응:** {action}")
             
             # 종합 결과
-            if "종합_결과" in msg:
+            if msg.get("종합_결과_대기"):
+                st.markdown("---")
+                pending_summary_panel(msg)
+            elif "종합_결과" in msg:
                 st.markdown("---")
                 st.success("### ✅ 대화 종료 - 종합 결과")
-                
-                summary = msg.get("종합_결과")  # ← .get() 추가
-                
-                if summary:  # ← 추가!
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.metric("총 대화 턴", summary.get("총_대화_턴", 0))
-                        st.write(f"**최고 위험 신호:** {summary.get('최고_위험_신호', '-')}")
-                    
-                    with col2:
-                        st.write("**주요 이슈:**")
-                        for issue in summary.get("주요_이슈", []):
-                            st.write(f"• {issue}")
-                    
-                    st.markdown("**대화 요약:**")
-                    st.write(summary.get("대화_요약", ""))
-                    
-                    st.markdown("**감지된 위험요인:**")
-                    for risk in summary.get("감지된_위험요인", []):
-                        st.write(f"• {risk}")
-                    
-                    if summary.get("정서_변화"):
-                        st.markdown("**정서 변화:**")
-                        st.write(summary.get("정서_변화"))
-                    
-                    st.markdown("**다음 대화 가이드:**")
-                    st.write(summary.get("다음_대화_가이드", ""))
-                else:
-                    st.error("종합 결과를 생성하지 못했습니다.")
+                render_summary(msg.get("종합_결과"))
 
 
 # 채팅 입력
@@ -160,13 +212,36 @@ if not st.session_state.is_ended:
             "content": prompt
         })
         
-        # Agent 응답
-        with st.spinner("생각 중..."):
-            response = st.session_state.agent.chat(prompt)
-        
-        # Assistant 응답 표시
+        # Assistant 응답 표시 (답변은 토큰 단위로 스트리밍)
         with st.chat_message("assistant"):
-            st.write(response["답변"])
+            alert = st.empty()
+            answer = st.empty()
+            response = {}
+            
+            def answer_stream():
+                for event in st.session_state.agent.chat_stream(prompt):
+                    if event["type"] == "alert":
+                        # 로컬 사전 분류가 높음이면 LLM 응답 전에 바로 표시
+                        alert.error(CRISIS_CONTACTS)
+                    elif event["type"] == "token":
+                        yield event["text"]
+                    elif event["type"] == "replace":
+                        # 스트리밍이 끊겨 답변을 재생성함 (끝난 뒤 최종 답변으로 다시 표시)
+                        response["답변_교체"] = True
+                    elif event["type"] == "field":
+                        # 위험 신호는 답변이 끝나기 전이라도 완성되는 즉시 표시
+                        if event["name"] == "자살_신호" and event["value"] == "높음":
+                            alert.error(CRISIS_CONTACTS)
+                    elif event["type"] == "done":
+                        response.update(event["response"])
+            
+            # 스피너는 첫 답변 조각이 올 때까지만 (그 뒤로는 스트리밍되는 답변이 보임)
+            stream = answer_stream()
+            with st.spinner("생각 중..."):
+                first = next(stream, None)
+            answer.write_stream(itertools.chain([] if first is None else [first], stream))
+            if response.pop("답변_교체", False):
+                answer.write(response["답변"])
             
             # 위험도 평가
             with st.expander("🔍 위험도 평가", expanded=False):
@@ -203,39 +278,13 @@ if not st.session_state.is_ended:
                 st.info(f"**권장 대응:** {action}")
             
             # 종합 결과
-            if response.get("종합_결과"):
+            if response.get("종합_결과_대기"):
+                st.markdown("---")
+                st.info("📝 종합 결과를 작성하고 있어요...")
+            elif response.get("종합_결과"):
                 st.markdown("---")
                 st.success("### ✅ 대화 종료 - 종합 결과")
-                
-                summary = response.get("종합_결과")  # ← 이미 .get() 사용
-                
-                if summary:  # ← 추가!
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.metric("총 대화 턴", summary.get("총_대화_턴", 0))
-                        st.write(f"**최고 위험 신호:** {summary.get('최고_위험_신호', '-')}")
-                    
-                    with col2:
-                        st.write("**주요 이슈:**")
-                        for issue in summary.get("주요_이슈", []):
-                            st.write(f"• {issue}")
-                    
-                    st.markdown("**대화 요약:**")
-                    st.write(summary.get("대화_요약", ""))
-                    
-                    st.markdown("**감지된 위험요인:**")
-                    for risk in summary.get("감지된_위험요인", []):
-                        st.write(f"• {risk}")
-                    
-                    if summary.get("정서_변화"):
-                        st.markdown("**정서 변화:**")
-                        st.write(summary.get("정서_변화"))
-                    
-                    st.markdown("**다음 대화 가이드:**")
-                    st.write(summary.get("다음_대화_가이드", ""))
-                else:
-                    st.error("종합 결과를 생성하지 못했습니다.")
+                render_summary(response.get("종합_결과"))
         
         # 메시지 저장
         message_data = {
@@ -244,9 +293,11 @@ if not st.session_state.is_ended:
             "metadata": response
         }
         
-        # 종합_결과가 실제로 있을 때만 추가
+        # 종합_결과가 실제로 있을 때만 추가 (백그라운드 생성 중이면 대기 표시)
         if response.get("종합_결과"):
             message_data["종합_결과"] = response["종합_결과"]
+        elif response.get("종합_결과_대기"):
+            message_data["종합_결과_대기"] = True
         
         st.session_state.messages.append(message_data)
         
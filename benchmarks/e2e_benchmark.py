@@ -0,0 +1,250 @@
+"""
+상담 Agent 전체 경로 지연 시간 벤치마크
+시나리오(여러 턴 대화)를 재생하며 단계별(사전 분류 / 검색 / 임베딩 / 벡터 검색 / 생성 / 요약) p50/p95/p99와 처리량 측정
+
+기본은 src/fakes.py의 가짜 백엔드(API 키 불필요, 지연 시간 설정 가능)로,
+--live면 실제 OpenAI / Pinecone으로 측정
+
+사용법:
+    python benchmarks/e2e_benchmark.py --repeat 5
+    python benchmarks/e2e_benchmark.py --stream --chat-latency 0.5 --tokens-per-second 40
+    python benchmarks/e2e_benchmark.py --live --repeat 1
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, List, Dict
+
+import numpy as np
+
+# src 패키지 import (python benchmarks/e2e_benchmark.py 실행 기준)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.agent import StudentCounselingAgent
+from src.fakes import fake_resources
+from src.resources import ModelTier, get_resources
+
+# 재생할 대화 시나리오 (src/agent.py __main__의 세 시나리오를 여러 턴으로 확장)
+SCENARIOS = {
+    "낮은 위험": [
+        "오늘 친구가 나를 무시했어. 기분이 너무 안 좋아.",
+        "점심시간에 나만 빼고 다들 같이 밥 먹으러 갔어.",
+        "응",
+        "내일 학교 가기 싫다. 또 그럴까 봐 걱정돼."
+    ],
+    "중간 위험": [
+        "요즘 너무 힘들어. 아무것도 하기 싫어.",
+        "부모님은 성적 얘기만 하고 내 얘기는 안 들어줘.",
+        "죽고 싶다는 생각이 자주 들어.",
+        "방법까지는 생각 안 해봤어. 그냥 사라지고 싶어."
+    ],
+    "높은 위험": [
+        "요즘 잠을 거의 못 자.",
+        "다 끝내고 싶어.",
+        "약 모아뒀어. 내일 다 먹으려고."
+    ]
+}
+
+
+class StageTimer:
+    """단계별 소요 시간 기록 (스레드 안전, 백그라운드 요약 포함)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples[stage].append(seconds * 1000)
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        """fn 호출 시간을 stage로 기록하는 함수"""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """단계별 {"n", "p50", "p95", "p99", "mean"} (ms)"""
+        with self._lock:
+            return {
+                stage: {
+                    "n": len(values),
+                    "p50": float(np.percentile(values, 50)),
+                    "p95": float(np.percentile(values, 95)),
+                    "p99": float(np.percentile(values, 99)),
+                    "mean": float(np.mean(values))
+                }
+                for stage, values in self.samples.items()
+            }
+
+
+class TimedRunnable:
+    """LLM Runnable의 invoke / ainvoke / stream 시간을 기록하는 래퍼"""
+
+    def __init__(self, runnable: Any, stage: str, timer: StageTimer):
+        self.runnable = runnable
+        self.stage = stage
+        self.timer = timer
+
+    def invoke(self, *args, **kwargs):
+        return self.timer.wrap(self.stage, self.runnable.invoke)(*args, **kwargs)
+
+    async def ainvoke(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await self.runnable.ainvoke(*args, **kwargs)
+        finally:
+            self.timer.record(self.stage, time.perf_counter() - start)
+
+    def stream(self, *args, **kwargs):
+        start = time.perf_counter()
+        first = True
+        for chunk in self.runnable.stream(*args, **kwargs):
+            if first:
+                self.timer.record(f"{self.stage}_첫토큰", time.perf_counter() - start)
+                first = False
+            yield chunk
+        self.timer.record(self.stage, time.perf_counter() - start)
+
+
+def instrument(resources, timer: StageTimer) -> None:
+    """공유 리소스의 외부 호출 지점(임베딩 / 벡터 검색 / LLM)에 시간 기록 연결"""
+    retriever = resources.retriever
+    embeddings = retriever.embeddings.embeddings
+    embeddings.embed_documents = timer.wrap("임베딩", embeddings.embed_documents)
+    embeddings.embed_query = timer.wrap("임베딩", embeddings.embed_query)
+
+    if retriever.index is not None:
+        retriever.index.search_many_by_vector = timer.wrap("벡터_검색", retriever.index.search_many_by_vector)
+    else:
+        store = retriever.vectorstore
+        store.similarity_search_by_vector = timer.wrap("벡터_검색", store.similarity_search_by_vector)
+        store.similarity_search = timer.wrap("벡터_검색", store.similarity_search)
+
+    resources.tiers = {
+        name: ModelTier(
+            name=tier.name,
+            model=tier.model,
+            llm=TimedRunnable(tier.llm, "생성", timer),
+            stream_llm=TimedRunnable(tier.stream_llm, "생성", timer)
+        )
+        for name, tier in resources.tiers.items()
+    }
+    resources.summary_llm = TimedRunnable(resources.summary_llm, "요약", timer)
+
+
+def run_scenario(
+    agent: StudentCounselingAgent,
+    messages: List[str],
+    timer: StageTimer,
+    stream: bool,
+    gate: Counter
+) -> int:
+    """시나리오 한 번 재생 (대화 초기화 후 순서대로), 처리한 턴 수 반환 (gate에 검색 게이트 결정 누적)"""
+    agent.reset()
+    turns = 0
+
+    for message in messages:
+        start = time.perf_counter()
+        if stream:
+            first_token = True
+            for event in agent.chat_stream(message):
+                if event["type"] == "token" and first_token:
+                    timer.record("턴_첫토큰", time.perf_counter() - start)
+                    first_token = False
+                if event["type"] == "done":
+                    response = event["response"]
+        else:
+            response = agent.chat(message)
+        timer.record("턴_전체", time.perf_counter() - start)
+        gate[agent.last_retrieval.get("결정")] += 1
+        turns += 1
+
+        if response.get("종료_판단"):
+            break
+
+    agent._collect_summary_update(wait=True)
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상담 Agent 전체 경로 지연 시간 벤치마크")
+    parser.add_argument("--live", action="store_true", help="실제 OpenAI / Pinecone 사용 (API 키 필요)")
+    parser.add_argument("--repeat", type=int, default=3, help="시나리오 반복 횟수")
+    parser.add_argument("--stream", action="store_true", help="chat_stream()으로 측정 (첫 토큰 지연 포함)")
+    parser.add_argument("--chat-latency", type=float, default=0.3, help="가짜 LLM 첫 토큰 지연(초)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="가짜 LLM 출력 속도")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="가짜 임베딩 요청 지연(초)")
+    parser.add_argument("--search-latency", type=float, default=0.03, help="가짜 벡터스토어 검색 지연(초)")
+    parser.add_argument("--json", type=Path, help="결과를 JSON으로 저장")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("⏱️  상담 Agent 전체 경로 벤치마크")
+    print("=" * 80)
+
+    if args.live:
+        resources = get_resources()
+    else:
+        resources = fake_resources(
+            chat_latency=args.chat_latency,
+            tokens_per_second=args.tokens_per_second,
+            embed_latency=args.embed_latency,
+            search_latency=args.search_latency
+        )
+    print(f"백엔드: {'실제 API' if args.live else '가짜 (src/fakes.py)'}, "
+          f"{'스트리밍' if args.stream else 'chat()'}, 시나리오 {len(SCENARIOS)}개 x {args.repeat}회")
+
+    timer = StageTimer()
+    instrument(resources, timer)
+
+    agent = StudentCounselingAgent(resources=resources)
+    agent._pre_classify = timer.wrap("사전_분류", agent._pre_classify)
+    agent._retrieve_context = timer.wrap("검색", agent._retrieve_context)
+
+    turns = 0
+    gate: Counter = Counter()
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for messages in SCENARIOS.values():
+            turns += run_scenario(agent, messages, timer, args.stream, gate)
+    elapsed = time.perf_counter() - started
+
+    summary = timer.summary()
+
+    print("\n" + "=" * 80)
+    print("📊 단계별 지연 시간 (ms)")
+    print("=" * 80)
+    print(f"{'단계':<14}{'횟수':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'평균':>10}")
+    for stage, stats in summary.items():
+        print(
+            f"{stage:<14}{stats['n']:>6}{stats['p50']:>10.1f}{stats['p95']:>10.1f}"
+            f"{stats['p99']:>10.1f}{stats['mean']:>10.1f}"
+        )
+
+    print(f"\n처리량: {turns}턴 / {elapsed:.1f}초 = {turns / elapsed:.2f}턴/초")
+    print(f"검색 게이트: {dict(gate)}")
+    print(f"임베딩 캐시: {resources.retriever.embeddings.stats()}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                "backend": "live" if args.live else "fake",
+                "stream": args.stream,
+                "turns": turns,
+                "elapsed_s": elapsed,
+                "throughput": turns / elapsed,
+                "stages": summary
+            }, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
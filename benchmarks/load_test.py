@@ -0,0 +1,337 @@
+"""
+동시 접속 부하 테스트 (한 반 ~ 전교생 규모)
+학생 N명이 각자 생각하는 시간(think time)을 두고 여러 턴 대화하는 상황을 한 프로세스에서 재현
+(app.py Streamlit 배포처럼 모든 세션이 AgentResources 하나를 공유)
+
+학생 수를 늘려가며 처리량, 응답 지연(p50/p95/p99), 대기 시간(작업 스레드를 기다린 시간),
+세션당 메모리를 측정하고, p95가 SLO를 넘는 지점을 포화로 표시.
+--save로 결과를 저장해 두면 다음 커밋에서 --baseline으로 비교해 회귀를 감지 (회귀 시 종료 코드 1,
+실행 설정이 기준과 다르면 비교하지 않고 종료 코드 2)
+
+사용법:
+    python benchmarks/load_test.py --students 1 10 50 100 200 500
+    python benchmarks/load_test.py --save benchmarks/load_baseline.json
+    python benchmarks/load_test.py --baseline benchmarks/load_baseline.json
+"""
+import sys
+import json
+import time
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, List, Dict, Optional
+
+import numpy as np
+
+# src 패키지 import (python benchmarks/load_test.py 실행 기준)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.agent import StudentCounselingAgent
+from src.fakes import fake_resources
+
+# 학생 메시지 문장 (여러 문장을 이어 붙여 길이 분포를 만듦)
+SENTENCES = [
+    "오늘 친구가 나를 무시했어.",
+    "기분이 너무 안 좋아.",
+    "점심시간에 나만 빼고 다들 같이 밥 먹으러 갔어.",
+    "부모님은 성적 얘기만 하고 내 얘기는 안 들어줘.",
+    "시험 성적이 너무 떨어져서 걱정이야.",
+    "요즘 잠을 거의 못 자.",
+    "학원 끝나고 집에 가면 아무도 없어.",
+    "그냥 다 귀찮고 아무것도 하기 싫어.",
+    "선생님한테 말하기는 좀 그래.",
+    "단톡방에서 나만 빼고 얘기하는 것 같아."
+]
+
+# 짧은 대답 (전체 메시지의 일부)
+SHORT_REPLIES = ["응", "아니", "몰라", "그냥", "ㅇㅇ", "괜찮아"]
+
+# 위기 학생 시나리오 (마지막 턴에 종료 판단 + 종합 결과 생성)
+CRISIS_SCRIPT = [
+    "요즘 너무 힘들어.",
+    "죽고 싶다는 생각이 자주 들어.",
+    "약 모아뒀어. 내일 다 먹으려고."
+]
+
+
+def sample_message(rng: np.random.Generator, short_ratio: float) -> str:
+    """학생 메시지 하나 (짧은 대답 또는 로그정규 분포 문장 수)"""
+    if rng.random() < short_ratio:
+        return SHORT_REPLIES[rng.integers(len(SHORT_REPLIES))]
+    n = int(np.clip(np.round(rng.lognormal(mean=0.6, sigma=0.6)), 1, 8))
+    return " ".join(SENTENCES[i] for i in rng.integers(0, len(SENTENCES), n))
+
+
+def deep_size(obj: Any, seen: Optional[set] = None) -> int:
+    """객체와 포함된 컨테이너 / 문자열의 대략적인 바이트 수"""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def session_bytes(agent: StudentCounselingAgent) -> int:
+    """세션마다 따로 가지는 상태 크기 (공유 리소스 제외)"""
+    return deep_size([
+        agent.conversation_history,
+        agent._chunk_cache,
+        agent._last_chunk_keys,
+        agent._last_context,
+        agent._last_query,
+        agent._folded_text,
+        agent.rolling_summary,
+        agent.last_retrieval,
+        agent.last_route,
+        agent.last_usage
+    ])
+
+
+def process_rss() -> int:
+    """현재 프로세스 RSS (바이트, /proc 없으면 최대 RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            import os
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_level(resources, n_students: int, args) -> Dict[str, Any]:
+    """
+    학생 n명 동시 접속 1회
+
+    학생마다 스레드 하나가 think time → 메시지 전송을 반복하고, 턴 처리는 작업 스레드 풀이 맡음
+    (--workers 0이면 학생 수만큼, Streamlit처럼 세션마다 스크립트 스레드 하나)
+    """
+    agents = [StudentCounselingAgent(resources=resources) for _ in range(n_students)]
+    pool = ThreadPoolExecutor(max_workers=args.workers or n_students, thread_name_prefix="turn")
+
+    lock = threading.Lock()
+    latencies: List[float] = []
+    queue_delays: List[float] = []
+    errors = 0
+
+    def run_turn(agent: StudentCounselingAgent, message: str, enqueued: float):
+        started = time.perf_counter()
+        response = agent.chat(message)
+        return started - enqueued, time.perf_counter() - enqueued, response
+
+    def student(i: int):
+        nonlocal errors
+        rng = np.random.default_rng(args.seed + i)
+        crisis = rng.random() < args.crisis_ratio
+        # 접속 시점 분산 (모두 같은 순간에 보내지 않도록)
+        time.sleep(rng.uniform(0, args.think_time))
+
+        for turn in range(args.turns):
+            if crisis:
+                message = CRISIS_SCRIPT[min(turn, len(CRISIS_SCRIPT) - 1)]
+            else:
+                message = sample_message(rng, args.short_ratio)
+
+            try:
+                queue_delay, latency, response = pool.submit(
+                    run_turn, agents[i], message, time.perf_counter()
+                ).result()
+            except Exception:
+                with lock:
+                    errors += 1
+                continue
+
+            with lock:
+                queue_delays.append(queue_delay * 1000)
+                latencies.append(latency * 1000)
+
+            if response.get("종료_판단"):
+                break
+            time.sleep(rng.exponential(args.think_time))
+
+    rss_before = process_rss()
+    started = time.perf_counter()
+    students = [threading.Thread(target=student, args=(i,)) for i in range(n_students)]
+    for thread in students:
+        thread.start()
+    for thread in students:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+
+    for agent in agents:
+        agent._collect_summary_update(wait=True)
+
+    sizes = [session_bytes(agent) for agent in agents]
+    latencies = latencies or [0.0]
+    queue_delays = queue_delays or [0.0]
+
+    return {
+        "students": n_students,
+        "turns": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "queue_p95_ms": float(np.percentile(queue_delays, 95)),
+        "session_kb": float(np.mean(sizes)) / 1024,
+        "rss_delta_mb": (process_rss() - rss_before) / 1024 / 1024
+    }
+
+
+# 기준과 같아야 비교할 수 있는 실행 설정 (학생 수는 같은 수끼리만 비교하므로 제외)
+COMPARED_CONFIG = [
+    "turns", "think_time", "short_ratio", "crisis_ratio", "workers",
+    "chat_latency", "tokens_per_second", "embed_latency", "search_latency", "seed"
+]
+
+
+def config_mismatches(config: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """기준 결과와 다른 실행 설정 (기준에 설정이 없으면 비교 불가로 표시)"""
+    previous = baseline.get("config")
+    if not previous:
+        return ["기준 결과에 실행 설정(config)이 없음"]
+    return [
+        f"{key}: 기준 {previous.get(key)} / 이번 {config.get(key)}"
+        for key in COMPARED_CONFIG
+        if previous.get(key) != config.get(key)
+    ]
+
+
+def find_regressions(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Any],
+    tolerance: float
+) -> List[str]:
+    """
+    기준 결과 대비 회귀 (같은 학생 수끼리 비교)
+
+    p95 지연이 tolerance 비율 이상 늘거나 처리량이 tolerance 비율 이상 줄면 회귀
+    """
+    previous = {level["students"]: level for level in baseline["levels"]}
+    regressions = []
+
+    for level in results:
+        before = previous.get(level["students"])
+        if before is None:
+            continue
+        if level["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{level['students']}명: p95 {before['p95_ms']:.0f}ms → {level['p95_ms']:.0f}ms"
+            )
+        if level["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{level['students']}명: 처리량 {before['throughput']:.2f} → {level['throughput']:.2f}턴/초"
+            )
+
+    return regressions
+
+
+def git_commit() -> str:
+    """현재 커밋 (git이 없으면 unknown)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 접속 부하 테스트")
+    parser.add_argument("--students", type=int, nargs="*", default=[1, 10, 50, 100, 200, 500])
+    parser.add_argument("--turns", type=int, default=4, help="학생당 최대 턴 수")
+    parser.add_argument("--think-time", type=float, default=3.0, help="메시지 사이 평균 생각 시간(초, 지수 분포)")
+    parser.add_argument("--short-ratio", type=float, default=0.2, help="짧은 대답 비율")
+    parser.add_argument("--crisis-ratio", type=float, default=0.05, help="위기 시나리오 학생 비율")
+    parser.add_argument("--workers", type=int, default=0, help="턴 처리 스레드 수 (0이면 학생 수만큼)")
+    parser.add_argument("--chat-latency", type=float, default=0.5, help="가짜 LLM 첫 토큰 지연(초)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="가짜 LLM 출력 속도")
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="가짜 임베딩 요청 지연(초)")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="가짜 벡터스토어 검색 지연(초)")
+    parser.add_argument("--slo", type=float, default=5000, help="p95 응답 지연 목표(ms), 넘으면 포화로 표시")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", type=Path, help="결과를 JSON으로 저장 (다음 비교 기준)")
+    parser.add_argument("--baseline", type=Path, help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀 판단 허용 비율")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🏫 동시 접속 부하 테스트")
+    print("=" * 80)
+    print(f"학생당 최대 {args.turns}턴, 생각 시간 평균 {args.think_time}초, "
+          f"위기 시나리오 {args.crisis_ratio:.0%}, LLM 지연 {args.chat_latency}초")
+
+    resources = fake_resources(
+        chat_latency=args.chat_latency,
+        tokens_per_second=args.tokens_per_second,
+        embed_latency=args.embed_latency,
+        search_latency=args.search_latency
+    )
+
+    print("\n" + "=" * 80)
+    print(f"{'학생':>6}{'턴':>7}{'처리량':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'대기p95':>9}{'세션KB':>9}{'RSS+MB':>9}{'오류':>6}")
+    print("=" * 80)
+
+    results = []
+    saturated = None
+    for n_students in args.students:
+        level = run_level(resources, n_students, args)
+        results.append(level)
+        print(
+            f"{level['students']:>6}{level['turns']:>7}{level['throughput']:>9.2f}"
+            f"{level['p50_ms']:>9.0f}{level['p95_ms']:>9.0f}{level['p99_ms']:>9.0f}"
+            f"{level['queue_p95_ms']:>9.0f}{level['session_kb']:>9.1f}{level['rss_delta_mb']:>9.1f}"
+            f"{level['errors']:>6}"
+        )
+        if saturated is None and level["p95_ms"] > args.slo:
+            saturated = n_students
+
+    print()
+    if saturated is None:
+        print(f"✅ 측정 범위에서 p95 {args.slo:.0f}ms 이내")
+    else:
+        print(f"⚠️  학생 {saturated}명에서 p95가 {args.slo:.0f}ms를 넘음 (포화)")
+
+    report = {
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("save", "baseline")},
+        "levels": results
+    }
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.save} (커밋 {report['commit']})")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        print(f"\n기준: {args.baseline} (커밋 {baseline.get('commit')}), 허용 {args.tolerance:.0%}")
+        mismatches = config_mismatches(report["config"], baseline)
+        if mismatches:
+            for line in mismatches:
+                print(f"⚠️  설정 다름: {line}")
+            print("❌ 기준과 실행 설정이 달라 비교하지 않음 (같은 설정으로 다시 실행하거나 --save로 기준 갱신)")
+            sys.exit(2)
+
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            for line in regressions:
+                print(f"❌ 회귀: {line}")
+            sys.exit(1)
+        print("✅ 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
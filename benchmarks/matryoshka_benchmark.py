@@ -0,0 +1,159 @@
+"""
+Matryoshka 2단계 검색 벤치마크
+앞부분 차원(128/256/512)으로 1차 검색 → 전체 차원 재정렬의 recall 손실과 속도 향상 측정
+
+- golden query set(benchmarks/golden_queries.jsonl)을 실제 인덱스로 검색:
+    전체 차원 결과 대비 recall@k + 정답 페이지 적중률 (쿼리 임베딩에 OpenAI API 필요, 디스크 캐시 사용)
+- --synthetic: API 없이 차원별 분산이 줄어드는 합성 코퍼스로 속도 / recall 경향만 확인
+
+사용법:
+    python benchmarks/matryoshka_benchmark.py --index data/index
+    python benchmarks/matryoshka_benchmark.py --synthetic --chunks 20000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# src 패키지 import (python benchmarks/matryoshka_benchmark.py 실행 기준)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.config import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+from src.vector_index import LocalVectorIndex, normalize_rows, load_chunks, EMBEDDINGS_FILE
+
+GOLDEN_QUERIES = Path(__file__).resolve().parent / "golden_queries.jsonl"
+
+
+def load_golden(path: Path = GOLDEN_QUERIES):
+    """golden query set 로드 ({"query", "pages"})"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def embed_queries(queries):
+    """golden 쿼리 임베딩 (CachedEmbeddings 디스크 캐시로 두 번째 실행부터 API 호출 없음)"""
+    from langchain_openai import OpenAIEmbeddings
+    from src.embedding_cache import CachedEmbeddings, DEFAULT_CACHE_PATH
+
+    embeddings = CachedEmbeddings(
+        OpenAIEmbeddings(model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS),
+        cache_path=os.getenv("EMBEDDING_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+    )
+    return normalize_rows(embeddings.embed_documents(queries))
+
+
+def synthetic_corpus(n_chunks: int, dimensions: int, seed: int = 0) -> np.ndarray:
+    """앞 차원일수록 분산이 큰 합성 임베딩 (Matryoshka 학습 임베딩의 정보 분포 흉내)"""
+    rng = np.random.default_rng(seed)
+    n_topics = max(n_chunks // 30, 1)
+    decay = (1.0 + np.arange(dimensions, dtype=np.float32)) ** -0.5
+    topics = rng.standard_normal((n_topics, dimensions)).astype(np.float32) * decay
+    noise = rng.standard_normal((n_chunks, dimensions)).astype(np.float32) * decay
+    return normalize_rows(topics[rng.integers(0, n_topics, n_chunks)] + 0.8 * noise)
+
+
+def timed_search(index: LocalVectorIndex, queries: np.ndarray, k: int):
+    """검색 결과 + 쿼리별 지연 시간(ms)"""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([i for i, _ in index.search_by_vector(query, k=k)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+def page_hit_rate(results, chunks, golden) -> float:
+    """정답 페이지가 top-k 안에 하나라도 있는 쿼리 비율"""
+    hits = 0
+    for result, item in zip(results, golden):
+        pages = {int(chunks[i]["metadata"].get("page", -1)) for i in result}
+        hits += bool(pages & set(item["pages"]))
+    return hits / len(golden)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matryoshka 2단계 검색 벤치마크")
+    parser.add_argument("--index", type=Path, default=Path("data/index"))
+    parser.add_argument("--synthetic", action="store_true", help="API / 인덱스 없이 합성 코퍼스 사용")
+    parser.add_argument("--chunks", type=int, default=20000, help="합성 코퍼스 청크 수")
+    parser.add_argument("--queries", type=int, default=200, help="합성 쿼리 수")
+    parser.add_argument("--prefix", type=int, nargs="*", default=[128, 256, 512])
+    parser.add_argument("--rescore", type=int, nargs="*", default=[4, 8])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20, help="지연 시간 측정 반복 (golden 쿼리가 적어서)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🪆 Matryoshka 2단계 검색 벤치마크")
+    print("=" * 80)
+
+    golden = None
+    if args.synthetic:
+        corpus = synthetic_corpus(args.chunks, EMBEDDING_DIMENSIONS)
+        chunks = [{"id": str(i), "text": "", "metadata": {}} for i in range(len(corpus))]
+        rng = np.random.default_rng(1)
+        rows = rng.integers(0, len(corpus), args.queries)
+        queries = normalize_rows(corpus[rows] + normalize_rows(rng.standard_normal(corpus[rows].shape)))
+        print(f"합성 코퍼스: {len(corpus)}개 청크 x {corpus.shape[1]}차원, 쿼리 {len(queries)}개")
+    else:
+        corpus = np.load(args.index / EMBEDDINGS_FILE)
+        chunks = load_chunks(args.index)["chunks"]
+        golden = load_golden()
+        queries = embed_queries([item["query"] for item in golden])
+        print(f"인덱스: {args.index} ({len(corpus)}개 청크), golden 쿼리 {len(golden)}개")
+
+    # 지연 시간은 반복 측정
+    timing_queries = np.tile(queries, (max(args.repeat if golden else 1, 1), 1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print("\n" + "=" * 80)
+        print(f"🎯 recall@{args.k} (기준: {corpus.shape[1]}차원 전체 검색) / 속도")
+        print("=" * 80)
+
+        header = f"{'1차 차원':<10}{'재정렬':>6}{'recall':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'속도':>8}"
+        if golden:
+            header += f"{'페이지 적중':>12}"
+        print(header)
+
+        baseline = None
+        for prefix in [None] + args.prefix:
+            LocalVectorIndex.save(
+                tmp, corpus, chunks,
+                model=EMBEDDING_MODEL, dimensions=corpus.shape[1],
+                prefix_dimensions=prefix or corpus.shape[1]
+            )
+
+            for factor in ([None] if prefix is None else args.rescore):
+                index = LocalVectorIndex.load(
+                    tmp, mmap=False,
+                    quantization=None if prefix is None else "matryoshka",
+                    rescore_factor=factor or 1
+                )
+
+                results, _ = timed_search(index, queries, args.k)
+                _, latencies = timed_search(index, timing_queries, args.k)
+                p50 = np.percentile(latencies, 50)
+
+                if baseline is None:
+                    baseline = (results, p50)
+                recall = np.mean([
+                    len(set(result) & set(expected)) / args.k
+                    for result, expected in zip(results, baseline[0])
+                ])
+
+                row = (
+                    f"{prefix or corpus.shape[1]:<10}{factor or '-':>6}{recall:>9.3f}"
+                    f"{p50:>10.3f}{np.percentile(latencies, 95):>10.3f}{baseline[1] / p50:>7.1f}x"
+                )
+                if golden:
+                    row += f"{page_hit_rate(results, chunks, golden):>12.2f}"
+                print(row)
+
+
+if __name__ == "__main__":
+    main()
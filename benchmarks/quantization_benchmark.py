@@ -0,0 +1,127 @@
+"""
+양자화 인덱스 벤치마크
+float32 전체 검색 대비 int8 / 1-bit(binary) + float 재정렬의 recall@k, 지연 시간, 메모리, 로드 시간 비교
+
+사용법:
+    python benchmarks/quantization_benchmark.py                    # 합성 코퍼스 (여러 매뉴얼 규모)
+    python benchmarks/quantization_benchmark.py --index data/index # 실제 인덱스
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# src 패키지 import (python benchmarks/quantization_benchmark.py 실행 기준)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.vector_index import LocalVectorIndex, normalize_rows, load_chunks, EMBEDDINGS_FILE
+
+
+def synthetic_corpus(n_chunks: int, dimensions: int, seed: int = 0) -> np.ndarray:
+    """주제(클러스터)별로 모인 합성 임베딩 (실제 문서 임베딩처럼 비등방적)"""
+    rng = np.random.default_rng(seed)
+    n_topics = max(n_chunks // 30, 1)
+    topics = rng.standard_normal((n_topics, dimensions)).astype(np.float32)
+    assignment = rng.integers(0, n_topics, n_chunks)
+    noise = rng.standard_normal((n_chunks, dimensions)).astype(np.float32)
+    return normalize_rows(topics[assignment] + 0.8 * noise)
+
+
+def make_queries(corpus: np.ndarray, n_queries: int, noise: float = 1.0, seed: int = 1) -> np.ndarray:
+    """
+    코퍼스 벡터에 잡음을 섞은 쿼리 (질문과 관련 청크의 거리 흉내)
+
+    noise: 잡음 벡터 길이 (코퍼스 벡터 길이 1 기준, 1.0이면 관련 청크와 코사인 약 0.7)
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(corpus), n_queries)
+    perturbation = normalize_rows(rng.standard_normal((n_queries, corpus.shape[1])))
+    return normalize_rows(corpus[rows] + noise * perturbation)
+
+
+def evaluate(index: LocalVectorIndex, queries: np.ndarray, truth: list, k: int):
+    """recall@k + 지연 시간(ms) 분포"""
+    hits = 0
+    latencies = []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = index.search_by_vector(query, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({i for i, _ in result} & expected)
+    latencies = np.array(latencies)
+    return hits / (len(queries) * k), np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="양자화 인덱스 벤치마크")
+    parser.add_argument("--index", type=Path, default=None, help="실제 인덱스 폴더 (없으면 합성 코퍼스)")
+    parser.add_argument("--chunks", type=int, default=20000, help="합성 코퍼스 청크 수")
+    parser.add_argument("--dimensions", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.0, help="쿼리 잡음 크기")
+    parser.add_argument("--k", type=int, nargs="*", default=[3, 5, 10])
+    parser.add_argument("--rescore", type=int, nargs="*", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("📏 양자화 인덱스 벤치마크")
+    print("=" * 80)
+
+    if args.index is not None:
+        corpus = normalize_rows(np.load(args.index / EMBEDDINGS_FILE))
+        meta = load_chunks(args.index)
+        print(f"인덱스: {args.index} ({len(corpus)}개 청크 x {corpus.shape[1]}차원, {meta['model']})")
+    else:
+        corpus = synthetic_corpus(args.chunks, args.dimensions)
+        print(f"합성 코퍼스: {len(corpus)}개 청크 x {corpus.shape[1]}차원")
+
+    queries = make_queries(corpus, args.queries, noise=args.noise)
+    chunks = [{"id": str(i), "text": "", "metadata": {}} for i in range(len(corpus))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        LocalVectorIndex.save(tmp, corpus, chunks, model="benchmark", dimensions=corpus.shape[1])
+
+        # 로드 시간 + 1차 검색 메모리
+        print("\n" + "=" * 80)
+        print("💾 로드 / 메모리")
+        print("=" * 80)
+        print(f"{'방식':<10}{'로드(ms)':>10}{'1차 벡터(MB)':>14}{'청크당(B)':>12}")
+
+        indexes = {}
+        for method in (None, "int8", "binary"):
+            start = time.perf_counter()
+            index = LocalVectorIndex.load(tmp, mmap=method is not None, quantization=method)
+            if method is None:
+                index.embeddings = np.asarray(index.embeddings)
+            elapsed = (time.perf_counter() - start) * 1000
+            indexes[method] = index
+
+            size = index.memory_bytes()
+            print(f"{method or 'float32':<10}{elapsed:>10.1f}{size / 2**20:>14.1f}{size // len(corpus):>12}")
+
+        # recall@k / 지연 시간
+        print("\n" + "=" * 80)
+        print("🎯 recall@k vs 지연 시간 (기준: float32 정확 검색)")
+        print("=" * 80)
+        print(f"{'방식':<10}{'재정렬':>6}{'k':>4}{'recall':>9}{'p50(ms)':>10}{'p95(ms)':>10}")
+
+        for k in args.k:
+            baseline = indexes[None]
+            truth = [{i for i, _ in baseline.search_by_vector(q, k=k)} for q in queries]
+
+            recall, p50, p95 = evaluate(baseline, queries, truth, k)
+            print(f"{'float32':<10}{'-':>6}{k:>4}{recall:>9.3f}{p50:>10.2f}{p95:>10.2f}")
+
+            for method in ("int8", "binary"):
+                index = indexes[method]
+                for factor in args.rescore:
+                    index.rescore_factor = factor
+                    recall, p50, p95 = evaluate(index, queries, truth, k)
+                    print(f"{method:<10}{factor:>6}{k:>4}{recall:>9.3f}{p50:>10.2f}{p95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
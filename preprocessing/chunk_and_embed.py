@@ -1,8 +1,9 @@
 """
 청킹 및 임베딩
-data/all_pages_txt/ 의 txt 파일들을 청킹하고 Pinecone에 임베딩
+data/all_pages_txt/ 의 txt 파일들을 청킹하고 Pinecone 및 로컬 인덱스(data/index)에 임베딩
 """
 import os
+import sys
 from pathlib import Path
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
@@ -10,9 +11,27 @@ from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone
 from dotenv import load_dotenv
 
+# src 패키지 import (python preprocessing/chunk_and_embed.py 실행 기준)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.config import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+from src.embedding_cache import CachedEmbeddings, DEFAULT_CACHE_PATH
+from src.lexical_index import LexicalIndex
+from src.tokens import count_tokens
+from src.vector_index import LocalVectorIndex, DEFAULT_INDEX_DIR, chunk_id, display_text
+
 # 환경변수 로드
 load_dotenv()
 
+def get_embeddings():
+    """캐시된 임베딩 (Pinecone 저장과 로컬 인덱스가 같은 벡터를 재사용)"""
+    return CachedEmbeddings(
+        OpenAIEmbeddings(
+            model=EMBEDDING_MODEL,
+            dimensions=EMBEDDING_DIMENSIONS
+        ),
+        cache_path=os.getenv("EMBEDDING_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+    )
+
 def load_all_texts():
     """모든 txt 파일 로드"""
     print("=" * 80)
@@ -67,14 +86,18 @@ def chunk_documents(documents):
         # 청킹
         chunks = text_splitter.split_text(doc['text'])
         
-        # 메타데이터 포함
+        # 메타데이터 포함 (프롬프트에 넣을 표시 형태 + 토큰 수도 미리 계산)
         for i, chunk in enumerate(chunks):
+            display = display_text(chunk, doc['metadata']['page'])
             all_chunks.append({
                 'text': chunk,
+                'id': chunk_id(doc['metadata']['page'], i),
                 'metadata': {
                     **doc['metadata'],
                     'chunk_index': i,
-                    'total_chunks': len(chunks)
+                    'total_chunks': len(chunks),
+                    'display': display,
+                    'display_tokens': count_tokens(display)
                 }
             })
         
@@ -102,17 +125,14 @@ def embed_and_store(chunks):
     print("=" * 80)
     
     # OpenAI Embeddings
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-large",
-        dimensions=3072
-    )
+    embeddings = get_embeddings()
     
     # Pinecone 초기화
     pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
     index_name = "student-counseling-0202"
     
     print(f"\n인덱스: {index_name}")
-    print(f"임베딩 모델: text-embedding-3-large (3072차원)")
+    print(f"임베딩 모델: {EMBEDDING_MODEL} ({EMBEDDING_DIMENSIONS}차원)")
     print(f"청크 수: {len(chunks)}")
     
     # LangChain Document 형식으로 변환
@@ -132,13 +152,46 @@ def embed_and_store(chunks):
     vectorstore = PineconeVectorStore.from_documents(
         documents=docs,
         embedding=embeddings,
-        index_name=index_name
+        index_name=index_name,
+        ids=[chunk['id'] for chunk in chunks]
     )
     
     print("✅ Pinecone 저장 완료!")
     
     return vectorstore
 
+def save_local_index(chunks, index_dir=DEFAULT_INDEX_DIR):
+    """임베딩 행렬(.npy) + 청크 메타데이터 로컬 저장"""
+    print("\n" + "=" * 80)
+    print("💾 로컬 인덱스 저장")
+    print("=" * 80)
+    
+    embeddings = get_embeddings()
+    
+    vectors = embeddings.embed_documents([chunk['text'] for chunk in chunks])
+    
+    LocalVectorIndex.save(
+        index_dir,
+        embeddings=vectors,
+        chunks=chunks,
+        model=EMBEDDING_MODEL,
+        dimensions=EMBEDDING_DIMENSIONS
+    )
+    
+    print(f"✅ {index_dir}: {len(chunks)}개 청크 x {EMBEDDING_DIMENSIONS}차원 (float32, 1차 검색용 int8 / binary / matryoshka 포함)")
+    print(f"임베딩 캐시: {embeddings.stats()}")
+
+def save_lexical_index(chunks, index_dir=DEFAULT_INDEX_DIR):
+    """문자 n-gram 역색인 저장 (하이브리드 검색용, API 호출 없음)"""
+    print("\n" + "=" * 80)
+    print("🔤 문자 n-gram 역색인 저장")
+    print("=" * 80)
+    
+    lexical = LexicalIndex.build([chunk['text'] for chunk in chunks])
+    lexical.save(index_dir)
+    
+    print(f"✅ {index_dir}: {len(lexical.term_ids):,}개 n-gram, postings {len(lexical.doc_ids):,}개")
+
 def verify_pinecone():
     """Pinecone 저장 확인"""
     print("\n" + "=" * 80)
@@ -159,10 +212,7 @@ def verify_pinecone():
     print("🔍 테스트 검색")
     print("=" * 80)
     
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-large",
-        dimensions=3072
-    )
+    embeddings = get_embeddings()
     
     vectorstore = PineconeVectorStore(
         index_name="student-counseling-0202",
@@ -199,6 +249,10 @@ def main():
     # # 3. 임베딩 및 저장
     vectorstore = embed_and_store(chunks)
     
+    # 3-1. 로컬 인덱스 저장 (ManualRetriever backend="local")
+    save_local_index(chunks)
+    save_lexical_index(chunks)
+    
     # 4. 확인
     verify_pinecone()
     
@@ -0,0 +1,313 @@
+"""
+위기 사전 분류기 학습 / 평가
+SYSTEM_PROMPT의 예시 문장 + 합성 시드 문장 + (있으면) 라벨링된 실제 대화 로그(JSONL: {"text", "label"})로
+문자 n-gram 로지스틱 회귀를 학습하고 data/crisis_classifier.npz로 저장
+
+data/crisis_seed_synthetic.jsonl은 직접 작성한 합성 문장이라, 실제 로그 없이 낸 지표는
+실제 학생 대화에서의 성능을 뜻하지 않음
+"""
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+# src 패키지 import (python preprocessing/train_crisis_classifier.py 실행 기준)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.crisis_classifier import (
+    CrisisClassifier, DEFAULT_CLASSIFIER_PATH, RISK_LEVELS, extract_features, lexicon_prediction
+)
+from src.crisis_lexicon import CrisisLexicon
+from src.prompts import SYSTEM_PROMPT
+
+DEFAULT_SEED_PATHS = [Path("data/crisis_seed_synthetic.jsonl")]
+N_BUCKETS = 4096
+NGRAM_SIZES = (1, 2, 3)
+
+# "높음"이 아닌 메시지를 "높음"으로 경보해도 되는 최대 비율 (교차검증 기준, 기준 확률 선택용)
+MAX_FALSE_ALARM = 0.1
+
+# "높음" 기준 확률 하한 (여기까지 내려가야 하면 일상적인 언급도 경보가 되므로 저장하지 않고 실패)
+MIN_HIGH_THRESHOLD = 0.2
+
+# 평가 전용으로 떼어 두는 비율 (기준 확률 선택 / 최종 학습에 쓰지 않음)
+HOLDOUT_FRACTION = 0.25
+
+
+def load_prompt_examples() -> List[Tuple[str, str]]:
+    """SYSTEM_PROMPT의 판단 기준 예시 / 대화 예시 추출"""
+    examples = []
+    level = None
+    in_examples = False
+
+    for line in SYSTEM_PROMPT.splitlines():
+        line = line.strip()
+
+        # "## 낮음", "## 높음 🚨" (판단 기준 섹션)
+        header = re.match(r"^## (낮음|중간|높음)( 🚨)?$", line)
+        if header:
+            level = header.group(1)
+            in_examples = False
+            continue
+        if line.startswith("#"):
+            level = None
+            in_examples = False
+            continue
+
+        # "[예시 1 - 낮음]" (대화 예시)
+        block = re.match(r"^\[예시 \d+ - (낮음|중간|높음)\]$", line)
+        if block:
+            level = block.group(1)
+            continue
+        if level and line.startswith("학생:"):
+            examples.append((line.split(":", 1)[1].strip().strip('"'), level))
+            level = None
+            continue
+
+        if line == "예시:":
+            in_examples = True
+        elif in_examples and level and line.startswith("- "):
+            examples.append((line[2:].strip().strip('"'), level))
+        elif not line:
+            in_examples = False
+
+    return examples
+
+
+def load_logs(paths: List[Path]) -> List[Tuple[str, str]]:
+    """라벨 JSONL 로드 (합성 시드 / 실제 대화 로그 공용, label은 낮음/중간/높음)"""
+    examples = []
+    for path in paths:
+        if not path.exists():
+            print(f"⚠️  로그 없음: {path}")
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    if row["label"] in RISK_LEVELS:
+                        examples.append((row["text"], row["label"]))
+    return examples
+
+
+def featurize(texts: List[str], lexicon: CrisisLexicon) -> np.ndarray:
+    """특징 행렬 (학습 데이터가 작아 dense로 충분)"""
+    n_categories = len({p["category"] for p in lexicon.patterns})
+    X = np.zeros((len(texts), N_BUCKETS + n_categories), dtype=np.float32)
+    for row, text in enumerate(texts):
+        indices, values = extract_features(text, lexicon, N_BUCKETS, NGRAM_SIZES)
+        X[row, indices] = values
+    return X
+
+
+def train(
+    X: np.ndarray,
+    y: np.ndarray,
+    l2: float = 1e-4,
+    lr: float = 10.0,
+    epochs: int = 1000
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    다항 로지스틱 회귀 (전체 배치 경사하강, 클래스 불균형은 가중치로 보정)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (weights, bias)
+    """
+    n, d = X.shape
+    k = len(RISK_LEVELS)
+    Y = np.eye(k, dtype=np.float32)[y]
+
+    counts = np.bincount(y, minlength=k).astype(np.float32)
+    sample_weight = (n / (k * np.maximum(counts, 1)))[y][:, None]
+
+    W = np.zeros((d, k), dtype=np.float32)
+    b = np.zeros(k, dtype=np.float32)
+
+    for _ in range(epochs):
+        logits = X @ W + b
+        logits -= logits.max(axis=1, keepdims=True)
+        P = np.exp(logits)
+        P /= P.sum(axis=1, keepdims=True)
+
+        G = (P - Y) * sample_weight / n
+        W -= lr * (X.T @ G + l2 * W)
+        b -= lr * G.sum(axis=0)
+
+    return W, b
+
+
+def predict_proba(X: np.ndarray, W: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """확률 예측"""
+    logits = X @ W + b
+    logits -= logits.max(axis=1, keepdims=True)
+    P = np.exp(logits)
+    return P / P.sum(axis=1, keepdims=True)
+
+
+def holdout_split(y: np.ndarray, fraction: float = HOLDOUT_FRACTION, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """층화 held-out 분할 (학습 번호, 평가 번호)"""
+    rng = np.random.default_rng(seed)
+    test = np.zeros(len(y), dtype=bool)
+    for label in range(len(RISK_LEVELS)):
+        idx = np.flatnonzero(y == label)
+        rng.shuffle(idx)
+        test[idx[:int(round(len(idx) * fraction))]] = True
+    return np.flatnonzero(~test), np.flatnonzero(test)
+
+
+def cross_validate(X: np.ndarray, y: np.ndarray, folds: int = 5, seed: int = 0) -> np.ndarray:
+    """층화 k-fold 교차검증 (fold 밖 확률 반환)"""
+    rng = np.random.default_rng(seed)
+    fold_of = np.zeros(len(y), dtype=int)
+    for label in range(len(RISK_LEVELS)):
+        idx = np.flatnonzero(y == label)
+        rng.shuffle(idx)
+        fold_of[idx] = np.arange(len(idx)) % folds
+
+    probs = np.zeros((len(y), len(RISK_LEVELS)), dtype=np.float32)
+    for fold in range(folds):
+        test = fold_of == fold
+        W, b = train(X[~test], y[~test])
+        probs[test] = predict_proba(X[test], W, b)
+    return probs
+
+
+def choose_threshold(
+    probs: np.ndarray,
+    y: np.ndarray,
+    max_false_alarm: float = MAX_FALSE_ALARM,
+    floor: float = MIN_HIGH_THRESHOLD
+) -> float:
+    """
+    "높음" 기준 확률 (재현율 우선)
+
+    교차검증 오경보율(높음이 아닌 메시지를 높음으로)이 max_false_alarm 이하인 기준값
+    (0.5 → floor, 0.01 간격) 중 "높음" 재현율이 가장 높은 값. 재현율이 같으면 오경보가 적은 높은 값
+    """
+    high = y == 2
+    best, best_recall = 0.5, -1.0
+    for threshold in np.round(np.arange(0.5, floor - 0.005, -0.01), 2):
+        false_alarm = float((probs[~high, 2] >= threshold).mean()) if (~high).any() else 0.0
+        if false_alarm > max_false_alarm:
+            break
+        recall = float((probs[high, 2] >= threshold).mean()) if high.any() else 0.0
+        if recall > best_recall:
+            best, best_recall = float(threshold), recall
+    return best
+
+
+def predict_levels(probs: np.ndarray, threshold: float) -> np.ndarray:
+    """확률 → 수준 번호 (CrisisClassifier.predict()와 같은 규칙, 키워드 상향 제외)"""
+    return np.where(probs[:, 2] >= threshold, 2, np.argmax(probs[:, :2], axis=1))
+
+
+def report(pred: np.ndarray, y: np.ndarray) -> float:
+    """클래스별 정밀도 / 재현율, "높음" 재현율 반환"""
+    print(f"{'수준':<6}{'정밀도':>8}{'재현율':>8}{'건수':>6}")
+    for label, name in enumerate(RISK_LEVELS):
+        tp = int(((pred == label) & (y == label)).sum())
+        precision = tp / max(int((pred == label).sum()), 1)
+        recall = tp / max(int((y == label).sum()), 1)
+        print(f"{name:<6}{precision:>10.2f}{recall:>10.2f}{int((y == label).sum()):>7}")
+    print(f"정확도: {(pred == y).mean():.2f}")
+
+    missed = np.flatnonzero((y == 2) & (pred != 2))
+    if len(missed):
+        print(f"⚠️  놓친 '높음' {len(missed)}건")
+
+    return float((pred[y == 2] == 2).mean()) if (y == 2).any() else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위기 사전 분류기 학습")
+    parser.add_argument("--seed", nargs="*", type=Path, default=DEFAULT_SEED_PATHS,
+                        help="합성 시드 문장 JSONL ({\"text\", \"label\"})")
+    parser.add_argument("--logs", nargs="*", type=Path, default=[],
+                        help="라벨링된 실제 대화 로그 JSONL ({\"text\", \"label\"})")
+    parser.add_argument("--output", type=Path, default=DEFAULT_CLASSIFIER_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🧠 위기 사전 분류기 학습")
+    print("=" * 80)
+
+    prompt_examples = load_prompt_examples()
+    seed_examples = load_logs(args.seed)
+    log_examples = load_logs(args.logs)
+    examples = prompt_examples + seed_examples + log_examples
+
+    print(f"SYSTEM_PROMPT 예시: {len(prompt_examples)}개")
+    print(f"합성 시드: {len(seed_examples)}개")
+    print(f"실제 대화 로그: {len(log_examples)}개")
+    if not log_examples:
+        print("⚠️  실제 대화 로그 없음: 아래 지표는 합성 문장 기준이라 실제 대화에서의 성능을 뜻하지 않음")
+
+    lexicon = CrisisLexicon.load()
+    texts = [text for text, _ in examples]
+    y = np.array([RISK_LEVELS.index(label) for _, label in examples])
+    X = featurize(texts, lexicon)
+
+    # held-out 분할 (평가 분할은 기준 확률 선택 / 최종 학습에 쓰지 않음)
+    train_idx, test_idx = holdout_split(y)
+    print(f"학습 분할: {len(train_idx)}개 / 평가 분할(held-out): {len(test_idx)}개")
+
+    # 기준 확률 선택 (학습 분할 안에서 교차검증)
+    print("\n" + "=" * 80)
+    print(f"📊 {args.folds}-fold 교차검증 (학습 분할, 기준 확률 선택)")
+    print("=" * 80)
+
+    probs = cross_validate(X[train_idx], y[train_idx], folds=args.folds)
+    threshold = choose_threshold(probs, y[train_idx])
+    if threshold <= MIN_HIGH_THRESHOLD:
+        print(f"❌ '높음' 기준 확률이 하한({MIN_HIGH_THRESHOLD})까지 내려감: 일상적인 언급도 경보가 되므로 저장하지 않음")
+        print("   라벨링 데이터를 늘리거나 MAX_FALSE_ALARM을 조정한 뒤 다시 학습하세요")
+        sys.exit(1)
+    print(f"'높음' 기준 확률: {threshold} (오경보율 {MAX_FALSE_ALARM:.0%} 이하, 하한 {MIN_HIGH_THRESHOLD})")
+
+    # 최종 학습 (학습 분할만, 보고하는 held-out 지표가 저장하는 모델의 지표)
+    W, b = train(X[train_idx], y[train_idx])
+
+    print("\n" + "=" * 80)
+    print("📊 held-out 평가")
+    print("=" * 80)
+
+    model_pred = predict_levels(predict_proba(X[test_idx], W, b), threshold)
+    print("\n[분류기만]")
+    model_recall = report(model_pred, y[test_idx])
+
+    # 실제 사전 분류는 분류기 / 키워드 중 높은 수준 사용
+    lexicon_pred = np.array([
+        RISK_LEVELS.index(lexicon_prediction(lexicon, texts[i]).level) for i in test_idx
+    ])
+    print("\n[분류기 + 키워드 (실제 사용)]")
+    combined_recall = report(np.maximum(model_pred, lexicon_pred), y[test_idx])
+
+    print(f"\n'높음' held-out 재현율: 분류기 {model_recall:.2f} / 분류기 + 키워드 {combined_recall:.2f}")
+    classifier = CrisisClassifier(
+        weights=W,
+        bias=b,
+        lexicon=lexicon,
+        n_buckets=N_BUCKETS,
+        ngram_sizes=NGRAM_SIZES,
+        high_threshold=threshold,
+        version=time.strftime("%Y%m%d")
+    )
+
+    # 추론 지연 측정
+    start = time.perf_counter()
+    for text in texts:
+        classifier.predict(text)
+    elapsed = (time.perf_counter() - start) / len(texts) * 1e6
+    print(f"\n추론 지연: 평균 {elapsed:.0f}µs / 메시지")
+
+    classifier.save(args.output)
+    print(f"✅ 저장 완료: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
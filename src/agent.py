@@ -4,41 +4,179 @@ LangChain + Structured Output
 """
 import os
 import json
-from typing import List, Dict
-from langchain_openai import ChatOpenAI
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, List, Dict, Iterator, Optional, Tuple
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
 from dotenv import load_dotenv
 
+from .config import (
+    get_history_token_budget, FOLDED_HISTORY_TOKEN_BUDGET, HISTORY_WINDOW_REFILL_RATIO,
+    LIGHT_TIER, STRONG_TIER, RETRIEVAL_GATE_MIN_CHARS, RETRIEVAL_GATE_NOVELTY,
+    RETRIEVAL_GATE_MAX_REUSE, CONTEXT_TOKEN_BUDGET, CRISIS_CONTEXT_TOKEN_BUDGET,
+    QUERY_EXPANSION_MAX_CHARS, QUERY_EXPANSION_NOVELTY, QUERY_EXPANSION_REFERENTIAL
+)
+from .crisis_classifier import CrisisPrediction, lexicon_prediction
+from .crisis_lexicon import CrisisHit, normalize
 from .models import CounselingResponse
-from .prompts import SYSTEM_PROMPT, CONTEXT_PROMPT, SUMMARY_PROMPT
-from .retriever import ManualRetriever
+from .prompts import (
+    SYSTEM_PROMPT, CONTEXT_PROMPT, SUMMARY_PROMPT, ROLLING_SUMMARY_PROMPT,
+    FOLDED_HISTORY_PROMPT, CRISIS_QUERY_PROMPT
+)
+from .resources import AgentResources, ModelTier, get_resources
+from .retriever import CONTEXT_SEPARATOR, chunk_key, format_chunk
+from .streaming import StructuredStreamParser
+from .tokens import count_tokens
+from .usage import UsageMeter, current_meter, llm_usage, usage_scope
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def log_crisis_alert(alert: Dict) -> None:
+    """기본 상담 선생님 알림 (로그만 남김, 실제 알림 채널은 crisis_alert로 주입)"""
+    logger.warning(
+        "위기 사전 경보: %d턴, 위기 키워드=%s, 확률=%s",
+        alert["턴"], alert["위기_키워드"], alert["확률"]
+    )
+
+
+@dataclass
+class Retrieval:
+    """검색 게이트 + 검색 결과 (세션 상태에 반영하기 전)"""
+
+    query: str
+    context: str
+    tokens: int
+    info: Dict[str, Any]                    # last_retrieval 형식
+    chunk_keys: Optional[List[str]] = None  # 새로 검색했을 때 컨텍스트 청크 순서
+    new_chunks: Dict[str, Tuple[str, int]] = field(default_factory=dict)  # 세션 캐시에 추가할 청크
+    usage: Optional[Dict[str, Any]] = None  # 워커 스레드에서 따로 모은 임베딩 사용량
+
+
+def _bigrams(text: str) -> set:
+    """정규화된 텍스트의 문자 bigram 집합 (쿼리 새로움 비교용)"""
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def _novelty(previous: str, current: str) -> float:
+    """정규화된 두 텍스트의 문자 bigram 차이 (1 - Jaccard, 0이면 같은 내용)"""
+    a, b = _bigrams(previous), _bigrams(current)
+    return 1.0 - len(a & b) / len(a | b)
+
 
 class StudentCounselingAgent:
     """학생 정서 상담 Agent"""
     
-    def __init__(self):
-        """초기화"""
-        # Structured Output으로 LLM 설정
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.7  # 친구 같은 톤 위해 약간 높게
-        ).with_structured_output(CounselingResponse)
-        
-        # 요약용 LLM (별도)
-        self.summary_llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0
-        )
+    def __init__(
+        self,
+        resources: Optional[AgentResources] = None,
+        retrieval_timeout: float = 3.0,
+        summary_interval: int = 3,
+        background_summary: bool = False,
+        history_token_budget: Optional[int] = None,
+        crisis_alert: Optional[Callable[[Dict], None]] = None,
+        tenant_id: str = "default",
+        session_id: Optional[str] = None
+    ):
+        """
+        초기화
+        
+        LLM / 검색기 클라이언트는 프로세스 전역 AgentResources를 공유하고,
+        세션마다 대화 히스토리와 턴 수만 따로 가짐
+        
+        Args:
+            resources: 공유 리소스 (기본값: get_resources())
+            retrieval_timeout: achat() / astream()에서 RAG 검색 대기 시간(초), 초과 시 매뉴얼 없이 응답
+            summary_interval: 롤링 요약을 백그라운드에서 갱신할 턴 간격
+            background_summary: True면 종료 시 답변을 바로 반환하고 종합 결과는
+                워커 스레드에서 생성 (pending_summary / poll_summary()로 조회)
+            history_token_budget: 프롬프트에 넣을 히스토리 토큰 예산 (기본값: 턴마다 고른 모델별 config)
+            crisis_alert: 사전 분류가 "높음"일 때 워커 스레드에서 호출할 상담 선생님 알림
+                (기본값: 로그 경고)
+            tenant_id: 학교(tenant) id (토큰 / 비용 집계 단위)
+            session_id: 세션 id (기본값: 새 uuid)
+        """
+        resources = resources or get_resources()
+        
+        self.tiers = resources.tiers
+        self.summary_llm = resources.summary_llm
+        self.retriever = resources.retriever
+        self.crisis_lexicon = resources.crisis_lexicon
+        self.crisis_classifier = resources.crisis_classifier
+        self.executor = resources.executor
+        self.alert_executor = resources.alert_executor
+        self.tracer = resources.tracer
+        self.usage_store = resources.usage_store
+        self.summary_model = resources.summary_model
         
-        # RAG 검색기
-        self.retriever = ManualRetriever()
+        self.retrieval_timeout = retrieval_timeout
+        self.summary_interval = summary_interval
+        self.background_summary = background_summary
+        self.history_token_budget = history_token_budget
+        self.crisis_alert = crisis_alert or log_crisis_alert
+        self.tenant_id = tenant_id
+        self.session_id = session_id or uuid.uuid4().hex
         
         # 대화 히스토리
-        self.conversation_history: List[Dict[str, str]] = []
+        # (메시지마다 추가 시점의 토큰 수를 "tokens"에 캐시)
+        self.conversation_history: List[Dict[str, Any]] = []
         self.turn_count = 0
+        
+        # 히스토리 윈도우 시작 위치와 그 앞부분을 접은 요약 (prefix 캐시 위해 고정)
+        self._window_start = 0
+        self._folded_text = ""
+        
+        # 마지막 메시지의 위기 키워드 매칭 결과 / 로컬 사전 분류 결과
+        self.last_crisis_hits: List[CrisisHit] = []
+        self.last_pre_risk: Optional[CrisisPrediction] = None
+        
+        # 이번 대화에서 긴급 경보가 난 적이 있는지 (긴급 연락처 고정 표시용)
+        # (분류기만 "높음"이면 _unconfirmed_alert에 두고 LLM 자살_신호도 "높음"일 때 경보)
+        self.escalated = False
+        self._unconfirmed_alert: Optional[Dict] = None
+        
+        # 직전 턴 LLM 평가 (자살_신호 / 정서적_고통) + 이번 턴 모델 라우팅 결과
+        self.last_signals: Dict[str, str] = {}
+        self.last_route: Dict[str, Any] = {}
+        
+        # RAG 검색 게이트 (직전 검색 쿼리 / 컨텍스트, 턴별 결정과 누적 통계)
+        self._last_query = ""
+        self._last_context = ""
+        self._reuse_count = 0
+        self.last_retrieval: Dict[str, Any] = {}
+        
+        # 세션 검색 캐시 (청크 id → (포맷된 컨텍스트 블록, 토큰 수)) + 직전 컨텍스트의 청크 순서 / 토큰 수
+        self._chunk_cache: Dict[str, Tuple[str, int]] = {}
+        self._last_chunk_keys: List[str] = []
+        self._last_context_tokens = 0
+        self.retrieval_stats: Dict[str, int] = {"retrieve": 0, "reuse": 0, "skip": 0, "timeout": 0}
+        
+        # 마지막 LLM 호출 토큰 사용량 (cached_tokens = 프롬프트 캐시 적중분)
+        self.last_usage: Dict[str, int] = {}
+        
+        # 마지막 턴 전체 사용량 (상담 / 요약 LLM + 쿼리 임베딩, 비용 포함)
+        self.last_turn_usage: Dict[str, Any] = {}
+        
+        # 롤링 요약 (summary가 history[:covered]까지 반영)
+        # 워커 스레드 / reset()과 함께 쓰는 요약 상태는 _summary_lock 안에서 읽고 씀
+        # (_generation: reset()마다 증가, 이전 세션의 늦은 결과를 버리는 기준)
+        self.rolling_summary: Optional[Dict] = None
+        self._summary_covered = 0
+        self._summary_future: Optional[Future] = None
+        self._summary_lock = threading.Lock()
+        self._generation = 0
+        
+        # 백그라운드 종합 결과 핸들 (background_summary=True일 때)
+        self.pending_summary: Optional[Future] = None
     
     def chat(self, user_message: str) -> Dict:
         """
@@ -53,91 +191,848 @@ class StudentCounselingAgent:
         # 턴 수 증가
         self.turn_count += 1
         
-        # 1. 일반 응답 생성
-        response = self._generate_response(user_message)
+        with self.tracer.span("chat.turn", turn=self.turn_count, mode="chat") as span, self._turn_usage():
+            # 1. 일반 응답 생성
+            response = self._generate_response(user_message)
+            
+            # 2. 히스토리 저장
+            self._append_turn(user_message, response)
+            self._annotate_turn(span, response)
+            
+            # 3. 종료 판단 시 종합 결과 생성
+            if response.종료_판단:
+                if self.background_summary:
+                    return {
+                        **response.model_dump(),
+                        **self._start_background_summary()
+                    }
+                
+                summary = self._generate_summary()
+                return {
+                    **response.model_dump(),
+                    "종합_결과": summary
+                }
+            
+            # 4. 롤링 요약 갱신 (백그라운드)
+            self._schedule_summary_update()
+            
+            return response.model_dump()
+    
+    async def achat(self, user_message: str) -> Dict:
+        """
+        학생과 대화 (비동기)
+        
+        RAG 검색을 먼저 시작하고, 검색이 진행되는 동안 프롬프트를 준비
+        
+        Args:
+            user_message: 학생의 메시지
+            
+        Returns:
+            Dict: 응답 + (종료 시) 종합 결과
+        """
+        self.turn_count += 1
+        
+        with self.tracer.span("chat.turn", turn=self.turn_count, mode="achat") as span, self._turn_usage():
+            response = await self._agenerate_response(user_message)
+            
+            self._append_turn(user_message, response)
+            self._annotate_turn(span, response)
+            
+            if response.종료_판단:
+                if self.background_summary:
+                    return {
+                        **response.model_dump(),
+                        **self._start_background_summary()
+                    }
+                
+                summary = await self._agenerate_summary()
+                return {
+                    **response.model_dump(),
+                    "종합_결과": summary
+                }
+            
+            self._schedule_summary_update()
+            
+            return response.model_dump()
+    
+    def chat_stream(self, user_message: str) -> Iterator[Dict]:
+        """
+        학생과 대화 (스트리밍)
+        
+        Args:
+            user_message: 학생의 메시지
+            
+        Yields:
+            Dict: {"type": "alert", "level", "probabilities"}: 키워드도 확인한 사전 분류 "높음" (LLM 응답 전)
+                  {"type": "token", "text"}: 답변 텍스트 조각
+                  {"type": "replace", "text"}: 스트리밍한 답변이 중간에 끊겨 재생성한 답변으로 교체
+                  {"type": "field", "name", "value"}: 완성된 필드 (자살_신호 등)
+                  {"type": "done", "response"}: 최종 응답 (chat()과 같은 형식)
+        """
+        self.turn_count += 1
+        
+        with self.tracer.span("chat.turn", turn=self.turn_count, mode="stream") as turn_span, self._turn_usage():
+            # 위기 사전 분류 (높음이면 첫 토큰 전에 바로 알림)
+            prediction = self._pre_classify(user_message)
+            if prediction.level == "높음" and prediction.confirmed:
+                yield {
+                    "type": "alert",
+                    "level": prediction.level,
+                    "probabilities": prediction.probabilities
+                }
+            
+            tier = self._select_tier(prediction)
+            
+            context = self._retrieve_context(user_message)
+            messages = self._build_messages(user_message, context)
+            
+            parser = StructuredStreamParser(stream_field="답변")
+            streamed = False
+            with self.tracer.span("llm.generate", model=tier.model, tier=tier.name, stream=True) as span:
+                started = time.perf_counter()
+                for chunk in tier.stream_llm.stream(messages):
+                    if chunk.usage_metadata:
+                        self._record_usage(chunk, tier.model)
+                    for event in parser.feed(chunk.content):
+                        if not streamed and event["type"] == "token":
+                            span.set(first_token_ms=round((time.perf_counter() - started) * 1000, 2))
+                            streamed = True
+                        yield event
+                span.set(**self.last_usage)
+            
+            try:
+                response = CounselingResponse.model_validate(parser.fields)
+            except Exception:
+                # JSON 모드 출력이 스키마와 다르면 Structured Output으로 재시도
+                response, event = self._stream_fallback(parser, streamed, self._invoke_llm(tier, messages))
+                if event is not None:
+                    yield event
+            
+            self._append_turn(user_message, response)
+            self._annotate_turn(turn_span, response)
+            
+            result = response.model_dump()
+            if response.종료_판단:
+                if self.background_summary:
+                    result.update(self._start_background_summary())
+                else:
+                    result["종합_결과"] = self._generate_summary()
+            else:
+                self._schedule_summary_update()
+            
+            yield {"type": "done", "response": result}
+    
+    async def astream(self, user_message: str) -> AsyncIterator[Dict]:
+        """
+        학생과 대화 (비동기 스트리밍, ASGI 서비스용)
+        
+        이벤트 형식은 chat_stream()과 같음. RAG 검색은 스레드에서 실행하고
+        retrieval_timeout을 넘기면 매뉴얼 없이 진행
+        
+        Args:
+            user_message: 학생의 메시지
+            
+        Yields:
+            Dict: chat_stream()과 같은 이벤트 (alert / token / replace / field / done)
+        """
+        self.turn_count += 1
         
-        # 2. 히스토리 저장
+        with self.tracer.span("chat.turn", turn=self.turn_count, mode="astream") as turn_span, self._turn_usage():
+            prediction = self._pre_classify(user_message)
+            if prediction.level == "높음" and prediction.confirmed:
+                yield {
+                    "type": "alert",
+                    "level": prediction.level,
+                    "probabilities": prediction.probabilities
+                }
+            
+            tier = self._select_tier(prediction)
+            
+            context = await self._aretrieve_context(user_message)
+            messages = self._build_messages(user_message, context)
+            
+            parser = StructuredStreamParser(stream_field="답변")
+            streamed = False
+            with self.tracer.span("llm.generate", model=tier.model, tier=tier.name, stream=True) as span:
+                started = time.perf_counter()
+                async for chunk in tier.stream_llm.astream(messages):
+                    if chunk.usage_metadata:
+                        self._record_usage(chunk, tier.model)
+                    for event in parser.feed(chunk.content):
+                        if not streamed and event["type"] == "token":
+                            span.set(first_token_ms=round((time.perf_counter() - started) * 1000, 2))
+                            streamed = True
+                        yield event
+                span.set(**self.last_usage)
+            
+            try:
+                response = CounselingResponse.model_validate(parser.fields)
+            except Exception:
+                # JSON 모드 출력이 스키마와 다르면 Structured Output으로 재시도
+                response, event = self._stream_fallback(parser, streamed, await self._ainvoke_llm(tier, messages))
+                if event is not None:
+                    yield event
+            
+            self._append_turn(user_message, response)
+            self._annotate_turn(turn_span, response)
+            
+            result = response.model_dump()
+            if response.종료_판단:
+                if self.background_summary:
+                    result.update(self._start_background_summary())
+                else:
+                    result["종합_결과"] = await self._agenerate_summary()
+            else:
+                self._schedule_summary_update()
+            
+            yield {"type": "done", "response": result}
+    
+    def _stream_fallback(
+        self,
+        parser: StructuredStreamParser,
+        streamed: bool,
+        response: CounselingResponse
+    ) -> Tuple[CounselingResponse, Optional[Dict]]:
+        """
+        스트리밍 검증 실패 후 Structured Output 재시도 결과를 학생이 본 답변과 맞춤
+        
+        - 답변을 끝까지 보냈으면 보낸 답변을 그대로 저장 (평가 필드만 재시도 결과 사용)
+        - 답변이 중간에 끊겼으면 재시도 답변으로 교체하는 replace 이벤트
+        - 답변을 하나도 못 보냈으면 재시도 답변을 token 이벤트로
+        
+        Returns:
+            Tuple[CounselingResponse, Optional[Dict]]: (저장할 응답, 추가로 보낼 이벤트)
+        """
+        if not streamed:
+            return response, {"type": "token", "text": response.답변}
+        
+        answer = parser.fields.get(parser.stream_field)
+        if isinstance(answer, str):
+            return response.model_copy(update={"답변": answer}), None
+        
+        return response, {"type": "replace", "text": response.답변}
+    
+    def _append_turn(self, user_message: str, response: CounselingResponse):
+        """히스토리 저장 (+ 다음 턴 라우팅에 쓸 평가 신호, 분류기 단독 "높음" 확인)"""
+        self.last_signals = {
+            "자살_신호": response.자살_신호,
+            "정서적_고통": response.정서적_고통
+        }
+        
+        alert, self._unconfirmed_alert = self._unconfirmed_alert, None
+        if alert is not None:
+            if response.자살_신호 == "높음":
+                self._escalate({**alert, "자살_신호": response.자살_신호})
+            else:
+                logger.info("분류기 단독 '높음'을 LLM 평가(%s)가 확인하지 않아 경보 안 함", response.자살_신호)
         self.conversation_history.append({
             "role": "user",
-            "content": user_message
+            "content": user_message,
+            "tokens": count_tokens(user_message)
         })
         self.conversation_history.append({
             "role": "assistant",
-            "content": response.답변
+            "content": response.답변,
+            "tokens": count_tokens(response.답변)
         })
-        
-        # 3. 종료 판단 시 종합 결과 생성
-        if response.종료_판단:
-            summary = self._generate_summary()
-            return {
-                **response.model_dump(),
-                "종합_결과": summary
-            }
-        
-        return response.model_dump()
     
     def _generate_response(self, user_message: str) -> CounselingResponse:
         """응답 생성"""
-        # 1. RAG 검색
+        # 1. 위기 사전 분류 (높음이면 LLM 응답을 기다리지 않고 알림) + 모델 선택
+        tier = self._select_tier(self._pre_classify(user_message))
+        
+        # 2. RAG 검색
         context = self._retrieve_context(user_message)
         
-        # 2. 메시지 구성
+        # 3. 메시지 구성
         messages = self._build_messages(user_message, context)
         
-        # 3. LLM 호출 (Structured Output)
-        response: CounselingResponse = self.llm.invoke(messages)
+        # 4. LLM 호출 (Structured Output)
+        return self._invoke_llm(tier, messages)
+    
+    async def _agenerate_response(self, user_message: str) -> CounselingResponse:
+        """응답 생성 (비동기, 검색과 프롬프트 준비 병렬)"""
+        # 0. 위기 사전 분류 (검색 k 결정 전에) + 모델 선택
+        tier = self._select_tier(self._pre_classify(user_message))
+        
+        # 1. RAG 검색 시작 (임베딩 + 벡터 검색을 바로 워커 스레드에 제출)
+        search = self._start_search(user_message)
+        
+        # 2. 검색 중에 히스토리 / 턴 안내 준비
+        history = self._history_messages()
+        notice = self._turn_notice()
         
+        # 3. 검색 대기 (deadline 초과 시 매뉴얼 없이 진행)
+        context = await self._aretrieve_context(user_message, search)
+        
+        # 4. 메시지 조립 + LLM 호출
+        messages = self._assemble_messages(user_message, context, history, notice)
+        return await self._ainvoke_llm(tier, messages)
+    
+    def _invoke_llm(self, tier: ModelTier, messages: List) -> CounselingResponse:
+        """상담 모델 호출 (Structured Output) + 토큰 사용량 span 기록"""
+        with self.tracer.span("llm.generate", model=tier.model, tier=tier.name) as span:
+            response = self._parse_structured(tier.llm.invoke(messages), tier.model)
+            span.set(**self.last_usage)
         return response
     
-    def _retrieve_context(self, query: str) -> str:
-        """RAG 검색"""
-        # 위기 관련 키워드 감지
-        crisis_keywords = [
-            "죽고", "자살", "사라지", "약", "뛰어내리",
-            "유서", "끝내", "살기 싫", "없어지"
-        ]
-        
-        # 위기 키워드 있으면 더 많이 검색
-        if any(keyword in query for keyword in crisis_keywords):
-            return self.retriever.search(query, k=5)
+    async def _ainvoke_llm(self, tier: ModelTier, messages: List) -> CounselingResponse:
+        """상담 모델 호출 (비동기)"""
+        with self.tracer.span("llm.generate", model=tier.model, tier=tier.name) as span:
+            response = self._parse_structured(await tier.llm.ainvoke(messages), tier.model)
+            span.set(**self.last_usage)
+        return response
+    
+    def _annotate_turn(self, span, response: CounselingResponse) -> None:
+        """턴 span에 라우팅 / 검색 / 토큰 / 평가 결과 기록"""
+        span.set(
+            model=self.last_route.get("모델"),
+            tier=self.last_route.get("구간"),
+            retrieval=self.last_retrieval.get("결정"),
+            suicide_signal=response.자살_신호,
+            finished=response.종료_판단,
+            **self.last_usage
+        )
+    
+    def _parse_structured(self, result: Dict, model: str) -> CounselingResponse:
+        """Structured Output 결과(include_raw) → 응답 + 토큰 사용량 기록"""
+        self._record_usage(result["raw"], model)
+        
+        if result["parsed"] is None:
+            raise result["parsing_error"] or ValueError("Structured Output 파싱 실패")
+        
+        return result["parsed"]
+    
+    @staticmethod
+    def _usage_attributes(message) -> Dict[str, int]:
+        """usage 메타데이터 → {"input_tokens", "output_tokens", "cached_tokens"}"""
+        usage = getattr(message, "usage_metadata", None) or {}
+        return {
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "cached_tokens": usage.get("input_token_details", {}).get("cache_read", 0)
+        }
+    
+    def _record_usage(self, message, model: str) -> None:
+        """API usage 메타데이터 기록 (프롬프트 캐시 적중 토큰 포함) + 턴 사용량 / 비용 집계"""
+        self.last_usage = self._usage_attributes(message)
+        self._account(llm_usage(model, **self.last_usage))
+    
+    def _account(self, usage: Dict[str, Any]) -> None:
+        """사용량 집계 (턴 안이면 턴 사용량에, 백그라운드 요약처럼 턴 밖이면 세션 / 학교 누적에 바로)"""
+        meter = current_meter()
+        if meter is not None:
+            meter.add(usage)
         else:
-            return self.retriever.search(query, k=3)
+            self.usage_store.add(self.tenant_id, self.session_id, usage)
+    
+    @contextmanager
+    def _turn_usage(self) -> Iterator[UsageMeter]:
+        """턴 사용량 집계 (끝나면 last_turn_usage + 세션 / 학교 누적에 기록)"""
+        with usage_scope() as meter:
+            try:
+                yield meter
+            finally:
+                self.last_turn_usage = meter.snapshot()
+                self.usage_store.add(
+                    self.tenant_id, self.session_id, self.last_turn_usage, turn=self.turn_count
+                )
+    
+    def usage(self) -> Dict[str, Dict[str, Any]]:
+        """
+        토큰 / 비용 사용량 조회
+        
+        Returns:
+            Dict: {"턴": 마지막 턴, "세션": 이 세션 누적, "학교": 학교 누적}
+                (각각 llm_calls, input_tokens, cached_tokens, output_tokens, embedding_tokens, cost_usd)
+        """
+        return {
+            "턴": dict(self.last_turn_usage),
+            "세션": self.usage_store.session_usage(self.session_id),
+            "학교": self.usage_store.tenant_usage(self.tenant_id)
+        }
+    
+    def _pre_classify(self, user_message: str) -> CrisisPrediction:
+        """
+        로컬 위기 사전 분류 (LLM 호출 전, 1ms 미만)
+        
+        "높음"이면 상담 선생님 알림을 워커 스레드에 넘기고 바로 반환해
+        LLM 호출과 알림이 동시에 진행되도록 함. 분류기만 "높음"이고 키워드는 아니면
+        이번 턴만 strong 모델로 보내고, 경보는 LLM 자살_신호도 "높음"일 때 (_append_turn)
+        
+        Args:
+            user_message: 학생의 메시지
+            
+        Returns:
+            CrisisPrediction: 사전 분류 결과 (last_pre_risk / last_crisis_hits에도 저장)
+        """
+        with self.tracer.span("crisis.pre_classify") as span:
+            if self.crisis_classifier is not None:
+                prediction = self.crisis_classifier.predict(user_message)
+            else:
+                prediction = lexicon_prediction(self.crisis_lexicon, user_message)
+            span.set(level=prediction.level, hits=len(prediction.hits))
+        
+        self.last_pre_risk = prediction
+        self.last_crisis_hits = list(prediction.hits)
+        
+        self._unconfirmed_alert = None
+        if prediction.level == "높음":
+            alert = {
+                "턴": self.turn_count,
+                "메시지": user_message,
+                "위기_키워드": [hit.term for hit in prediction.hits],
+                "확률": prediction.probabilities
+            }
+            if prediction.confirmed:
+                self._escalate(alert)
+            else:
+                self._unconfirmed_alert = alert
+        
+        return prediction
+    
+    def _escalate(self, alert: Dict) -> None:
+        """긴급 경보 (긴급 연락처 고정 + 이후 턴 strong 모델 + 상담 선생님 알림)"""
+        self.escalated = True
+        self.alert_executor.submit(self._send_crisis_alert, alert)
+    
+    def _select_tier(self, prediction: CrisisPrediction) -> ModelTier:
+        """
+        이번 턴 상담 모델 선택 (config.MODEL_TIERS)
+        
+        직전 턴 자살_신호 / 정서적_고통, 위기 키워드, 사전 분류가 모두 "낮음"일 때만 light,
+        하나라도 중간 이상이거나 신호끼리 어긋나면 strong. 한 번 긴급 경보가 난 대화는 계속 strong
+        
+        Args:
+            prediction: 이번 메시지의 사전 분류 결과
+            
+        Returns:
+            ModelTier: 선택된 모델
+        """
+        reasons = []
+        if self.escalated:
+            reasons.append("긴급 경보 이력")
+        for name, level in self.last_signals.items():
+            if level != "낮음":
+                reasons.append(f"직전 {name}={level}")
+        if prediction.level != "낮음":
+            reasons.append(f"사전 분류={prediction.level}")
+        if prediction.hits:
+            reasons.append(f"위기 키워드={[hit.term for hit in prediction.hits]}")
+        
+        name = STRONG_TIER if reasons else LIGHT_TIER
+        tier = self.tiers.get(name) or self.tiers[STRONG_TIER]
+        
+        self.last_route = {
+            "턴": self.turn_count,
+            "구간": tier.name,
+            "모델": tier.model,
+            "사유": reasons
+        }
+        logger.info(
+            "모델 라우팅: %d턴 → %s(%s) %s",
+            self.turn_count, tier.name, tier.model, ", ".join(reasons) or "모든 신호 낮음"
+        )
+        
+        return tier
+    
+    def _send_crisis_alert(self, alert: Dict):
+        """상담 선생님 알림 (워커 스레드, 실패해도 상담은 계속)"""
+        try:
+            self.crisis_alert(alert)
+        except Exception as e:
+            logger.error("위기 알림 전송 실패: %r", e)
+    
+    def _retrieve_context(self, query: str) -> str:
+        """
+        RAG 검색 (_pre_classify() 이후 호출)
+        
+        검색 게이트 결과에 따라 새로 검색(retrieve) / 직전 컨텍스트 재사용(reuse) / 생략(skip).
+        결정은 last_retrieval, 누적 횟수는 retrieval_stats에 기록
+        """
+        return self._commit_retrieval(self._search_context(query))
+    
+    async def _aretrieve_context(self, query: str, search: Optional[asyncio.Future] = None) -> str:
+        """
+        RAG 검색 (비동기, retrieval_timeout까지만 대기)
+        
+        검색은 워커 스레드에서 세션 상태를 바꾸지 않고 결과만 만들고, deadline 안에 끝난 결과만 반영.
+        늦게 끝난 결과는 버리고 임베딩 사용량만 세션 / 학교 누적에 더함 (이미 끝난 턴 사용량에는 넣지 않음)
+        
+        Args:
+            query: 학생 메시지
+            search: _start_search()로 미리 시작한 검색 (없으면 여기서 시작)
+        """
+        task = search or self._start_search(query)
+        try:
+            retrieval = await asyncio.wait_for(asyncio.shield(task), timeout=self.retrieval_timeout)
+        except asyncio.TimeoutError:
+            task.add_done_callback(self._account_late_retrieval)
+            self.retrieval_stats["timeout"] += 1
+            self.last_retrieval = {
+                "턴": self.turn_count,
+                "결정": "timeout",
+                "사유": [f"검색 {self.retrieval_timeout}초 초과"],
+                "k": 0,
+                "페이지_수": 0,
+                "확장_쿼리": [],
+                "캐시_적중": 0,
+                "컨텍스트_토큰": 0,
+                "지연_ms": round(self.retrieval_timeout * 1000, 2)
+            }
+            logger.warning("검색 게이트: %d턴 → 검색 시간 초과, 매뉴얼 없이 응답", self.turn_count)
+            return ""
+        
+        return self._commit_retrieval(retrieval)
+    
+    def _start_search(self, query: str) -> asyncio.Future:
+        """
+        검색을 워커 스레드에 바로 제출 (이벤트 루프 안에서 호출)
+        
+        asyncio.to_thread()는 첫 await 때에야 스레드에 넘어가므로, 그 사이의 동기 준비 작업과
+        겹치도록 run_in_executor()로 즉시 제출 (contextvars는 to_thread()처럼 복사)
+        """
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(None, contextvars.copy_context().run, self._search_isolated, query)
+    
+    def _search_isolated(self, query: str) -> Retrieval:
+        """워커 스레드용 _search_context (임베딩 사용량을 턴과 따로 모아 결과에 담음)"""
+        with usage_scope() as meter:
+            retrieval = self._search_context(query)
+        retrieval.usage = meter.snapshot()
+        return retrieval
+    
+    def _account_late_retrieval(self, task: asyncio.Future) -> None:
+        """deadline 이후 끝난 검색의 임베딩 사용량 → 세션 / 학교 누적"""
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.usage_store.add(self.tenant_id, self.session_id, task.result().usage)
+    
+    def _search_context(self, query: str) -> Retrieval:
+        """검색 게이트 결정에 따른 컨텍스트 (세션 상태는 읽기만 함)"""
+        with self.tracer.span("rag.retrieve", turn=self.turn_count) as span:
+            decision, reasons, k = self._gate_retrieval(query)
+            started = time.perf_counter()
+            cache_hits = 0
+            pages = 0
+            expansions: List[str] = []
+            chunk_keys = None
+            new_chunks: Dict[str, Tuple[str, int]] = {}
+            
+            if decision == "retrieve":
+                budget = CRISIS_CONTEXT_TOKEN_BUDGET if k >= 5 else CONTEXT_TOKEN_BUDGET
+                expansions = self._expand_query(query)
+                docs = self.retriever.assemble(query, k=k, token_budget=budget, expansions=expansions)
+                pages = len({doc.metadata.get("page") for doc in docs})
+                context, tokens, cache_hits, chunk_keys, new_chunks = self._build_context(docs)
+            elif decision == "reuse":
+                context = self._last_context
+                tokens = self._last_context_tokens
+            else:
+                context = ""
+                tokens = 0
+            
+            info = {
+                "턴": self.turn_count,
+                "결정": decision,
+                "사유": reasons,
+                "k": k if decision == "retrieve" else 0,
+                "페이지_수": pages,
+                "확장_쿼리": expansions,
+                "캐시_적중": cache_hits,
+                "컨텍스트_토큰": tokens,
+                "지연_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+            span.set(
+                decision=decision,
+                k=info["k"],
+                pages=pages,
+                expansions=len(expansions),
+                cache_hits=cache_hits,
+                context_tokens=tokens
+            )
+        
+        return Retrieval(query, context, tokens, info, chunk_keys, new_chunks)
+    
+    def _commit_retrieval(self, retrieval: Retrieval) -> str:
+        """검색 결과를 세션 상태에 반영 (게이트 상태 / 청크 캐시 / 결정 / 통계 / 사용량)"""
+        decision = retrieval.info["결정"]
+        
+        if decision == "retrieve":
+            self._chunk_cache.update(retrieval.new_chunks)
+            self._last_chunk_keys = retrieval.chunk_keys
+            self._last_query = retrieval.query
+            self._last_context = retrieval.context
+            self._last_context_tokens = retrieval.tokens
+            self._reuse_count = 0
+        elif decision == "reuse":
+            self._reuse_count += 1
+        
+        if retrieval.usage is not None:
+            self._account(retrieval.usage)
+        
+        self.retrieval_stats[decision] += 1
+        self.last_retrieval = retrieval.info
+        logger.info("검색 게이트: %d턴 → %s (%s)", self.turn_count, decision, ", ".join(retrieval.info["사유"]))
+        
+        return retrieval.context
+    
+    def _expand_query(self, query: str) -> List[str]:
+        """
+        검색 쿼리 확장 (원래 메시지와 함께 임베딩 요청 1회로 검색)
+        
+        - 직전 학생 발화: 짧거나 "그거", "아까 말한 거"처럼 앞 턴에 기대는 메시지, 직전 발화와 주제가
+          겹치는 메시지만 보완 (새 주제면 이전 주제 청크가 RRF로 섞이지 않도록 넣지 않음)
+        - 위기 신호가 있으면 위기 대응 중심으로 재작성한 쿼리
+        
+        Returns:
+            List[str]: 추가 쿼리 (없으면 빈 목록)
+        """
+        expansions = []
+        
+        previous = next(
+            (msg["content"] for msg in reversed(self.conversation_history) if msg["role"] == "user"),
+            None
+        )
+        if previous and previous != query:
+            normalized = normalize(query)[0]
+            if (
+                len(normalized) < QUERY_EXPANSION_MAX_CHARS
+                or any(marker in normalized for marker in QUERY_EXPANSION_REFERENTIAL)
+                or _novelty(normalize(previous)[0], normalized) < QUERY_EXPANSION_NOVELTY
+            ):
+                expansions.append(previous)
+        
+        prediction = self.last_pre_risk
+        level = prediction.level if prediction is not None else "낮음"
+        if level != "낮음" or self.last_crisis_hits:
+            signals = [f"위험 수준 {level}"] + [hit.term for hit in self.last_crisis_hits if not hit.negated]
+            expansions.append(CRISIS_QUERY_PROMPT.format(signals=", ".join(signals), message=query))
+        
+        return expansions
+    
+    def _build_context(self, docs: List) -> Tuple[str, int, int, List[str], Dict[str, Tuple[str, int]]]:
+        """
+        검색 결과 → 컨텍스트 (세션 캐시 사용, 캐시는 읽기만 하고 새 청크는 반환)
+        
+        이미 포맷한 청크는 캐시에서 그대로 꺼내고, 직전 컨텍스트에 있던 청크는 직전 순서대로
+        앞에 둠. 같은 청크 집합이면 직전 컨텍스트 문자열을 그대로 반환해 프롬프트가 바이트 단위로 같음
+        
+        Args:
+            docs: retriever.assemble() 결과 (청크 또는 병합된 span)
+            
+        Returns:
+            Tuple: (컨텍스트, 토큰 수, 캐시에서 꺼낸 청크 수, 청크 순서, 새로 포맷한 청크)
+        """
+        blocks = {}
+        new_chunks = {}
+        cache_hits = 0
+        for doc in docs:
+            key = chunk_key(doc)
+            cached = self._chunk_cache.get(key)
+            if cached is not None:
+                cache_hits += 1
+            else:
+                block = format_chunk(doc)
+                # 인덱싱 때 저장한 토큰 수 사용 (이전 인덱스면 여기서 한 번만 계산)
+                tokens = doc.metadata.get("display_tokens") or count_tokens(block)
+                cached = new_chunks[key] = (block, tokens)
+            blocks[key] = cached
+        
+        last_keys = self._last_chunk_keys
+        if set(blocks) == set(last_keys):
+            return self._last_context, self._last_context_tokens, cache_hits, last_keys, new_chunks
+        
+        keys = [key for key in last_keys if key in blocks]
+        keys += [key for key in blocks if key not in keys]
+        
+        context = CONTEXT_SEPARATOR.join(blocks[key][0] for key in keys)
+        tokens = sum(blocks[key][1] for key in keys)
+        if len(keys) > 1:
+            tokens += count_tokens(CONTEXT_SEPARATOR) * (len(keys) - 1)
+        
+        return context, tokens, cache_hits, keys, new_chunks
+    
+    def _gate_retrieval(self, query: str) -> Tuple[str, List[str], int]:
+        """
+        이번 턴에 매뉴얼 검색이 필요한지 판단
+        
+        1. 위기 키워드 / 사전 분류 중간 이상 → 항상 새로 검색 (높음이면 k=5)
+        2. 짧은 메시지 → 직전 턴 위험 신호가 남아 있으면 재사용, 아니면 생략
+        3. 직전 검색 쿼리와 거의 같은 내용 → 재사용 (연속 RETRIEVAL_GATE_MAX_REUSE회까지)
+        4. 그 외 → 새로 검색
+        
+        Returns:
+            Tuple[str, List[str], int]: (결정 "retrieve"/"reuse"/"skip", 사유, k)
+        """
+        prediction = self.last_pre_risk
+        level = prediction.level if prediction is not None else "낮음"
+        
+        # 1. 위기 신호
+        if level == "높음" or self.crisis_lexicon.is_crisis(self.last_crisis_hits):
+            return "retrieve", [f"위기 신호(사전 분류={level})"], 5
+        if level != "낮음" or self.last_crisis_hits:
+            return "retrieve", [f"위기 신호(사전 분류={level})"], 3
+        
+        normalized, _ = normalize(query)
+        has_previous = bool(self._last_context)
+        risk_trend = any(value != "낮음" for value in self.last_signals.values())
+        
+        # 2. 짧은 메시지
+        if len(normalized) < RETRIEVAL_GATE_MIN_CHARS:
+            if has_previous and risk_trend:
+                return "reuse", [f"짧은 메시지({len(normalized)}자)", "직전 턴 위험 신호 유지"], 0
+            return "skip", [f"짧은 메시지({len(normalized)}자)"], 0
+        
+        # 3. 직전 검색과 비교한 새로움
+        if has_previous and self._reuse_count < RETRIEVAL_GATE_MAX_REUSE:
+            novelty = _novelty(normalize(self._last_query)[0], normalized)
+            if novelty < RETRIEVAL_GATE_NOVELTY:
+                return "reuse", [f"직전 검색과 유사(새로움 {novelty:.2f})"], 0
+        
+        return "retrieve", ["새 주제"], 3
     
     def _build_messages(self, user_message: str, context: str) -> List:
         """프롬프트 메시지 구성"""
-        messages = []
-        
-        # 1. 시스템 프롬프트
-        messages.append(SystemMessage(content=SYSTEM_PROMPT))
+        with self.tracer.span("prompt.build") as span:
+            messages = self._assemble_messages(
+                user_message,
+                context,
+                self._history_messages(),
+                self._turn_notice()
+            )
+            span.set(messages=len(messages))
+            return messages
+    
+    def _history_messages(self) -> List:
+        """대화 히스토리 → 메시지 (토큰 예산 안의 최근 대화 + 이전 대화 요약)"""
+        self._collect_summary_update()
+        start = self._history_window_start()
         
-        # 2. RAG 컨텍스트
-        if context:
-            messages.append(SystemMessage(
-                content=CONTEXT_PROMPT.format(context=context)
-            ))
+        messages = []
+        if start > 0:
+            messages.append(SystemMessage(content=self._folded_text))
         
-        # 3. 대화 히스토리
-        for msg in self.conversation_history[-10:]:  # 최근 10턴
+        for msg in self.conversation_history[start:]:
             if msg["role"] == "user":
                 messages.append(HumanMessage(content=msg["content"]))
             else:
                 messages.append(AIMessage(content=msg["content"]))
+        return messages
+    
+    def _history_window_start(self) -> int:
+        """
+        히스토리 윈도우 시작 위치 (학생/AI 한 턴 단위)
         
-        # 4. 현재 메시지
-        messages.append(HumanMessage(content=user_message))
+        예산을 넘을 때만 시작 위치를 당기고, 한 번에 예산의 일부(HISTORY_WINDOW_REFILL_RATIO)까지
+        줄여 둠. 그 사이 몇 턴 동안은 접힌 요약과 히스토리 앞부분이 그대로 유지되어 prefix 캐시가 살아있음
+        """
+        history = self.conversation_history
+        used = sum(msg["tokens"] for msg in history[self._window_start:])
+        budget = self._history_budget()
         
-        # 5. 턴 수 정보 추가
+        if used <= budget:
+            return self._window_start
+        
+        target = budget * HISTORY_WINDOW_REFILL_RATIO
+        start = self._window_start
+        while used > target and start < len(history):
+            used -= history[start]["tokens"] + history[start + 1]["tokens"]
+            start += 2
+        
+        # 접힌 요약은 윈도우가 움직일 때만 다시 만들어 다음 이동 전까지 고정
+        self._window_start = start
+        self._folded_text = self._folded_history(start)
+        
+        return start
+    
+    def _history_budget(self) -> int:
+        """이번 턴 히스토리 토큰 예산 (지정값, 없으면 _select_tier()가 고른 모델 기준)"""
+        if self.history_token_budget:
+            return self.history_token_budget
+        model = self.last_route.get("모델") or self.tiers[STRONG_TIER].model
+        return get_history_token_budget(model)
+    
+    def _folded_history(self, end: int) -> str:
+        """
+        윈도우 밖(history[:end]) 이전 대화를 짧은 요약 메시지로 접기
+        
+        롤링 요약이 있으면 그대로 쓰고, 요약되지 않은 부분은 학생 발언 앞부분만 남김
+        """
+        parts = []
+        covered = 0
+        
+        if self.rolling_summary:
+            parts.append(self.rolling_summary.get("대화_요약", ""))
+            covered = self._summary_covered
+        
+        # 최근 발언부터 예산 안에서만 추가
+        lines = []
+        used = count_tokens(parts[0]) if parts else 0
+        for msg in reversed(self.conversation_history[covered:end]):
+            if msg["role"] != "user":
+                continue
+            line = f"- 학생: {msg['content'][:60]}"
+            used += count_tokens(line)
+            if used > FOLDED_HISTORY_TOKEN_BUDGET:
+                break
+            lines.append(line)
+        
+        parts.extend(reversed(lines))
+        
+        return FOLDED_HISTORY_PROMPT.format(summary="\n".join(parts))
+    
+    def _turn_notice(self) -> Optional[SystemMessage]:
+        """턴 수 안내 (10회 이상일 때)"""
         if self.turn_count >= 10:
-            messages.append(SystemMessage(
+            return SystemMessage(
                 content=f"현재 대화 턴: {self.turn_count}회. 10회 이상이므로 자연스럽게 마무리를 고려하세요."
+            )
+        return None
+    
+    def _assemble_messages(
+        self,
+        user_message: str,
+        context: str,
+        history: List,
+        notice: Optional[SystemMessage]
+    ) -> List:
+        """
+        준비된 조각으로 메시지 조립
+        
+        시스템 프롬프트 + 히스토리를 매 턴 같은 바이트열의 앞부분(prefix)으로 두고,
+        턴마다 바뀌는 RAG 컨텍스트 / 턴 안내는 맨 뒤에 붙여 프롬프트 캐시가 재사용되도록 함
+        """
+        messages = []
+        
+        # 1. 시스템 프롬프트 (고정)
+        messages.append(SystemMessage(content=SYSTEM_PROMPT))
+        
+        # 2. 대화 히스토리 (턴마다 뒤에만 추가됨)
+        messages.extend(history)
+        
+        # 3. 현재 메시지
+        messages.append(HumanMessage(content=user_message))
+        
+        # 4. RAG 컨텍스트 (턴마다 바뀜)
+        if context:
+            messages.append(SystemMessage(
+                content=CONTEXT_PROMPT.format(context=context)
             ))
         
+        # 5. 턴 수 정보 추가
+        if notice is not None:
+            messages.append(notice)
+        
         return messages
     
-    def _format_history(self) -> str:
+    def _format_history(self, messages: Optional[List[Dict[str, str]]] = None) -> str:
         """대화 히스토리 포맷"""
+        if messages is None:
+            messages = self.conversation_history
+        
         formatted = []
-        for msg in self.conversation_history:
+        for msg in messages:
             role = "학생" if msg["role"] == "user" else "AI"
             formatted.append(f"{role}: {msg['content']}")
         return "\n".join(formatted)
@@ -146,50 +1041,263 @@ class StudentCounselingAgent:
         """
         종합 결과 생성 (종료 시 자동 호출)
         
+        백그라운드 롤링 요약이 있으면 그 이후의 새 대화만 반영 (delta 호출)
+        
         Returns:
             Dict: 종합 결과
         """
-        if not self.conversation_history:
+        self._collect_summary_update(wait=True)
+        
+        history, summary, covered, turn_count = self._summary_snapshot()
+        if not history:
             return {
                 "총_대화_턴": 0,
                 "대화_요약": "대화 없음"
             }
         
-        # 프롬프트 구성
-        prompt = SUMMARY_PROMPT.format(
-            history=self._format_history(),
-            turn_count=self.turn_count
-        )
+        new_messages = history[covered:]
+        if not new_messages:
+            return {**summary, "총_대화_턴": turn_count}
+        
+        with self.tracer.span("llm.summary", turn=turn_count, messages=len(new_messages)) as span:
+            response = self.summary_llm.invoke(
+                self._summary_messages(summary, new_messages, turn_count)
+            )
+            usage = self._usage_attributes(response)
+            span.set(**usage)
+        self._account(llm_usage(self.summary_model, **usage))
+        
+        return self._parse_summary(response.content)
+    
+    async def _agenerate_summary(self) -> Dict:
+        """종합 결과 생성 (비동기)"""
+        future = self._summary_future
+        if future is not None:
+            await asyncio.wait([asyncio.wrap_future(future)])
+            self._collect_summary_update()
+        
+        history, summary, covered, turn_count = self._summary_snapshot()
+        if not history:
+            return {
+                "총_대화_턴": 0,
+                "대화_요약": "대화 없음"
+            }
+        
+        new_messages = history[covered:]
+        if not new_messages:
+            return {**summary, "총_대화_턴": turn_count}
+        
+        with self.tracer.span("llm.summary", turn=turn_count, messages=len(new_messages)) as span:
+            response = await self.summary_llm.ainvoke(
+                self._summary_messages(summary, new_messages, turn_count)
+            )
+            usage = self._usage_attributes(response)
+            span.set(**usage)
+        self._account(llm_usage(self.summary_model, **usage))
         
-        response = self.summary_llm.invoke([
-            SystemMessage(content=prompt)
-        ])
+        return self._parse_summary(response.content)
+    
+    def _start_background_summary(self) -> Dict:
+        """
+        종합 결과를 워커 스레드에서 생성 시작
+        
+        진행 중인 롤링 요약은 먼저 제출되어 이미 실행 중이므로(FIFO),
+        이 작업이 그 결과를 기다려도 스레드 풀이 막히지 않음
+        
+        Returns:
+            Dict: 응답에 덧붙일 대기 표시 ({"종합_결과": None, "종합_결과_대기": True})
+        """
+        self.pending_summary = self.executor.submit(self._generate_summary)
+        return {
+            "종합_결과": None,
+            "종합_결과_대기": True
+        }
+    
+    def poll_summary(self) -> Optional[Dict]:
+        """
+        백그라운드 종합 결과 조회
+        
+        Returns:
+            Optional[Dict]: 완성된 종합 결과 (아직 생성 중이거나 요청이 없으면 None)
+        """
+        future = self.pending_summary
+        if future is None or not future.done():
+            return None
         
-        # JSON 파싱
+        try:
+            return future.result()
+        except Exception as e:
+            return {
+                "총_대화_턴": self.turn_count,
+                "대화_요약": "요약 생성 실패",
+                "오류": str(e)
+            }
+    
+    async def aget_summary(self) -> Dict:
+        """
+        종합 결과 조회 (비동기)
+        
+        종료 턴에서 백그라운드 생성을 시작했으면 그 결과를 기다리고,
+        아니면 지금까지의 대화로 새로 생성 (상담 중간 확인용)
+        
+        Returns:
+            Dict: 종합 결과
+        """
+        if self.pending_summary is not None:
+            await asyncio.wait([asyncio.wrap_future(self.pending_summary)])
+            return self.poll_summary()
+        
+        return await self._agenerate_summary()
+    
+    def _schedule_summary_update(self):
+        """새 대화가 summary_interval 턴 이상 쌓이면 롤링 요약을 백그라운드에서 갱신"""
+        self._collect_summary_update()
+        
+        with self._summary_lock:
+            if self._summary_future is not None:
+                return
+            
+            new_messages = self.conversation_history[self._summary_covered:]
+            if len(new_messages) < self.summary_interval * 2:
+                return
+            
+            self._summary_future = self.executor.submit(
+                self._update_summary,
+                self.rolling_summary,
+                new_messages,
+                len(self.conversation_history),
+                self.turn_count
+            )
+    
+    def _update_summary(
+        self,
+        summary: Optional[Dict],
+        new_messages: List[Dict[str, str]],
+        covered: int,
+        turn_count: int
+    ) -> Tuple[Dict, int]:
+        """롤링 요약 1회 갱신 (이전 요약 + 새 대화만 사용, 워커 스레드에서 실행)"""
+        with self.tracer.span("llm.summary", turn=turn_count, messages=len(new_messages), background=True) as span:
+            response = self.summary_llm.invoke(
+                self._summary_messages(summary, new_messages, turn_count)
+            )
+            usage = self._usage_attributes(response)
+            span.set(**usage)
+        self._account(llm_usage(self.summary_model, **usage))
+        return self._parse_summary(response.content), covered
+    
+    def _collect_summary_update(self, wait: bool = False):
+        """
+        완료된 백그라운드 요약 반영 (메인 스레드 / 종합 결과 워커 스레드 모두 호출)
+        
+        Args:
+            wait: True면 진행 중인 갱신이 끝날 때까지 대기
+        """
+        with self._summary_lock:
+            future = self._summary_future
+            generation = self._generation
+        if future is None or not (wait or future.done()):
+            return
+        
+        try:
+            summary, covered = future.result()
+        except Exception:
+            # 실패한 구간은 다음 갱신 또는 종료 시 delta 호출에 포함됨
+            summary = None
+        
+        with self._summary_lock:
+            # 다른 스레드가 먼저 반영했거나 reset()으로 이전 세션 결과가 됐으면 버림
+            if self._summary_future is not future or self._generation != generation:
+                return
+            self._summary_future = None
+            if summary is not None and "오류" not in summary:
+                self.rolling_summary = summary
+                self._summary_covered = covered
+    
+    def _summary_snapshot(self) -> Tuple[List[Dict[str, Any]], Optional[Dict], int, int]:
+        """요약에 쓸 세션 상태 (히스토리, 롤링 요약, 반영 위치, 턴 수)를 reset()과 섞이지 않게 한 번에"""
+        with self._summary_lock:
+            return (
+                list(self.conversation_history),
+                self.rolling_summary,
+                self._summary_covered,
+                self.turn_count
+            )
+    
+    def _summary_messages(
+        self,
+        summary: Optional[Dict],
+        messages: List[Dict[str, str]],
+        turn_count: int
+    ) -> List:
+        """요약 프롬프트 구성 (이전 요약이 있으면 새 대화만 반영)"""
+        if summary is None:
+            prompt = SUMMARY_PROMPT.format(
+                history=self._format_history(messages),
+                turn_count=turn_count
+            )
+        else:
+            prompt = ROLLING_SUMMARY_PROMPT.format(
+                summary=json.dumps(summary, ensure_ascii=False, indent=2),
+                history=self._format_history(messages),
+                turn_count=turn_count
+            )
+        return [SystemMessage(content=prompt)]
+    
+    def _parse_summary(self, content: str) -> Dict:
+        """요약 응답 JSON 파싱"""
         try:
             # JSON 추출 (```json ... ``` 제거)
-            content = response.content
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
+            text = content
+            if "```json" in text:
+                text = text.split("```json")[1].split("```")[0]
+            elif "```" in text:
+                text = text.split("```")[1].split("```")[0]
             
-            summary = json.loads(content.strip())
+            summary = json.loads(text.strip())
         except Exception as e:
             # 파싱 실패 시 기본 요약
             summary = {
                 "총_대화_턴": self.turn_count,
                 "대화_요약": "요약 생성 실패",
                 "오류": str(e),
-                "원본": response.content[:500]
+                "원본": content[:500]
             }
         
         return summary
     
     def reset(self):
         """대화 초기화"""
-        self.conversation_history = []
-        self.turn_count = 0
+        # 진행 중인 백그라운드 요약은 시작 전이면 취소, 실행 중이면 세대가 달라 결과를 버림
+        with self._summary_lock:
+            self._generation += 1
+            for future in (self._summary_future, self.pending_summary):
+                if future is not None:
+                    future.cancel()
+            self.conversation_history = []
+            self.turn_count = 0
+            self.rolling_summary = None
+            self._summary_covered = 0
+            self._summary_future = None
+            self.pending_summary = None
+        
+        self._window_start = 0
+        self._folded_text = ""
+        self.last_usage = {}
+        self.last_crisis_hits = []
+        self.last_pre_risk = None
+        self.escalated = False
+        self._unconfirmed_alert = None
+        self.last_signals = {}
+        self.last_route = {}
+        self._last_query = ""
+        self._last_context = ""
+        self._reuse_count = 0
+        self.last_retrieval = {}
+        self._chunk_cache = {}
+        self._last_chunk_keys = []
+        self._last_context_tokens = 0
+        self.retrieval_stats = {"retrieve": 0, "reuse": 0, "skip": 0, "timeout": 0}
 
 
 # 테스트
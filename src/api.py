@@ -0,0 +1,221 @@
+"""
+학생 정서 상담 Agent ASGI 서비스 (FastAPI)
+학교 LMS 임베드용: 세션 생성 / 메시지(SSE 토큰 스트리밍) / 종합 결과 / 초기화
+
+세션(대화 상태)은 인스턴스 메모리에 보관하므로, 여러 인스턴스를 로드밸런서 뒤에 둘 때는
+세션 id 기준 sticky 라우팅이 필요 (LLM / 검색 클라이언트는 인스턴스 안에서 모든 세션이 공유)
+
+실행:
+    uvicorn src.api:app --host 0.0.0.0 --port 8000 --workers 1
+
+SSE 이벤트 (POST /sessions/{session_id}/messages, stream=true):
+    event: alert  data: {"level", "probabilities"}    키워드도 확인한 사전 분류 "높음" (첫 토큰 전)
+    event: token  data: {"text"}                      답변 텍스트 조각
+    event: replace data: {"text"}                     스트리밍한 답변이 끊겨 재생성한 답변으로 교체
+    event: field  data: {"name", "value"}             완성된 필드 (자살_신호 등)
+    event: done   data: {...}                         최종 응답 (chat()과 같은 형식)
+    event: error  data: {"오류"}                      처리 실패
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from .agent import StudentCounselingAgent
+from .config import SESSION_IDLE_TIMEOUT, MAX_SESSIONS
+from .resources import AgentResources, get_resources
+
+logger = logging.getLogger(__name__)
+
+
+class SessionCreate(BaseModel):
+    """세션 생성 요청"""
+    tenant_id: str = Field(default="default", description="학교 id (토큰 / 비용 집계 단위)")
+
+
+class MessageRequest(BaseModel):
+    """메시지 요청"""
+    message: str = Field(min_length=1, description="학생의 메시지")
+    stream: bool = Field(default=True, description="True면 SSE 토큰 스트리밍, False면 JSON 한 번에")
+
+
+class Session:
+    """세션 하나 (Agent + 턴 직렬화용 lock)"""
+
+    def __init__(self, agent: StudentCounselingAgent):
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """인스턴스 메모리 세션 보관 (유휴 시간 초과 / 최대 개수 초과 시 오래된 세션부터 제거)"""
+
+    def __init__(
+        self,
+        resources: AgentResources,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+        max_sessions: int = MAX_SESSIONS
+    ):
+        """
+        초기화
+
+        Args:
+            resources: 모든 세션이 공유할 리소스
+            idle_timeout: 마지막 요청 후 세션 보관 시간(초)
+            max_sessions: 최대 세션 수
+        """
+        self.resources = resources
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def create(self, tenant_id: str) -> str:
+        """새 세션 생성, 세션 id 반환"""
+        self._evict()
+        agent = StudentCounselingAgent(
+            resources=self.resources,
+            background_summary=True,  # 종료 턴은 답변 먼저, 종합 결과는 summary 엔드포인트로
+            tenant_id=tenant_id
+        )
+        self._sessions[agent.session_id] = Session(agent)
+        return agent.session_id
+
+    def get(self, session_id: str) -> Session:
+        """세션 조회 (없거나 만료되면 404)"""
+        session = self._sessions.get(session_id)
+        if session is None or time.monotonic() - session.last_used > self.idle_timeout:
+            self._sessions.pop(session_id, None)
+            raise HTTPException(status_code=404, detail="세션이 없거나 만료되었습니다")
+
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _evict(self) -> None:
+        """만료 세션 + 최대 개수 초과분 제거 (가장 오래 쓰지 않은 것부터)"""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_timeout and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Agent 스트리밍 이벤트 → SSE 메시지 ("type"이 event 이름, 나머지가 data)"""
+    event = dict(event)
+    name = event.pop("type")
+    if name == "done":
+        event = event["response"]
+    return f"event: {name}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def stream_turn(session: Session, message: str) -> AsyncIterator[str]:
+    """
+    턴 하나를 SSE로 스트리밍 (send_message가 잡아 둔 세션 lock을 끝나면 해제)
+
+    첫 yield("")는 send_message가 응답을 반환하기 전에 소비하는 준비 단계.
+    여기까지 진행해 두면 클라이언트가 읽기 전에 끊어도 제너레이터 정리(aclose) 때 finally에서 lock이 풀림
+    """
+    try:
+        yield ""
+        async for event in session.agent.astream(message):
+            yield format_sse(event)
+    except Exception as e:
+        logger.exception("스트리밍 응답 실패")
+        yield format_sse({"type": "error", "오류": str(e)})
+    finally:
+        session.lock.release()
+
+
+def create_app(resources: Optional[AgentResources] = None) -> FastAPI:
+    """
+    ASGI 앱 생성
+
+    Args:
+        resources: 공유 리소스 (기본값: 시작 시 get_resources())
+
+    Returns:
+        FastAPI: uvicorn 등 ASGI 서버로 실행할 앱
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.sessions = SessionStore(
+            resources or get_resources(),
+            idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", SESSION_IDLE_TIMEOUT)),
+            max_sessions=int(os.getenv("MAX_SESSIONS", MAX_SESSIONS))
+        )
+        yield
+
+    app = FastAPI(title="학생 정서 상담 AI", lifespan=lifespan)
+
+    @app.get("/healthz")
+    async def healthz() -> Dict[str, Any]:
+        """로드밸런서 헬스 체크"""
+        return {"status": "ok", "sessions": len(app.state.sessions)}
+
+    @app.post("/sessions", status_code=201)
+    async def create_session(request: SessionCreate) -> Dict[str, str]:
+        """세션 생성"""
+        return {"session_id": app.state.sessions.create(request.tenant_id)}
+
+    @app.post("/sessions/{session_id}/messages")
+    async def send_message(session_id: str, request: MessageRequest):
+        """학생 메시지 처리 (stream=True면 SSE, 같은 세션에서 이전 턴 처리 중이면 409)"""
+        session = app.state.sessions.get(session_id)
+        if session.lock.locked():
+            raise HTTPException(status_code=409, detail="이전 메시지를 처리 중입니다")
+
+        # 응답을 반환하기 전에 lock을 잡아 둠 (바로 위에서 비어 있음을 확인했으므로 기다리지 않음)
+        await session.lock.acquire()
+
+        if not request.stream:
+            try:
+                return await session.agent.achat(request.message)
+            finally:
+                session.lock.release()
+
+        stream = stream_turn(session, request.message)
+        await stream.__anext__()
+        return StreamingResponse(
+            stream,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @app.get("/sessions/{session_id}/summary")
+    async def get_summary(session_id: str) -> Dict[str, Any]:
+        """종합 결과 (종료 턴에서 시작한 백그라운드 생성을 기다리거나, 지금까지의 대화로 생성) + 세션 사용량"""
+        session = app.state.sessions.get(session_id)
+        async with session.lock:
+            summary = await session.agent.aget_summary()
+            return {
+                "session_id": session_id,
+                "종합_결과": summary,
+                "사용량": session.agent.usage()["세션"]
+            }
+
+    @app.post("/sessions/{session_id}/reset")
+    async def reset_session(session_id: str) -> Dict[str, str]:
+        """대화 초기화 (세션 id는 유지)"""
+        session = app.state.sessions.get(session_id)
+        async with session.lock:
+            session.agent.reset()
+        return {"session_id": session_id}
+
+    return app
+
+
+app = create_app()
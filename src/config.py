@@ -0,0 +1,92 @@
+"""
+모델별 설정
+"""
+
+# 대화 히스토리에 쓸 수 있는 최대 토큰 수 (시스템 프롬프트 / RAG 컨텍스트 제외)
+HISTORY_TOKEN_BUDGETS = {
+    "gpt-4o": 3000,
+    "gpt-4o-mini": 2000,
+}
+
+DEFAULT_HISTORY_TOKEN_BUDGET = 2000
+
+# 히스토리가 예산을 넘으면 예산의 이 비율까지 한 번에 줄임 (몇 턴 동안 prefix 고정)
+HISTORY_WINDOW_REFILL_RATIO = 0.6
+
+# 윈도우 밖으로 밀려난 이전 대화를 접은 요약 메시지의 최대 토큰 수
+FOLDED_HISTORY_TOKEN_BUDGET = 300
+
+
+def get_history_token_budget(model: str) -> int:
+    """모델별 히스토리 토큰 예산"""
+    return HISTORY_TOKEN_BUDGETS.get(model, DEFAULT_HISTORY_TOKEN_BUDGET)
+
+
+# 위험도 구간별 상담 모델 (agent가 턴마다 선택)
+# - light: 이전 턴 신호 / 위기 키워드 / 사전 분류가 모두 "낮음"인 일상 대화
+# - strong: 하나라도 중간 이상이거나 신호끼리 어긋날 때
+MODEL_TIERS = {
+    "light": {"model": "gpt-4o-mini", "timeout": 15.0, "max_tokens": 500},
+    "strong": {"model": "gpt-4o", "timeout": 30.0, "max_tokens": 1000},
+}
+
+LIGHT_TIER = "light"
+STRONG_TIER = "strong"
+
+
+# RAG 검색 게이트 (agent._gate_retrieval)
+# 정규화 후 이 글자 수 미만인 짧은 메시지("응", "고마워", "그냥 그래")는 새로 검색하지 않음
+RETRIEVAL_GATE_MIN_CHARS = 6
+
+# 직전 검색 쿼리와의 문자 bigram 차이(1 - Jaccard)가 이 값 미만이면 직전 컨텍스트 재사용
+RETRIEVAL_GATE_NOVELTY = 0.35
+
+# 직전 컨텍스트를 연속으로 재사용할 수 있는 최대 턴 수
+RETRIEVAL_GATE_MAX_REUSE = 3
+
+# 검색 쿼리 확장 (agent._expand_query): 직전 학생 발화를 함께 검색하는 조건 (하나라도 맞으면)
+# 정규화 후 이 글자 수 미만인 짧은 메시지 / 지시어로 앞 턴을 가리키는 메시지 / 직전 발화와의 새로움이 이 값 미만
+QUERY_EXPANSION_MAX_CHARS = 15
+QUERY_EXPANSION_NOVELTY = 0.7
+QUERY_EXPANSION_REFERENTIAL = (
+    "그거", "그게", "그걸", "그건", "그때", "그얘기", "그일", "그사람", "그런거",
+    "아까", "거기", "걔", "이거", "저거"
+)
+
+
+# RAG 컨텍스트 토큰 예산 (MMR + 인접 청크 병합 후 이 안에서 채움)
+CONTEXT_TOKEN_BUDGET = 1500
+
+# 위기 신호가 있을 때(k=5)의 컨텍스트 토큰 예산
+CRISIS_CONTEXT_TOKEN_BUDGET = 2500
+
+
+# 임베딩 모델 (인덱싱 / 검색 공용)
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_DIMENSIONS = 3072
+
+# Matryoshka 1차 검색 차원 (앞부분만 잘라 재정규화한 벡터로 후보를 고르고 전체 차원으로 재정렬)
+MATRYOSHKA_DIMENSIONS = 256
+
+
+# API 서비스(src/api.py) 세션 보관: 마지막 요청 후 유휴 시간(초) / 인스턴스당 최대 세션 수
+SESSION_IDLE_TIMEOUT = 1800
+MAX_SESSIONS = 5000
+
+
+# 모델별 가격 (USD / 1M 토큰, 토큰·비용 집계용)
+# cached_input: 프롬프트 캐시 적중 입력 토큰 가격
+MODEL_PRICES = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "text-embedding-3-large": {"input": 0.13},
+    "text-embedding-3-small": {"input": 0.02},
+}
+
+
+def get_model_price(model: str) -> dict:
+    """모델 가격 (스냅샷 이름 "gpt-4o-2024-08-06"은 가장 긴 접두어로 찾고, 모르는 모델은 0)"""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model == name or model.startswith(name + "-"):
+            return MODEL_PRICES[name]
+    return {}
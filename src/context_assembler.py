@@ -0,0 +1,231 @@
+"""
+RAG 컨텍스트 조립
+검색 후보를 MMR로 골라 중복을 줄이고, 같은 페이지의 인접 청크는 겹치는 부분(chunk_overlap)을
+제거해 하나로 합친 뒤, 토큰 예산 안에서 컨텍스트 블록 목록을 만듦
+"""
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .tokens import count_tokens
+from .vector_index import chunk_id, display_text, normalize_rows
+
+# MMR 관련도 / 다양성 가중치 (1이면 순위 그대로)
+MMR_LAMBDA = 0.7
+
+# 인접 청크 병합 시 찾아볼 최대 겹침 길이 (chunk_and_embed.py의 chunk_overlap=200보다 약간 크게)
+MAX_OVERLAP_CHARS = 300
+
+# 겹침으로 인정할 최소 길이 (더 짧은 일치는 우연: "…한다" + "다음은" → "…한다음은"이 되지 않도록)
+MIN_OVERLAP_CHARS = 20
+
+
+def _bigrams(text: str) -> set:
+    """문자 bigram 집합 (임베딩이 없을 때의 후보 간 유사도)"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def text_similarity_matrix(texts: List[str]) -> np.ndarray:
+    """문자 bigram Jaccard 유사도 행렬"""
+    grams = [_bigrams(text) for text in texts]
+    n = len(texts)
+    sim = np.eye(n, dtype=np.float32)
+    for i in range(n):
+        for j in range(i + 1, n):
+            union = len(grams[i] | grams[j])
+            sim[i, j] = sim[j, i] = len(grams[i] & grams[j]) / union if union else 0.0
+    return sim
+
+
+def embedding_similarity_matrix(vectors: np.ndarray) -> np.ndarray:
+    """코사인 유사도 행렬"""
+    vectors = normalize_rows(vectors)
+    return vectors @ vectors.T
+
+
+def mmr_order(
+    relevance: np.ndarray,
+    similarity: np.ndarray,
+    lambda_mult: float = MMR_LAMBDA
+) -> List[int]:
+    """
+    Maximal Marginal Relevance 순서
+
+    Args:
+        relevance: (후보 수,) 쿼리 관련도 (0~1)
+        similarity: (후보 수, 후보 수) 후보 간 유사도
+        lambda_mult: 관련도 가중치
+
+    Returns:
+        List[int]: 후보 번호 (선택 순서)
+    """
+    n = len(relevance)
+    if n == 0:
+        return []
+
+    order = [int(np.argmax(relevance))]
+    max_sim = similarity[order[0]].copy()
+    remaining = np.ones(n, dtype=bool)
+    remaining[order[0]] = False
+
+    while remaining.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_sim
+        scores[~remaining] = -np.inf
+        best = int(np.argmax(scores))
+        order.append(best)
+        remaining[best] = False
+        max_sim = np.maximum(max_sim, similarity[best])
+
+    return order
+
+
+def merge_overlap(
+    first: str,
+    second: str,
+    max_overlap: int = MAX_OVERLAP_CHARS,
+    min_overlap: int = MIN_OVERLAP_CHARS
+) -> str:
+    """
+    인접 청크 본문 합치기 (first의 끝과 second의 앞이 겹치는 가장 긴 부분을 한 번만)
+
+    Args:
+        first: 앞 청크 본문
+        second: 바로 다음 청크 본문
+        max_overlap: 찾아볼 최대 겹침 길이
+        min_overlap: 겹침으로 인정할 최소 길이
+
+    Returns:
+        str: 합친 본문 (min_overlap 이상 겹치지 않으면 줄바꿈으로 연결)
+    """
+    for length in range(min(len(first), len(second), max_overlap), min_overlap - 1, -1):
+        if first.endswith(second[:length]):
+            return first + second[length:]
+    return first + "\n" + second
+
+
+def merge_adjacent(docs: List[Document]) -> List[Document]:
+    """
+    같은 페이지의 연속 청크(chunk_index i, i+1, ...)를 하나의 span Document로 병합
+
+    span의 순서는 구성 청크 중 가장 먼저 선택된 청크의 순서를 따름
+
+    Args:
+        docs: 선택 순서대로의 청크
+
+    Returns:
+        List[Document]: span 목록 (metadata: chunk_id="p11-c01+p11-c02", display, display_tokens)
+    """
+    rank = {id(doc): i for i, doc in enumerate(docs)}
+    by_position = sorted(
+        docs,
+        key=lambda d: (str(d.metadata.get("page", "")), d.metadata.get("chunk_index", 0))
+    )
+
+    groups: List[List[Document]] = []
+    for doc in by_position:
+        if groups:
+            prev = groups[-1][-1]
+            if (
+                prev.metadata.get("page") == doc.metadata.get("page")
+                and "chunk_index" in doc.metadata
+                and doc.metadata["chunk_index"] == prev.metadata.get("chunk_index", -2) + 1
+            ):
+                groups[-1].append(doc)
+                continue
+        groups.append([doc])
+
+    groups.sort(key=lambda group: min(rank[id(doc)] for doc in group))
+
+    spans = []
+    for group in groups:
+        if len(group) == 1:
+            spans.append(group[0])
+            continue
+
+        text = group[0].page_content
+        for doc in group[1:]:
+            text = merge_overlap(text, doc.page_content)
+
+        page = group[0].metadata.get("page", "?")
+        display = display_text(text, page)
+        spans.append(Document(
+            page_content=text,
+            metadata={
+                **group[0].metadata,
+                "chunk_id": "+".join(
+                    doc.metadata.get("chunk_id")
+                    or chunk_id(doc.metadata.get("page", 0), doc.metadata.get("chunk_index", 0))
+                    for doc in group
+                ),
+                "display": display,
+                "display_tokens": count_tokens(display)
+            }
+        ))
+
+    return spans
+
+
+def span_tokens(doc: Document) -> int:
+    """span 표시 형태의 토큰 수 (인덱싱 때 저장한 값 우선)"""
+    tokens = doc.metadata.get("display_tokens")
+    if tokens:
+        return tokens
+    return count_tokens(display_text(doc.page_content, doc.metadata.get("page", "?")))
+
+
+def assemble_context(
+    candidates: List[Document],
+    k: int,
+    token_budget: Optional[int] = None,
+    vectors: Optional[np.ndarray] = None,
+    lambda_mult: float = MMR_LAMBDA,
+    separator_tokens: int = 0,
+    similarity: Optional[Callable[[List[str]], np.ndarray]] = None
+) -> List[Document]:
+    """
+    검색 후보 → 컨텍스트 span 목록
+
+    후보를 MMR 순서로 하나씩 추가하면서 인접 청크를 병합하고,
+    토큰 예산(있으면)을 넘기 직전까지 또는 청크 k개까지 채움. 첫 후보는 예산과 무관하게 포함
+
+    Args:
+        candidates: 검색 후보 (관련도 순위순)
+        k: 최대 청크 수
+        token_budget: 컨텍스트 토큰 예산 (None이면 k개)
+        vectors: 후보 임베딩 (없으면 문자 bigram 유사도 사용)
+        lambda_mult: MMR 관련도 가중치
+        separator_tokens: 블록 사이 구분자 토큰 수
+        similarity: 임베딩이 없을 때의 유사도 함수 (기본값: text_similarity_matrix)
+
+    Returns:
+        List[Document]: span 목록
+    """
+    if not candidates:
+        return []
+
+    # 순위 기반 관련도 (1위 = 1, 선형 감소; RRF 결과에는 공통 점수 척도가 없음)
+    relevance = 1.0 - np.arange(len(candidates), dtype=np.float32) / len(candidates)
+
+    if vectors is not None:
+        sim = embedding_similarity_matrix(vectors)
+    else:
+        sim = (similarity or text_similarity_matrix)([doc.page_content for doc in candidates])
+
+    selected: List[Document] = []
+    spans: List[Document] = []
+
+    for i in mmr_order(relevance, sim, lambda_mult):
+        if len(selected) >= k:
+            break
+
+        trial = merge_adjacent(selected + [candidates[i]])
+        if token_budget is not None and selected:
+            total = sum(span_tokens(span) for span in trial) + separator_tokens * (len(trial) - 1)
+            if total > token_budget:
+                continue
+
+        selected.append(candidates[i])
+        spans = trial
+
+    return spans
@@ -0,0 +1,202 @@
+"""
+로컬 위기 사전 분류기
+문자 n-gram(해시) + 위기 키워드 카테고리 특징의 로지스틱 회귀 (학습: preprocessing/train_crisis_classifier.py)
+LLM 응답 전에 매 메시지를 수 마이크로초 안에 분류해 "높음"이면 즉시 긴급 대응 시작
+"""
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from .crisis_lexicon import CrisisLexicon, CrisisHit, normalize
+
+DEFAULT_CLASSIFIER_PATH = Path(__file__).resolve().parent.parent / "data" / "crisis_classifier.npz"
+
+RISK_LEVELS = ["낮음", "중간", "높음"]
+
+# 키워드 점수가 threshold * 이 배율 이상이면 "높음" (모델이 있어도 키워드 수준보다 낮게 내리지 않음)
+LEXICON_HIGH_FACTOR = 1.5
+
+
+@dataclass(frozen=True)
+class CrisisPrediction:
+    """사전 분류 결과"""
+
+    level: str
+    probabilities: Dict[str, float]
+    hits: Tuple[CrisisHit, ...] = ()
+    lexicon_level: str = "낮음"   # 키워드 점수만으로 본 수준
+
+    @property
+    def confirmed(self) -> bool:
+        """키워드도 "높음"인지 (분류기만 "높음"이면 LLM 평가가 맞을 때까지 세션 경보를 미룸)"""
+        return self.lexicon_level == "높음"
+
+
+def extract_features(
+    text: str,
+    lexicon: CrisisLexicon,
+    n_buckets: int,
+    ngram_sizes: Tuple[int, ...] = (1, 2, 3),
+    hits: Optional[List[CrisisHit]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    특징 추출 (학습 / 추론 공용)
+
+    Args:
+        text: 학생 메시지
+        lexicon: 위기 키워드 사전 (카테고리별 최대 가중치를 특징으로 사용)
+        n_buckets: n-gram 해시 버킷 수
+        ngram_sizes: 문자 n-gram 길이
+        hits: 이미 계산한 lexicon.match(text) 결과 (없으면 계산)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (특징 번호, 값)
+    """
+    normalized, _ = normalize(text)
+
+    counts: Dict[int, float] = {}
+    for n in ngram_sizes:
+        for i in range(len(normalized) - n + 1):
+            bucket = zlib.crc32(normalized[i:i + n].encode("utf-8")) % n_buckets
+            counts[bucket] = counts.get(bucket, 0.0) + 1.0
+
+    # n-gram 빈도는 길이에 따라 정규화 (긴 메시지가 점수를 독차지하지 않도록)
+    norm = max(sum(counts.values()), 1.0) ** 0.5
+    features = {bucket: value / norm for bucket, value in counts.items()}
+
+    if hits is None:
+        hits = lexicon.match(text)
+    categories = sorted({p["category"] for p in lexicon.patterns})
+    for hit in hits:
+        index = n_buckets + categories.index(hit.category)
+        features[index] = max(features.get(index, 0.0), hit.weight)
+
+    indices = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+    values = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+    return indices, values
+
+
+class CrisisClassifier:
+    """위기 수준 3분류 (낮음/중간/높음)"""
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        lexicon: CrisisLexicon,
+        n_buckets: int,
+        ngram_sizes: Tuple[int, ...] = (1, 2, 3),
+        high_threshold: float = 0.35,
+        version: str = ""
+    ):
+        """
+        초기화
+
+        Args:
+            weights: (n_buckets + 카테고리 수, 3) 가중치
+            bias: (3,) 편향
+            lexicon: 위기 키워드 사전
+            n_buckets: n-gram 해시 버킷 수
+            ngram_sizes: 문자 n-gram 길이
+            high_threshold: "높음" 확률이 이 값 이상이면 "높음" (재현율 우선으로 낮게)
+            version: 모델 버전
+        """
+        self.weights = weights
+        self.bias = bias
+        self.lexicon = lexicon
+        self.n_buckets = n_buckets
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.high_threshold = high_threshold
+        self.version = version
+
+    @classmethod
+    def load(
+        cls,
+        lexicon: CrisisLexicon,
+        path: Path = DEFAULT_CLASSIFIER_PATH
+    ) -> "CrisisClassifier":
+        """학습된 모델 파일 로드"""
+        data = np.load(path, allow_pickle=False)
+        return cls(
+            weights=data["weights"],
+            bias=data["bias"],
+            lexicon=lexicon,
+            n_buckets=int(data["n_buckets"]),
+            ngram_sizes=tuple(int(n) for n in data["ngram_sizes"]),
+            high_threshold=float(data["high_threshold"]),
+            version=str(data["version"])
+        )
+
+    def save(self, path: Path = DEFAULT_CLASSIFIER_PATH) -> None:
+        """모델 파일 저장"""
+        np.savez_compressed(
+            path,
+            weights=self.weights.astype(np.float32),
+            bias=self.bias.astype(np.float32),
+            n_buckets=self.n_buckets,
+            ngram_sizes=np.asarray(self.ngram_sizes),
+            high_threshold=self.high_threshold,
+            version=self.version,
+            lexicon_version=self.lexicon.version
+        )
+
+    def predict(self, text: str) -> CrisisPrediction:
+        """
+        위기 수준 예측
+
+        Args:
+            text: 학생 메시지
+
+        Returns:
+            CrisisPrediction: 예측 수준(분류기 / 키워드 중 높은 쪽) + 분류기 확률 + 키워드 매칭 결과
+        """
+        hits = self.lexicon.match(text)
+        indices, values = extract_features(
+            text, self.lexicon, self.n_buckets, self.ngram_sizes, hits=hits
+        )
+
+        logits = values @ self.weights[indices] + self.bias
+        logits = logits - logits.max()
+        probs = np.exp(logits)
+        probs /= probs.sum()
+
+        if probs[2] >= self.high_threshold:
+            level = "높음"
+        else:
+            level = RISK_LEVELS[int(np.argmax(probs[:2]))]
+
+        # 키워드 점수 기준보다 낮게 내리지 않음 (학습 데이터에 없던 위기 표현도 키워드로 잡히면 상향)
+        keyword_level = lexicon_level(self.lexicon, hits)
+        level = max(level, keyword_level, key=RISK_LEVELS.index)
+
+        return CrisisPrediction(
+            level=level,
+            probabilities={name: float(p) for name, p in zip(RISK_LEVELS, probs)},
+            hits=tuple(hits),
+            lexicon_level=keyword_level
+        )
+
+
+def lexicon_level(lexicon: CrisisLexicon, hits: List[CrisisHit]) -> str:
+    """
+    키워드 점수 기준 위기 수준
+
+    수단 준비 / 유서 같은 단독 가중치 3.0 키워드는 "높음", 기준 점수 이상은 "중간"
+    """
+    score = lexicon.score(hits)
+
+    if score >= lexicon.threshold * LEXICON_HIGH_FACTOR:
+        return "높음"
+    if score >= lexicon.threshold:
+        return "중간"
+    return "낮음"
+
+
+def lexicon_prediction(lexicon: CrisisLexicon, text: str) -> CrisisPrediction:
+    """학습된 모델이 없을 때의 대체 분류 (키워드 점수 기준)"""
+    hits = lexicon.match(text)
+    level = lexicon_level(lexicon, hits)
+    return CrisisPrediction(level=level, probabilities={}, hits=tuple(hits), lexicon_level=level)
@@ -0,0 +1,244 @@
+"""
+위기 키워드 매칭
+버전 관리되는 사전 파일(data/crisis_lexicon.json)을 Aho-Corasick 오토마톤으로 한 번만 컴파일하고,
+정규화된 입력을 한 번 훑어 가중치가 있는 구조화된 매칭 결과를 반환
+"""
+import json
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+DEFAULT_LEXICON_PATH = Path(__file__).resolve().parent.parent / "data" / "crisis_lexicon.json"
+
+
+@dataclass(frozen=True)
+class CrisisHit:
+    """위기 키워드 매칭 1건"""
+
+    term: str
+    category: str
+    weight: float     # 부정 표현 반영 후 가중치
+    start: int        # 원문(NFC) 기준 위치
+    end: int
+    negated: bool = False
+
+
+def normalize(text: str) -> Tuple[str, List[int]]:
+    """
+    매칭용 정규화
+
+    - NFC: 분리된 자모(NFD 입력)를 완성형으로 조합
+    - 공백/문장부호/이모지 제거 ("죽고 싶어" == "죽고싶어")
+    - 홀로 쓰인 호환 자모 제거 ("죽고싶어ㅓㅓ", "ㅠㅠ")
+    - 같은 글자 반복 축약 ("죽고싶어어어" → "죽고싶어")
+
+    Args:
+        text: 원문
+
+    Returns:
+        Tuple[str, List[int]]: (정규화된 텍스트, 글자별 원문 위치)
+    """
+    text = unicodedata.normalize("NFC", text)
+
+    chars = []
+    positions = []
+    prev = ""
+
+    for i, ch in enumerate(text):
+        if not ch.isalnum() or "ㄱ" <= ch <= "ㆎ":
+            continue
+        ch = ch.lower()
+        if ch == prev:
+            continue
+        chars.append(ch)
+        positions.append(i)
+        prev = ch
+
+    return "".join(chars), positions
+
+
+class _Automaton:
+    """Aho-Corasick 다중 패턴 매칭 (입력 길이에 선형)"""
+
+    def __init__(self, terms: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        fail = [0]
+        out: List[List[int]] = [[]]
+
+        for pattern_id, term in enumerate(terms):
+            node = 0
+            for ch in term:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    fail.append(0)
+                    out.append([])
+                    self.goto[node][ch] = nxt
+                node = nxt
+            out[node].append(pattern_id)
+
+        # 실패 링크 (BFS)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in self.goto[f]:
+                    f = fail[f]
+                fail[child] = self.goto[f].get(ch, 0) if self.goto[f].get(ch) != child else 0
+                out[child].extend(out[fail[child]])
+
+        self.fail = fail
+        self.out: List[Tuple[int, ...]] = [tuple(ids) for ids in out]
+
+    def iter_matches(self, text: str):
+        """(패턴 id, 끝 위치) 생성"""
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern_id in out[node]:
+                yield pattern_id, i + 1
+
+
+class CrisisLexicon:
+    """위기 키워드 사전 + 컴파일된 매처"""
+
+    def __init__(
+        self,
+        patterns: List[Dict],
+        negations: List[str],
+        word_negations: Optional[List[str]] = None,
+        negation_factor: float = 0.5,
+        threshold: float = 2.0,
+        version: str = ""
+    ):
+        """
+        초기화
+
+        Args:
+            patterns: {"term", "category", "weight", "window", "context"(선택), "exclude"(선택)} 목록
+                (exclude: 키워드를 포함하는 다른 단어, 예: "약"의 "약속" / "예약")
+            negations: 키워드 뒤 window 글자 안에 나오면 부정으로 보는 용언 부정 표현 ("지않" 등)
+            word_negations: 단어 첫머리일 때만 부정으로 보는 표현 ("안해", "편안해"는 제외)
+            negation_factor: 부정된 매칭의 가중치 배율 (위기 신호를 놓치지 않도록 0이 아님)
+            threshold: is_crisis() 기준 점수
+            version: 사전 버전
+        """
+        self.version = version
+        self.threshold = threshold
+        self.negation_factor = negation_factor
+        self.negations = [normalize(neg)[0] for neg in negations]
+        self.word_negations = [normalize(neg)[0] for neg in word_negations or []]
+
+        self.patterns = []
+        for pattern in patterns:
+            term = normalize(pattern["term"])[0]
+            excludes = [normalize(word)[0] for word in pattern.get("exclude", [])]
+            self.patterns.append({
+                "term": pattern["term"],
+                "category": pattern["category"],
+                "weight": float(pattern["weight"]),
+                "window": int(pattern.get("window", 0)),
+                "context": [normalize(ctx)[0] for ctx in pattern.get("context", [])],
+                "exclude": [(word, word.find(term)) for word in excludes if term in word],
+                "length": len(term)
+            })
+
+        self._automaton = _Automaton([normalize(p["term"])[0] for p in patterns])
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_LEXICON_PATH) -> "CrisisLexicon":
+        """사전 파일 로드 + 컴파일"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        return cls(
+            patterns=data["patterns"],
+            negations=data.get("negations", []),
+            word_negations=data.get("word_negations", []),
+            negation_factor=data.get("negation_factor", 0.5),
+            threshold=data.get("threshold", 2.0),
+            version=data.get("version", "")
+        )
+
+    def match(self, text: str) -> List[CrisisHit]:
+        """
+        위기 키워드 매칭
+
+        Args:
+            text: 학생 메시지
+
+        Returns:
+            List[CrisisHit]: 등장 순서대로의 매칭 결과
+        """
+        normalized, positions = normalize(text)
+        if not normalized:
+            return []
+
+        hits = []
+        for pattern_id, end in self._automaton.iter_matches(normalized):
+            pattern = self.patterns[pattern_id]
+            start = end - pattern["length"]
+            window = pattern["window"]
+
+            # 키워드를 포함하는 다른 단어 ("약속"의 "약")
+            if any(
+                start >= offset and normalized.startswith(word, start - offset)
+                for word, offset in pattern["exclude"]
+            ):
+                continue
+
+            # 문맥 조건 ("약"은 "모아", "다먹" 등과 함께일 때만)
+            if pattern["context"] and not any(
+                normalized.find(ctx, max(0, start - window), end + window) >= 0
+                for ctx in pattern["context"]
+            ):
+                continue
+
+            negated = window > 0 and self._negated(normalized, positions, end, end + window)
+
+            hits.append(CrisisHit(
+                term=pattern["term"],
+                category=pattern["category"],
+                weight=pattern["weight"] * (self.negation_factor if negated else 1.0),
+                start=positions[start],
+                end=positions[end - 1] + 1,
+                negated=negated
+            ))
+
+        return hits
+
+    def _negated(self, normalized: str, positions: List[int], start: int, end: int) -> bool:
+        """normalized[start:end]에 부정 표현이 있는지 (word_negations는 원문에서 띄어 쓴 단어 첫머리만)"""
+        if any(normalized.find(neg, start, end) >= 0 for neg in self.negations):
+            return True
+
+        for neg in self.word_negations:
+            i = normalized.find(neg, start, end)
+            while i >= 0:
+                # 정규화로 지운 공백 / 문장부호가 앞에 있으면 단어 첫머리
+                if i == 0 or positions[i] - positions[i - 1] > 1:
+                    return True
+                i = normalized.find(neg, i + 1, end)
+        return False
+
+    def score(self, hits: List[CrisisHit]) -> float:
+        """위기 점수 (카테고리별 최대 가중치의 합, 같은 말 반복으로 부풀지 않음)"""
+        best: Dict[str, float] = {}
+        for hit in hits:
+            if hit.weight > best.get(hit.category, 0.0):
+                best[hit.category] = hit.weight
+        return sum(best.values())
+
+    def is_crisis(self, hits: List[CrisisHit]) -> bool:
+        """위기 점수가 기준 이상인지"""
+        return self.score(hits) >= self.threshold
+
@@ -0,0 +1,177 @@
+"""
+임베딩 캐시
+정규화된 텍스트 + 모델/차원 기준 LRU 캐시 (선택적으로 SQLite 디스크 저장)
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Optional, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .usage import record_embedding
+
+DEFAULT_CACHE_PATH = Path("data/embedding_cache.sqlite")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 텍스트 정규화 (NFC + 공백 정리)"""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class CachedEmbeddings(Embeddings):
+    """OpenAIEmbeddings 앞단 캐시 (스레드 안전)"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_size: int = 2048,
+        cache_path: Optional[Union[str, Path]] = None
+    ):
+        """
+        초기화
+
+        Args:
+            embeddings: 실제 임베딩 모델 (예: OpenAIEmbeddings)
+            max_size: 메모리 LRU 최대 항목 수
+            cache_path: SQLite 캐시 파일 경로 (None이면 메모리만 사용)
+        """
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+        self.dimensions = getattr(embeddings, "dimensions", None)
+        self.max_size = max_size
+
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if cache_path:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(cache_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            self._db.commit()
+
+    def _key(self, text: str) -> str:
+        """캐시 키: 모델/차원 + 정규화된 텍스트의 해시"""
+        raw = f"{self.model}:{self.dimensions}:{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get(self, key: str) -> Optional[List[float]]:
+        """메모리 → 디스크 순으로 조회 (락 안에서 호출)"""
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+                self._put_memory(key, vector)
+                self.disk_hits += 1
+                return vector
+
+        return None
+
+    def _put_memory(self, key: str, vector: List[float]) -> None:
+        """메모리 LRU 저장 (초과 시 가장 오래된 항목 제거)"""
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    def _put(self, items: Dict[str, List[float]]) -> None:
+        """메모리 + 디스크 저장 (락 안에서 호출)"""
+        for key, vector in items.items():
+            self._put_memory(key, vector)
+
+        if self._db is not None and items:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes())
+                    for key, vector in items.items()
+                ]
+            )
+            self._db.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        문서 임베딩 (캐시에 없는 텍스트만 한 번에 요청)
+
+        Args:
+            texts: 임베딩할 텍스트 목록
+
+        Returns:
+            List[List[float]]: 입력 순서대로의 임베딩
+        """
+        keys = [self._key(text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, str] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                results[i] = self._get(key)
+                if results[i] is None and key not in missing:
+                    missing[key] = texts[i]
+                    self.misses += 1
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            record_embedding(self.model, list(missing.values()))
+            fetched = dict(zip(missing.keys(), vectors))
+
+            with self._lock:
+                self._put(fetched)
+
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    results[i] = fetched[key]
+
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        """쿼리 임베딩"""
+        key = self._key(text)
+
+        with self._lock:
+            vector = self._get(key)
+            if vector is not None:
+                return vector
+            self.misses += 1
+
+        vector = self.embeddings.embed_query(text)
+        record_embedding(self.model, [text])
+
+        with self._lock:
+            self._put({key: vector})
+
+        return vector
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 적중/미스 통계"""
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "hits": self.memory_hits + self.disk_hits,
+                "misses": self.misses,
+                "size": len(self._lru)
+            }
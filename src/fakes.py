@@ -0,0 +1,374 @@
+"""
+오프라인 대체 백엔드 (API 키 없이 성능 측정 / 개발용)
+OpenAI 채팅 모델, 임베딩, Pinecone 벡터스토어를 지연 시간을 설정할 수 있는 결정적 가짜로 대체
+
+사용법:
+    from src.fakes import fake_resources
+    agent = StudentCounselingAgent(resources=fake_resources(chat_latency=0.3))
+"""
+import re
+import json
+import time
+import zlib
+import asyncio
+from pathlib import Path
+from typing import Any, Callable, List, Dict, Iterator, AsyncIterator, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from .crisis_classifier import lexicon_prediction
+from .crisis_lexicon import CrisisLexicon
+from .tokens import count_tokens
+from .tracing import Tracer
+from .vector_index import (
+    DEFAULT_INDEX_DIR, CHUNKS_FILE, chunk_id, chunk_to_document, display_text, load_chunks, normalize_rows
+)
+
+# 위기 수준별 고정 답변 (메시지 해시로 선택)
+_REPLIES = {
+    "낮음": [
+        "그런 일이 있었구나. 많이 속상했겠다. 그때 어떤 기분이 들었는지 조금 더 이야기해 줄래?",
+        "네 마음이 어땠을지 알 것 같아. 요즘 그런 일이 자주 있었어? 천천히 말해줘도 괜찮아.",
+        "이야기해 줘서 고마워. 그 일 때문에 요즘 잠이나 밥 먹는 건 괜찮았어?"
+    ],
+    "중간": [
+        "많이 힘들었구나. 죽고 싶다는 생각이 들 정도였다니 정말 걱정돼. 그런 생각이 언제부터 들었어?",
+        "그렇게까지 힘들었는데 혼자 버텨왔구나. 혹시 그런 생각이 들 때 구체적으로 생각해 본 방법이 있어?"
+    ],
+    "높음": [
+        "지금 네가 정말 많이 힘든 걸 알겠어. 혼자 두지 않을게. 지금 당장 선생님이나 부모님께 연락해도 될까?"
+    ]
+}
+
+_RESPONSES = {
+    "낮음": ("낮음", "경청 및 정서 지지", False),
+    "중간": ("높음", "자살 생각 구체성 확인, 상담 선생님 연계", False),
+    "높음": ("높음", "즉시 개입 필요. 보호자 연락 및 전문기관 연계", True)
+}
+
+_TURN_COUNT = re.compile(r'"총_대화_턴":\s*(\d+)')
+
+_lexicon: Optional[CrisisLexicon] = None
+
+
+def _crisis_lexicon() -> CrisisLexicon:
+    """가짜 응답 위기 수준 판단용 사전 (최초 호출 시 한 번만 로드)"""
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = CrisisLexicon.load()
+    return _lexicon
+
+
+def counseling_reply(messages: List[BaseMessage]) -> str:
+    """
+    상담 응답 JSON (CounselingResponse 형식)
+
+    마지막 학생 메시지의 위기 키워드 점수로 자살_신호를 정하고, 답변은 메시지 해시로 고정 문장 선택
+    """
+    student = next(
+        (msg.content for msg in reversed(messages) if isinstance(msg, HumanMessage)),
+        ""
+    )
+    prediction = lexicon_prediction(_crisis_lexicon(), student)
+    replies = _REPLIES[prediction.level]
+    distress, action, finished = _RESPONSES[prediction.level]
+
+    return json.dumps({
+        "답변": replies[zlib.crc32(student.encode("utf-8")) % len(replies)],
+        "정서적_고통": distress,
+        "자살_신호": prediction.level,
+        "감지된_위험요인": sorted({hit.category for hit in prediction.hits if not hit.negated}),
+        "권장_대응": action,
+        "종료_판단": finished
+    }, ensure_ascii=False)
+
+
+def summary_reply(messages: List[BaseMessage]) -> str:
+    """종합 결과 JSON (SUMMARY_PROMPT / ROLLING_SUMMARY_PROMPT 형식)"""
+    prompt = messages[-1].content if messages else ""
+    match = _TURN_COUNT.search(prompt)
+    prediction = lexicon_prediction(_crisis_lexicon(), prompt)
+
+    return json.dumps({
+        "총_대화_턴": int(match.group(1)) if match else 0,
+        "대화_요약": "학생이 최근 겪은 어려움과 감정에 대해 이야기했다.",
+        "주요_이슈": ["교우 관계", "정서적 어려움"],
+        "최고_위험_신호": prediction.level,
+        "감지된_위험요인": sorted({hit.category for hit in prediction.hits if not hit.negated}),
+        "정서_변화": "대화 중 감정을 조금씩 표현함",
+        "다음_대화_가이드": "정서 상태를 다시 확인하고 위험 신호를 점검"
+    }, ensure_ascii=False)
+
+
+def default_reply(messages: List[BaseMessage]) -> str:
+    """요약 프롬프트면 종합 결과, 아니면 상담 응답"""
+    if any("총_대화_턴" in str(msg.content) for msg in messages[-1:]):
+        return summary_reply(messages)
+    return counseling_reply(messages)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    지연 시간 / 토큰 속도를 설정할 수 있는 가짜 채팅 모델
+
+    첫 토큰까지 latency초, 이후 출력 토큰당 1 / tokens_per_second초 대기.
+    invoke / ainvoke / stream / astream, with_structured_output(include_raw), bind(response_format) 지원
+    """
+
+    model: str = "fake-chat"
+    latency: float = 0.3
+    tokens_per_second: float = 60.0
+    max_tokens: Optional[int] = None
+    reply: Callable[[List[BaseMessage]], str] = default_reply
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _usage(self, messages: List[BaseMessage], content: str) -> Dict[str, Any]:
+        """OpenAI 형식 usage_metadata (프롬프트 캐시는 흉내 내지 않음)"""
+        input_tokens = sum(count_tokens(str(msg.content)) for msg in messages)
+        output_tokens = count_tokens(content)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": 0}
+        }
+
+    def _pieces(self, content: str) -> List[str]:
+        """스트리밍 조각 (OpenAI 토큰과 비슷하게 2~3자 단위)"""
+        return [content[i:i + 3] for i in range(0, len(content), 3)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content = self.reply(messages)
+        usage = self._usage(messages, content)
+        time.sleep(self.latency + usage["output_tokens"] / self.tokens_per_second)
+        message = AIMessage(content=content, usage_metadata=usage, response_metadata={"model_name": self.model})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content = self.reply(messages)
+        usage = self._usage(messages, content)
+        await asyncio.sleep(self.latency + usage["output_tokens"] / self.tokens_per_second)
+        message = AIMessage(content=content, usage_metadata=usage, response_metadata={"model_name": self.model})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        content = self.reply(messages)
+        usage = self._usage(messages, content)
+        pieces = self._pieces(content)
+        delay = usage["output_tokens"] / self.tokens_per_second / max(len(pieces), 1)
+
+        time.sleep(self.latency)
+        for piece in pieces:
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        content = self.reply(messages)
+        usage = self._usage(messages, content)
+        pieces = self._pieces(content)
+        delay = usage["output_tokens"] / self.tokens_per_second / max(len(pieces), 1)
+
+        await asyncio.sleep(self.latency)
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs):
+        """응답 JSON을 schema(pydantic)로 파싱 (ChatOpenAI와 같은 include_raw 형식)"""
+        def parse(message: AIMessage):
+            try:
+                parsed, error = schema.model_validate_json(message.content), None
+            except Exception as e:
+                if not include_raw:
+                    raise
+                parsed, error = None, e
+            if include_raw:
+                return {"raw": message, "parsed": parsed, "parsing_error": error}
+            return parsed
+
+        return self | RunnableLambda(parse)
+
+
+def fake_chat_model_factory(
+    latency: float = 0.3,
+    tokens_per_second: float = 60.0
+) -> Callable[..., FakeChatModel]:
+    """
+    AgentResources(chat_model_factory=...)용 생성 함수
+
+    ChatOpenAI 키워드 인자(model, max_tokens 등)를 받아 모델 이름 / 최대 토큰만 반영
+    """
+    def factory(model: str = "fake-chat", max_tokens: Optional[int] = None, **kwargs) -> FakeChatModel:
+        return FakeChatModel(
+            model=model,
+            latency=latency,
+            tokens_per_second=tokens_per_second,
+            max_tokens=max_tokens
+        )
+
+    return factory
+
+
+class HashEmbeddings(Embeddings):
+    """
+    문자 n-gram 해시 임베딩 (결정적, API 호출 없음)
+
+    글자가 많이 겹치는 문장끼리 가까워서 실제 임베딩 대신 검색 경로를 그대로 태울 수 있음
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 256,
+        latency: float = 0.0,
+        ngram_sizes: Tuple[int, ...] = (2, 3)
+    ):
+        """
+        초기화
+
+        Args:
+            dimensions: 임베딩 차원
+            latency: 요청 1회당 대기 시간(초) (배치 크기와 무관, API 왕복 흉내)
+            ngram_sizes: 문자 n-gram 길이
+        """
+        self.model = "hash-ngram"
+        self.dimensions = dimensions
+        self.latency = latency
+        self.ngram_sizes = ngram_sizes
+        self.requests = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for n in self.ngram_sizes:
+            for i in range(len(text) - n + 1):
+                h = zlib.crc32(text[i:i + n].encode("utf-8"))
+                vector[h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+        return normalize_rows(vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.requests += 1
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class InMemoryVectorStore:
+    """Pinecone 대신 쓰는 인메모리 벡터스토어 (검색 1회당 latency초 대기로 네트워크 왕복 흉내)"""
+
+    def __init__(self, documents: List[Document], embedding: Embeddings, latency: float = 0.0):
+        """
+        초기화
+
+        Args:
+            documents: 저장할 청크 (metadata["chunk_id"] 포함)
+            embedding: 문서 / 쿼리 임베딩
+            latency: 검색 1회당 대기 시간(초)
+        """
+        self.documents = documents
+        self.embedding = embedding
+        self.latency = latency
+        self.vectors = normalize_rows(
+            embedding.embed_documents([doc.page_content for doc in documents])
+        )
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        time.sleep(self.latency)
+        scores = self.vectors @ normalize_rows(np.asarray(embedding, dtype=np.float32))
+        top = np.argsort(-scores)[:k]
+        return [self.documents[i] for i in top]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k=k)
+
+
+def manual_documents(
+    index_dir: Path = DEFAULT_INDEX_DIR,
+    txt_dir: Path = Path("data/all_pages_txt")
+) -> List[Document]:
+    """
+    매뉴얼 청크 Document 목록
+
+    로컬 인덱스(chunks.json)가 있으면 그대로 쓰고, 없으면 전처리된 txt를
+    chunk_and_embed.py와 같은 설정(1000자, 200자 겹침)으로 청킹
+    """
+    if (Path(index_dir) / CHUNKS_FILE).exists():
+        return [chunk_to_document(chunk) for chunk in load_chunks(index_dir)["chunks"]]
+
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        length_function=len,
+        separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+    )
+
+    documents = []
+    for path in sorted(Path(txt_dir).glob("page_*.txt")):
+        page = int(path.stem.split("_")[1])
+        for i, text in enumerate(splitter.split_text(path.read_text(encoding="utf-8"))):
+            display = display_text(text, page)
+            documents.append(Document(page_content=text, metadata={
+                "page": page,
+                "chunk_index": i,
+                "chunk_id": chunk_id(page, i),
+                "display": display,
+                "display_tokens": count_tokens(display)
+            }))
+    return documents
+
+
+def fake_resources(
+    chat_latency: float = 0.3,
+    tokens_per_second: float = 60.0,
+    embed_latency: float = 0.05,
+    search_latency: float = 0.03,
+    max_workers: int = 8,
+    tracer: Optional[Tracer] = None
+):
+    """
+    모든 외부 호출을 가짜로 바꾼 AgentResources
+
+    Args:
+        chat_latency: 채팅 모델 첫 토큰 지연(초)
+        tokens_per_second: 채팅 모델 출력 속도
+        embed_latency: 임베딩 요청 1회 지연(초)
+        search_latency: 벡터스토어 검색 1회 지연(초)
+        max_workers: 백그라운드 작업 스레드 수
+        tracer: 단계별 span 기록 (기본값: get_tracer())
+
+    Returns:
+        AgentResources: StudentCounselingAgent(resources=...)에 그대로 전달
+    """
+    from .resources import AgentResources
+    from .retriever import ManualRetriever
+
+    embeddings = HashEmbeddings(latency=embed_latency)
+    documents = manual_documents()
+
+    # 문서 임베딩은 준비 단계이므로 지연 없이 계산
+    embeddings.latency = 0.0
+    store = InMemoryVectorStore(documents, embeddings, latency=search_latency)
+    embeddings.latency = embed_latency
+    embeddings.requests = 0
+
+    retriever = ManualRetriever(embeddings=embeddings, vectorstore=store, tracer=tracer)
+
+    return AgentResources(
+        max_workers=max_workers,
+        chat_model_factory=fake_chat_model_factory(chat_latency, tokens_per_second),
+        retriever=retriever,
+        tracer=retriever.tracer
+    )
@@ -0,0 +1,181 @@
+"""
+한국어 문자 n-gram 역색인 (BM25)
+매뉴얼 고유 용어("1577-0199", "자살 징후", "대면 면담") 정확 매칭용
+"""
+import re
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+LEXICAL_FILE = "lexical.npz"
+
+NGRAM_SIZES = (2, 3)
+
+# 한글/영문/숫자/하이픈만 남기고 공백은 제거 ("자살 징후" == "자살징후")
+_NON_TOKEN = re.compile(r"[^\w\-]|_")
+
+
+def char_ngrams(text: str, sizes: Tuple[int, ...] = NGRAM_SIZES) -> List[str]:
+    """
+    문자 n-gram 추출
+
+    Args:
+        text: 원문
+        sizes: n-gram 길이 목록
+
+    Returns:
+        List[str]: n-gram 목록 (중복 포함)
+    """
+    text = _NON_TOKEN.sub("", unicodedata.normalize("NFC", text).lower())
+    grams = []
+    for n in sizes:
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+class LexicalIndex:
+    """문자 bigram/trigram BM25 역색인 (CSR 형태의 정렬된 정수 배열 postings)"""
+
+    def __init__(
+        self,
+        terms: List[str],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        """
+        초기화
+
+        Args:
+            terms: n-gram 사전 (term id 순서)
+            offsets: term id별 postings 시작 위치 (길이 = 사전 크기 + 1)
+            doc_ids: 정렬된 문서 번호 postings (int32)
+            term_freqs: postings별 빈도 (int32)
+            doc_lengths: 문서별 n-gram 수
+            k1, b: BM25 파라미터
+        """
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+
+        n_docs = len(doc_lengths)
+        doc_freqs = np.diff(offsets).astype(np.float32)
+        self.idf = np.log1p((n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+
+        # 문서 길이 정규화 항은 검색마다 같으므로 미리 계산
+        avgdl = float(doc_lengths.mean()) if n_docs else 1.0
+        self._length_norm = (
+            k1 * (1 - b + b * doc_lengths / max(avgdl, 1.0))
+        ).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts: List[str]) -> "LexicalIndex":
+        """
+        청크 텍스트로 역색인 생성 (ingest 시점)
+
+        Args:
+            texts: 청크 텍스트 목록 (순서 = 문서 번호)
+
+        Returns:
+            LexicalIndex
+        """
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths = []
+
+        for doc_id, text in enumerate(texts):
+            counts = Counter(char_ngrams(text))
+            doc_lengths.append(sum(counts.values()))
+            for gram, tf in counts.items():
+                postings.setdefault(gram, []).append((doc_id, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_ids, term_freqs = [], []
+
+        for i, term in enumerate(terms):
+            entries = postings[term]  # 문서 번호 오름차순으로 추가됨
+            doc_ids.extend(doc_id for doc_id, _ in entries)
+            term_freqs.extend(tf for _, tf in entries)
+            offsets[i + 1] = offsets[i] + len(entries)
+
+        return cls(
+            terms=terms,
+            offsets=offsets,
+            doc_ids=np.asarray(doc_ids, dtype=np.int32),
+            term_freqs=np.asarray(term_freqs, dtype=np.int32),
+            doc_lengths=np.asarray(doc_lengths, dtype=np.float32)
+        )
+
+    @classmethod
+    def load(cls, index_dir: Path) -> "LexicalIndex":
+        """인덱스 파일 로드"""
+        data = np.load(Path(index_dir) / LEXICAL_FILE, allow_pickle=False)
+        return cls(
+            terms=data["terms"].tolist(),
+            offsets=data["offsets"],
+            doc_ids=data["doc_ids"],
+            term_freqs=data["term_freqs"],
+            doc_lengths=data["doc_lengths"]
+        )
+
+    def save(self, index_dir: Path) -> None:
+        """인덱스 파일 저장"""
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        terms = sorted(self.term_ids, key=self.term_ids.get)
+        np.savez(
+            index_dir / LEXICAL_FILE,
+            terms=np.asarray(terms, dtype=str),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths
+        )
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """
+        BM25 검색
+
+        Args:
+            query: 검색 쿼리
+            k: 검색할 문서 수
+
+        Returns:
+            List[Tuple[int, float]]: (문서 번호, BM25 점수), 점수 내림차순 (0점 제외)
+        """
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+
+        for gram in set(char_ngrams(query)):
+            term_id = self.term_ids.get(gram)
+            if term_id is None:
+                continue
+
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+
+            # postings 안의 문서 번호는 유일하므로 fancy index 누적으로 충분
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        return [(int(i), float(scores[i])) for i in top]
@@ -156,4 +156,34 @@ SUMMARY_PROMPT = """다음 대화를 종합적으로 분석하고 요약해주
   "정서_변화": "대화 시작부터 종료까지의 정서 변화",
   "다음_대화_가이드": "다음에 대화할 때 주의해야 할 점과 접근 방법"
 }}
-"""
\ No newline at end of file
+"""
+
+# 롤링 요약 프롬프트 (이전 종합 결과 + 새 대화만으로 갱신)
+ROLLING_SUMMARY_PROMPT = """다음은 지금까지의 대화 종합 결과와 그 이후 새로 나눈 대화입니다.
+기존 종합 결과에 새 대화 내용을 반영하여 전체 대화의 종합 결과로 갱신해주세요.
+
+기존 종합 결과:
+{summary}
+
+새 대화 내용:
+{history}
+
+다음 형식으로 JSON 응답해주세요:
+{{
+  "총_대화_턴": {turn_count},
+  "대화_요약": "전체 대화를 3-5문장으로 요약",
+  "주요_이슈": ["학생이 겪고 있는 주요 문제들"],
+  "최고_위험_신호": "낮음|중간|높음",
+  "감지된_위험요인": ["대화 전체에서 감지된 모든 위험 요인"],
+  "정서_변화": "대화 시작부터 종료까지의 정서 변화",
+  "다음_대화_가이드": "다음에 대화할 때 주의해야 할 점과 접근 방법"
+}}
+"""
+
+# 토큰 예산 밖으로 밀려난 이전 대화 요약
+FOLDED_HISTORY_PROMPT = """이전 대화 요약 (오래된 대화는 요약으로 대체됨):
+{summary}
+"""
+
+# 위기 신호가 있을 때 매뉴얼 검색용 쿼리 재작성 (검색 쿼리 확장)
+CRISIS_QUERY_PROMPT = "자살 위기 학생 대응 절차와 위험 평가 ({signals}): {message}"
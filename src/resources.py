@@ -0,0 +1,159 @@
+"""
+프로세스 전역 공유 리소스
+LLM / 임베딩 / 벡터스토어 클라이언트를 세션마다 새로 만들지 않고 한 번만 생성
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+from dotenv import load_dotenv
+
+from .config import MODEL_TIERS, STRONG_TIER
+from .crisis_classifier import CrisisClassifier, DEFAULT_CLASSIFIER_PATH
+from .crisis_lexicon import CrisisLexicon
+from .models import CounselingResponse
+from .retriever import ManualRetriever
+from .tracing import Tracer, get_tracer
+from .usage import UsageStore
+
+load_dotenv()
+
+
+@dataclass
+class ModelTier:
+    """위험도 구간 하나의 상담 모델"""
+
+    name: str
+    model: str
+    llm: Any          # Structured Output (include_raw)
+    stream_llm: Any   # JSON 모드 스트리밍
+
+
+class AgentResources:
+    """모든 세션이 함께 쓰는 클라이언트 묶음 (스레드 안전)"""
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        max_connections: int = 100,
+        max_workers: int = 8,
+        chat_model_factory: Optional[Callable[..., BaseChatModel]] = None,
+        retriever: Optional[ManualRetriever] = None,
+        tracer: Optional[Tracer] = None
+    ):
+        """
+        초기화
+
+        Args:
+            model: strong 구간 상담 모델 (기본값: config.MODEL_TIERS)
+            max_connections: OpenAI 호출용 HTTP 커넥션 풀 크기
+            max_workers: 백그라운드 작업(롤링 요약 등) 스레드 수
+            chat_model_factory: ChatOpenAI 대신 쓸 채팅 모델 생성 함수 (ChatOpenAI와 같은
+                키워드 인자를 받음, 예: fakes.fake_chat_model_factory)
+            retriever: 미리 만든 검색기 (기본값: 환경변수 설정의 ManualRetriever)
+            tracer: 단계별 span 기록 (기본값: TRACING 환경변수 설정의 get_tracer())
+        """
+        # OpenAI 호출 전체가 공유하는 커넥션 풀 (keep-alive 재사용)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections // 2
+        )
+        self.http_client = httpx.Client(limits=limits)
+        self.http_async_client = httpx.AsyncClient(limits=limits)
+
+        self.model = model or MODEL_TIERS[STRONG_TIER]["model"]
+        self.tracer = tracer or get_tracer()
+        self.chat_model_factory = chat_model_factory
+
+        # 위험도 구간별 상담 모델
+        self.tiers: Dict[str, ModelTier] = {}
+        for name, config in MODEL_TIERS.items():
+            tier_model = self.model if name == STRONG_TIER else config["model"]
+            self.tiers[name] = self._build_tier(name, tier_model, config)
+
+        # 기본(strong) 상담 모델
+        self.llm = self.tiers[STRONG_TIER].llm
+        self.stream_llm = self.tiers[STRONG_TIER].stream_llm
+
+        # 요약용 LLM (별도)
+        self.summary_model = "gpt-4o"
+        self.summary_llm = self._chat_model(model=self.summary_model, temperature=0)
+
+        # 턴 / 세션 / 학교별 토큰·비용 누적
+        self.usage_store = UsageStore()
+
+        # 백그라운드 작업용 스레드 풀
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="agent-background"
+        )
+
+        # 상담 선생님 위기 알림 전용 스레드 풀 (몇 초씩 걸리는 요약 작업 뒤에서 기다리지 않도록 분리)
+        self.alert_executor = ThreadPoolExecutor(
+            max_workers=2,
+            thread_name_prefix="agent-crisis-alert"
+        )
+
+        # 위기 키워드 매처 (사전 파일을 한 번만 컴파일)
+        self.crisis_lexicon = CrisisLexicon.load()
+
+        # 위기 사전 분류기 (학습된 모델이 없으면 키워드 점수만 사용)
+        self.crisis_classifier: Optional[CrisisClassifier] = None
+        if DEFAULT_CLASSIFIER_PATH.exists():
+            self.crisis_classifier = CrisisClassifier.load(self.crisis_lexicon)
+
+        # RAG 검색기
+        self.retriever = retriever or ManualRetriever(
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            tracer=self.tracer
+        )
+
+    def _chat_model(self, **kwargs) -> BaseChatModel:
+        """채팅 모델 생성 (주입된 factory가 있으면 사용, 없으면 공유 커넥션 풀의 ChatOpenAI)"""
+        if self.chat_model_factory is not None:
+            return self.chat_model_factory(**kwargs)
+        return ChatOpenAI(
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            **kwargs
+        )
+
+    def _build_tier(self, name: str, model: str, config: Dict) -> ModelTier:
+        """구간 설정(config.MODEL_TIERS) → 상담 모델"""
+        chat_model = self._chat_model(
+            model=model,
+            temperature=0.7,  # 친구 같은 톤 위해 약간 높게
+            timeout=config["timeout"],
+            max_tokens=config["max_tokens"],
+            stream_usage=True  # 스트리밍 시에도 usage(캐시 토큰 포함) 수신
+        )
+
+        return ModelTier(
+            name=name,
+            model=model,
+            # Structured Output으로 LLM 설정 (usage 기록 위해 원본 메시지도 함께 반환)
+            llm=chat_model.with_structured_output(CounselingResponse, include_raw=True),
+            # 스트리밍용 LLM (JSON 모드, 답변 필드를 토큰 단위로 파싱)
+            stream_llm=chat_model.bind(response_format={"type": "json_object"})
+        )
+
+
+_resources: Optional[AgentResources] = None
+_lock = threading.Lock()
+
+
+def get_resources() -> AgentResources:
+    """프로세스 전역 AgentResources (최초 호출 시 한 번만 생성)"""
+    global _resources
+
+    if _resources is None:
+        with _lock:
+            if _resources is None:
+                _resources = AgentResources()
+
+    return _resources
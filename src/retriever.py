@@ -1,67 +1,368 @@
 """
-Pinecone RAG 검색
+매뉴얼 RAG 검색 (Pinecone / 로컬 NumPy 인덱스)
 """
 import os
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, List, Dict, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
 from dotenv import load_dotenv
 
+from .config import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+from .context_assembler import assemble_context
+from .embedding_cache import CachedEmbeddings
+from .tokens import count_tokens
+from .lexical_index import LexicalIndex, LEXICAL_FILE
+from .tracing import Tracer, get_tracer
+from .vector_index import (
+    LocalVectorIndex, DEFAULT_INDEX_DIR, CHUNKS_FILE, chunk_id, chunk_to_document, display_text, load_chunks
+)
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# 하이브리드 검색 시 k 대비 후보 수 배율
+CANDIDATE_FACTOR = 2
+
+# 컨텍스트 블록 사이 구분자
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+def chunk_key(doc: Document) -> str:
+    """Document → 청크 id (Pinecone 결과는 page/chunk_index로 복원)"""
+    key = doc.metadata.get("chunk_id")
+    if key:
+        return key
+    return chunk_id(doc.metadata.get("page", 0), doc.metadata.get("chunk_index", 0))
+
+
+def format_chunk(doc: Document) -> str:
+    """
+    청크 → 컨텍스트 블록
+    
+    인덱싱 때 저장한 표시 형태(metadata["display"])를 그대로 사용하고,
+    이전 인덱스처럼 없을 때만 새로 만듦
+    """
+    display = doc.metadata.get("display")
+    if display:
+        return display
+    return display_text(doc.page_content, doc.metadata.get('page', '?'))
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Document]:
+    """
+    Reciprocal Rank Fusion
+    
+    Args:
+        rankings: 검색 결과 목록들 (각각 순위순)
+        k: RRF 상수
+        
+    Returns:
+        List[Document]: 융합 점수 내림차순 문서
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = chunk_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
 
 class ManualRetriever:
     """매뉴얼 검색기"""
     
-    def __init__(self, index_name: str = "student-counseling-0202"):
+    def __init__(
+        self,
+        index_name: str = "student-counseling-0202",
+        backend: Optional[str] = None,
+        index_dir: Path = DEFAULT_INDEX_DIR,
+        dense_timeout: float = 2.0,
+        quantization: Optional[str] = None,
+        embeddings: Optional[Embeddings] = None,
+        vectorstore: Optional[Any] = None,
+        tracer: Optional[Tracer] = None,
+        http_client: Optional[Any] = None,
+        http_async_client: Optional[Any] = None
+    ):
         """
         초기화
         
         Args:
             index_name: Pinecone 인덱스 이름
+            backend: "pinecone" 또는 "local" (기본값: RETRIEVER_BACKEND 환경변수, 없으면 pinecone)
+            index_dir: 로컬 인덱스 폴더 (backend="local"일 때, 역색인도 여기서 로드)
+            dense_timeout: 하이브리드 검색 시 dense 검색 대기 시간(초), 초과하면 lexical 결과만 사용
+            quantization: 로컬 인덱스 1차 검색 벡터 ("int8" / "binary" / "matryoshka",
+                기본값: INDEX_QUANTIZATION 환경변수, 없으면 float 전체 검색)
+            embeddings: OpenAIEmbeddings 대신 쓸 쿼리 임베딩 (예: fakes.HashEmbeddings)
+            vectorstore: 미리 만든 벡터스토어 (similarity_search / similarity_search_by_vector,
+                예: fakes.InMemoryVectorStore), 있으면 backend 대신 사용
+            tracer: 단계별 span 기록 (기본값: get_tracer())
+            http_client, http_async_client: 공유 httpx 클라이언트 (resources.AgentResources)
         """
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-large",
-            dimensions=3072
+        self.tracer = tracer or get_tracer()
+        
+        # 쿼리 임베딩 캐시 (EMBEDDING_CACHE_PATH 설정 시 디스크에도 저장)
+        self.embeddings = CachedEmbeddings(
+            embeddings or OpenAIEmbeddings(
+                model=EMBEDDING_MODEL,
+                dimensions=EMBEDDING_DIMENSIONS,
+                http_client=http_client,
+                http_async_client=http_async_client
+            ),
+            cache_path=os.getenv("EMBEDDING_CACHE_PATH")
         )
         
-        self.vectorstore = PineconeVectorStore(
-            index_name=index_name,
-            embedding=self.embeddings
+        self.backend = backend or os.getenv("RETRIEVER_BACKEND", "pinecone")
+        self.vectorstore = None
+        self.index = None
+        
+        if vectorstore is not None:
+            self.backend = "vectorstore"
+            self.vectorstore = vectorstore
+        elif self.backend == "pinecone":
+            from langchain_pinecone import PineconeVectorStore
+            
+            self.vectorstore = PineconeVectorStore(
+                index_name=index_name,
+                embedding=self.embeddings
+            )
+        elif self.backend == "local":
+            self.index = LocalVectorIndex.load(
+                index_dir,
+                quantization=quantization or os.getenv("INDEX_QUANTIZATION") or None
+            )
+            self._row_of = {chunk["id"]: i for i, chunk in enumerate(self.index.chunks)}
+            
+            if (self.index.model, self.index.dimensions) != (self.embeddings.model, self.embeddings.dimensions):
+                raise ValueError(
+                    f"로컬 인덱스({self.index.model}, {self.index.dimensions}차원)가 "
+                    f"쿼리 임베딩({self.embeddings.model}, {self.embeddings.dimensions}차원)과 다릅니다"
+                )
+        else:
+            raise ValueError(f"지원하지 않는 backend: {self.backend}")
+        
+        # 문자 n-gram 역색인 (있으면 dense + lexical 하이브리드 검색)
+        # lexical.npz가 없어도 청크 원본(chunks.json)이 있으면 시작할 때 메모리에 생성
+        self.lexical = None
+        self.chunks = None
+        self.dense_timeout = dense_timeout
+        
+        index_dir = Path(index_dir)
+        if self.index is not None or (index_dir / CHUNKS_FILE).exists():
+            self.chunks = self.index.chunks if self.index is not None else load_chunks(index_dir)["chunks"]
+            if (index_dir / LEXICAL_FILE).exists():
+                self.lexical = LexicalIndex.load(index_dir)
+            else:
+                self.lexical = LexicalIndex.build([chunk["text"] for chunk in self.chunks])
+                logger.info("%s 없음, 청크 %d개로 역색인 생성", index_dir / LEXICAL_FILE, len(self.chunks))
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dense-search")
+        else:
+            logger.warning(
+                "lexical 대체 검색 비활성: %s에 %s / %s 없음 → 임베딩 API 장애 시 검색이 실패함 "
+                "(python preprocessing/chunk_and_embed.py로 생성)",
+                index_dir, LEXICAL_FILE, CHUNKS_FILE
+            )
+    
+    def _embed(self, queries: List[str]) -> List[List[float]]:
+        """쿼리 임베딩 (요청 1회, 캐시 적중분은 API 호출 없음)"""
+        with self.tracer.span("retriever.embed", queries=len(queries)) as span:
+            misses = self.embeddings.misses
+            vectors = self.embeddings.embed_documents(queries)
+            span.set(cache_misses=self.embeddings.misses - misses)
+            return vectors
+    
+    def _similarity_search(self, query: str, k: int) -> List[Document]:
+        """백엔드별 유사도 검색"""
+        return self._similarity_search_many([query], k=k)[0]
+    
+    def _similarity_search_many(self, queries: List[str], k: int) -> List[List[Document]]:
+        """
+        여러 쿼리 유사도 검색 (임베딩 요청 1회)
+        
+        로컬 인덱스는 쿼리 행렬과의 행렬-행렬 곱 1회, 벡터스토어(Pinecone)는 임베딩된 벡터로 쿼리별 조회
+        """
+        vectors = self._embed(queries)
+        
+        with self.tracer.span("retriever.vector_search", backend=self.backend, queries=len(queries), k=k):
+            if self.index is not None:
+                return [
+                    [self.index.get_document(i) for i, _ in result]
+                    for result in self.index.search_many_by_vector(vectors, k=k)
+                ]
+            
+            return [self.vectorstore.similarity_search_by_vector(vector, k=k) for vector in vectors]
+    
+    def _lexical_search(self, query: str, k: int) -> List[Document]:
+        """문자 n-gram BM25 검색"""
+        with self.tracer.span("retriever.lexical_search", k=k):
+            return [
+                chunk_to_document(self.chunks[i])
+                for i, _ in self.lexical.search(query, k=k)
+            ]
+    
+    def retrieve(self, query: str, k: int) -> List[Document]:
+        """
+        dense 검색 (역색인이 있으면 lexical과 RRF 융합)
+        
+        임베딩 API가 느리거나 실패하면 lexical 결과만으로 응답 (degraded mode)
+        """
+        if self.lexical is None:
+            return self._similarity_search(query, k=k)
+        
+        n_candidates = k * CANDIDATE_FACTOR
+        # 검색 스레드에서도 현재 span을 부모로 이어가도록 context 복사
+        dense_future = self._executor.submit(
+            contextvars.copy_context().run, self._similarity_search, query, n_candidates
+        )
+        lexical = self._lexical_search(query, k=n_candidates)
+        
+        try:
+            dense = dense_future.result(timeout=self.dense_timeout)
+        except Exception as e:
+            logger.warning("dense 검색 실패, lexical 결과만 사용: %r", e)
+            dense = []
+        
+        return reciprocal_rank_fusion([dense, lexical])[:k]
+    
+    def retrieve_many(self, queries: List[str], k: int) -> List[List[Document]]:
+        """
+        여러 쿼리 retrieve() (dense 검색은 임베딩 요청 1회로 묶음)
+        
+        Returns:
+            List[List[Document]]: 쿼리 순서대로의 검색 결과
+        """
+        if not queries:
+            return []
+        
+        if self.lexical is None:
+            return self._similarity_search_many(queries, k=k)
+        
+        n_candidates = k * CANDIDATE_FACTOR
+        dense_future = self._executor.submit(
+            contextvars.copy_context().run, self._similarity_search_many, queries, n_candidates
         )
+        lexical = [self._lexical_search(query, k=n_candidates) for query in queries]
+        
+        try:
+            dense = dense_future.result(timeout=self.dense_timeout)
+        except Exception as e:
+            logger.warning("dense 검색 실패, lexical 결과만 사용: %r", e)
+            dense = [[] for _ in queries]
+        
+        return [
+            reciprocal_rank_fusion([dense_docs, lexical_docs])[:k]
+            for dense_docs, lexical_docs in zip(dense, lexical)
+        ]
+    
+    def assemble(
+        self,
+        query: str,
+        k: int = 3,
+        token_budget: Optional[int] = None,
+        expansions: Optional[List[str]] = None
+    ) -> List[Document]:
+        """
+        검색 + 컨텍스트 조립 (MMR 중복 제거, 인접 청크 병합, 토큰 예산)
+        
+        Args:
+            query: 검색 쿼리
+            k: 최대 청크 수
+            token_budget: 컨텍스트 토큰 예산 (None이면 k개까지)
+            expansions: 추가 쿼리 (직전 발화, 위기 중심 재작성 등) - 원래 쿼리와 함께
+                한 번에 검색하고 결과를 RRF로 합침
+            
+        Returns:
+            List[Document]: 컨텍스트 span 목록 (metadata["display"]를 그대로 프롬프트에 사용)
+        """
+        with self.tracer.span("retriever.assemble", k=k, queries=1 + len(expansions or [])) as span:
+            if expansions:
+                candidates = reciprocal_rank_fusion(
+                    self.retrieve_many([query] + expansions, k=k * CANDIDATE_FACTOR)
+                )[:k * CANDIDATE_FACTOR]
+            else:
+                candidates = self.retrieve(query, k=k * CANDIDATE_FACTOR)
+            
+            spans = assemble_context(
+                candidates,
+                k=k,
+                token_budget=token_budget,
+                vectors=self._candidate_vectors(candidates),
+                separator_tokens=count_tokens(CONTEXT_SEPARATOR)
+            )
+            span.set(
+                candidates=len(candidates),
+                chunks=len(spans),
+                pages=len({doc.metadata.get("page") for doc in spans})
+            )
+            return spans
     
-    def search(self, query: str, k: int = 3) -> str:
+    def _candidate_vectors(self, candidates: List[Document]) -> Optional[np.ndarray]:
+        """로컬 인덱스면 후보 임베딩 (MMR용), 아니면 None (문자 bigram 유사도 사용)"""
+        if self.index is None:
+            return None
+        rows = [self._row_of.get(chunk_key(doc)) for doc in candidates]
+        if None in rows:
+            return None
+        return self.index.embeddings[rows]
+    
+    def search(self, query: str, k: int = 3, token_budget: Optional[int] = None) -> str:
         """
         매뉴얼 검색
         
         Args:
             query: 검색 쿼리
             k: 검색할 문서 수
+            token_budget: 컨텍스트 토큰 예산 (None이면 k개까지)
             
         Returns:
             str: 검색된 컨텍스트 (포맷팅됨)
         """
-        # 유사도 검색
-        results = self.vectorstore.similarity_search(query, k=k)
-        
-        if not results:
-            return ""
+        # 유사도 검색 + 조립
+        results = self.assemble(query, k=k, token_budget=token_budget)
         
         # 컨텍스트 조합
-        context_parts = []
+        return CONTEXT_SEPARATOR.join(format_chunk(doc) for doc in results)
+    
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = 3,
+        token_budget: Optional[int] = None
+    ) -> List[str]:
+        """
+        여러 쿼리 매뉴얼 검색 (평가 / 테스트용, 임베딩 요청과 유사도 계산을 한 번에)
         
-        for i, doc in enumerate(results, 1):
-            page = doc.metadata.get('page', '?')
-            content = doc.page_content
-            
-            # 페이지 헤더 제거
-            content = content.replace("=== 페이지", "\n페이지")
-            content = content.replace("===", "").strip()
+        Args:
+            queries: 검색 쿼리 목록
+            k: 쿼리별 검색할 문서 수
+            token_budget: 쿼리별 컨텍스트 토큰 예산 (None이면 k개까지)
             
-            context_parts.append(
-                f"[참고 자료 {i} - 페이지 {page}]\n{content}"
+        Returns:
+            List[str]: 쿼리 순서대로의 search() 결과
+        """
+        contexts = []
+        for query, candidates in zip(queries, self.retrieve_many(queries, k=k * CANDIDATE_FACTOR)):
+            results = assemble_context(
+                candidates,
+                k=k,
+                token_budget=token_budget,
+                vectors=self._candidate_vectors(candidates),
+                separator_tokens=count_tokens(CONTEXT_SEPARATOR)
             )
-        
-        return "\n\n---\n\n".join(context_parts)
+            contexts.append(CONTEXT_SEPARATOR.join(format_chunk(doc) for doc in results))
+        return contexts
 
 
 # 테스트
@@ -79,10 +380,14 @@ if __name__ == "__main__":
         "부모님께 어떻게 알려야 하나요"
     ]
     
-    for query in test_queries:
+    # 임베딩 요청 1회로 모든 쿼리 검색
+    contexts = retriever.search_many(test_queries, k=2)
+    
+    for query, context in zip(test_queries, contexts):
         print(f"\n질문: {query}")
         print("-" * 80)
         
-        context = retriever.search(query, k=2)
         print(context[:300] + "...")
-        print()
\ No newline at end of file
+        print()
+    
+    print(f"임베딩 캐시: {retriever.embeddings.stats()}")
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+Structured Output 스트리밍 파서
+LLM이 생성 중인 JSON을 점진적으로 읽어 답변 텍스트는 토큰 단위로,
+나머지 필드는 값이 완성되는 즉시 전달
+"""
+import json
+from typing import List, Dict, Any, Optional
+
+_WHITESPACE = " \t\r\n"
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class StructuredStreamParser:
+    """평면 JSON 객체 점진 파서"""
+
+    def __init__(self, stream_field: str = "답변"):
+        """
+        초기화
+
+        Args:
+            stream_field: 토큰 단위로 흘려보낼 문자열 필드
+        """
+        self.stream_field = stream_field
+        self.fields: Dict[str, Any] = {}
+        self.text = ""
+        self.error: Optional[str] = None
+
+        self._pos = 0
+        self._state = "start"
+        self._key = ""
+        self._chars: List[str] = []
+        self._raw_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        """최상위 객체가 닫혔는지"""
+        return self._state == "end"
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        새로 도착한 텍스트 처리
+
+        Args:
+            chunk: LLM 스트림 조각
+
+        Returns:
+            List[Dict]: {"type": "token", "text"} / {"type": "field", "name", "value"} 이벤트
+                (JSON이 깨져 있으면 그때까지의 이벤트만 반환하고 이후로는 파싱하지 않음, error에 기록)
+        """
+        self.text += chunk
+        events: List[Dict] = []
+
+        try:
+            self._parse(events)
+        except ValueError as e:
+            # 잘못된 값 / 이스케이프 → 호출한 쪽이 fields 검증 실패로 Structured Output 재시도
+            self.error = repr(e)
+            self._state = "error"
+
+        return events
+
+    def _parse(self, events: List[Dict]) -> None:
+        """self._pos부터 읽을 수 있는 만큼 파싱해 events에 추가"""
+        text = self.text
+
+        while self._pos < len(text) and self._state not in ("end", "error"):
+            ch = text[self._pos]
+            state = self._state
+
+            if state == "start":
+                if ch == "{":
+                    self._state = "key_or_end"
+                self._pos += 1
+
+            elif state == "key_or_end":
+                if ch == '"':
+                    self._chars = []
+                    self._state = "key"
+                elif ch == "}":
+                    self._state = "end"
+                self._pos += 1
+
+            elif state == "key":
+                closed = self._read_string()
+                if not closed:
+                    break
+                self._key = "".join(self._chars)
+                self._state = "colon"
+
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "value"
+                self._pos += 1
+
+            elif state == "value":
+                if ch in _WHITESPACE:
+                    self._pos += 1
+                elif ch == '"':
+                    self._chars = []
+                    self._pos += 1
+                    self._state = "string_value"
+                else:
+                    self._raw_start = self._pos
+                    self._depth = 0
+                    self._in_string = False
+                    self._escape = False
+                    self._state = "raw_value"
+
+            elif state == "string_value":
+                before = len(self._chars)
+                closed = self._read_string()
+
+                if self._key == self.stream_field and len(self._chars) > before:
+                    events.append({"type": "token", "text": "".join(self._chars[before:])})
+
+                if closed:
+                    events.append(self._complete("".join(self._chars)))
+                    self._state = "key_or_end"
+                else:
+                    break
+
+            elif state == "raw_value":
+                if self._scan_raw():
+                    raw = text[self._raw_start:self._pos]
+                    events.append(self._complete(json.loads(raw)))
+                    self._state = "key_or_end"
+                else:
+                    break
+
+    def _complete(self, value: Any) -> Dict:
+        """필드 값 완성 이벤트"""
+        self.fields[self._key] = value
+        return {"type": "field", "name": self._key, "value": value}
+
+    def _read_string(self) -> bool:
+        """
+        문자열 본문을 읽어 self._chars에 디코딩해 추가
+
+        Returns:
+            bool: 닫는 따옴표까지 읽었는지 (이스케이프가 잘려 있으면 다음 조각을 기다림)
+        """
+        text = self.text
+        n = len(text)
+
+        while self._pos < n:
+            ch = text[self._pos]
+
+            if ch == '"':
+                self._pos += 1
+                return True
+
+            if ch != "\\":
+                self._chars.append(ch)
+                self._pos += 1
+                continue
+
+            if self._pos + 1 >= n:
+                return False
+
+            code = text[self._pos + 1]
+            if code == "u":
+                if self._pos + 6 > n:
+                    return False
+                char = chr(int(text[self._pos + 2:self._pos + 6], 16))
+                self._pos += 6
+
+                # 서로게이트 쌍 (💙 등)
+                if 0xD800 <= ord(char) <= 0xDBFF:
+                    if self._pos + 6 > n:
+                        self._pos -= 6
+                        return False
+                    if text[self._pos:self._pos + 2] == "\\u":
+                        low = int(text[self._pos + 2:self._pos + 6], 16)
+                        char = chr(0x10000 + ((ord(char) - 0xD800) << 10) + (low - 0xDC00))
+                        self._pos += 6
+                self._chars.append(char)
+            else:
+                self._chars.append(_ESCAPES.get(code, code))
+                self._pos += 2
+
+        return False
+
+    def _scan_raw(self) -> bool:
+        """
+        문자열 이외의 값(숫자, bool, 배열 등) 끝까지 스캔
+
+        Returns:
+            bool: 값이 끝났는지 (self._pos는 종료 문자 ',' 또는 '}' 위치)
+        """
+        text = self.text
+
+        while self._pos < len(text):
+            ch = text[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                if self._depth == 0:
+                    return True
+                self._depth -= 1
+            elif ch == "," and self._depth == 0:
+                return True
+
+            self._pos += 1
+
+        return False
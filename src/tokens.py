@@ -0,0 +1,57 @@
+"""
+토큰 수 계산 (tiktoken, 기본값 o200k_base: gpt-4o 계열 토크나이저)
+"""
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "o200k_base"
+
+# text-embedding-3-* 토크나이저 (한글은 o200k_base와 토큰 수 차이가 큼)
+EMBEDDING_ENCODING_NAME = "cl100k_base"
+
+_encodings: Dict[str, object] = {}
+_failed = set()
+_lock = threading.Lock()
+
+
+def _get_encoding(name: str = ENCODING_NAME):
+    """토크나이저 지연 로드 (BPE 파일을 받을 수 없으면 None)"""
+    encoding = _encodings.get(name)
+
+    if encoding is None and name not in _failed:
+        with _lock:
+            encoding = _encodings.get(name)
+            if encoding is None and name not in _failed:
+                try:
+                    import tiktoken
+                    encoding = _encodings[name] = tiktoken.get_encoding(name)
+                except Exception as e:
+                    logger.warning("tiktoken %s 로드 실패, 바이트 수 기반 추정 사용: %r", name, e)
+                    _failed.add(name)
+
+    return encoding
+
+
+def count_tokens(text: Optional[str], encoding_name: str = ENCODING_NAME) -> int:
+    """
+    텍스트 토큰 수
+
+    Args:
+        text: 텍스트
+        encoding_name: tiktoken 인코딩 (임베딩 모델은 EMBEDDING_ENCODING_NAME)
+
+    Returns:
+        int: 토큰 수 (토크나이저를 쓸 수 없으면 UTF-8 바이트 수 / 3 추정치)
+    """
+    if not text:
+        return 0
+
+    encoding = _get_encoding(encoding_name)
+    if encoding is None:
+        # 한글 1글자 = 3바이트 ≈ 1토큰
+        return len(text.encode("utf-8")) // 3 + 1
+
+    return len(encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,282 @@
+"""
+단계별 트레이싱 (span) + 지연 시간 히스토그램
+턴마다 사전 분류 / 검색(임베딩, 벡터 검색) / 프롬프트 구성 / LLM 생성 / 요약 시간을 기록
+
+TRACING 환경변수로 켬 (비우면 꺼짐, 꺼져 있으면 span()이 공유 no-op 객체를 반환해 오버헤드 거의 없음):
+    TRACING=jsonl   → TRACE_PATH(기본값 data/traces.jsonl)에 span 한 줄씩 저장
+    TRACING=otel    → OpenTelemetry tracer로 내보냄 (opentelemetry-api 설치 필요)
+"""
+import os
+import json
+import time
+import uuid
+import bisect
+import logging
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_PATH = Path("data/traces.jsonl")
+
+# 히스토그램 버킷 경계 (ms)
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """기록 중인 단계 하나 (with 블록이 끝나면 sink로 내보냄)"""
+
+    __slots__ = (
+        "tracer", "name", "attributes", "parent", "trace_id", "span_id", "parent_id",
+        "start_ns", "_start", "duration_ms", "status", "_token", "otel_span"
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = 0
+        self._start = 0.0
+        self.duration_ms = 0.0
+        self.status = "ok"
+        self._token = None
+        self.otel_span = None
+
+    def set(self, **attributes) -> None:
+        """속성 추가 (k, 페이지 수, 토큰 수, 모델 등)"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        self.tracer._on_start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # 다른 context에서 끝난 경우 (스트리밍 제너레이터를 다른 곳에서 닫을 때)
+            _current_span.set(self.parent)
+        if exc is not None:
+            self.status = "error"
+            self.attributes["error"] = repr(exc)
+        self.tracer._on_end(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSONL 한 줄 형식"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """트레이싱이 꺼져 있을 때의 span (아무것도 하지 않음)"""
+
+    __slots__ = ()
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class LatencyHistogram:
+    """고정 버킷 지연 시간 히스토그램 (분위수는 버킷 안 선형 보간 추정)"""
+
+    def __init__(self, bounds: Tuple[float, ...] = HISTOGRAM_BOUNDS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def quantile(self, q: float) -> float:
+        """q 분위수 추정 (ms)"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.bounds[i - 1] if i > 0 else 0.0
+                high = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(low + (high - low) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max
+        }
+
+
+class JsonlSink:
+    """span을 JSONL 파일에 한 줄씩 추가"""
+
+    def __init__(self, path: Path = DEFAULT_TRACE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+class OpenTelemetrySink:
+    """OpenTelemetry tracer로 내보내기 (부모-자식 관계와 시작/종료 시각 유지)"""
+
+    def __init__(self, tracer_name: str = "student-counseling-agent"):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer(tracer_name)
+
+    def on_start(self, span: Span) -> None:
+        parent = span.parent.otel_span if span.parent is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        span.otel_span = self._tracer.start_span(span.name, context=context, start_time=span.start_ns)
+
+    def on_end(self, span: Span) -> None:
+        otel_span = span.otel_span
+        if otel_span is None:
+            return
+        for key, value in span.attributes.items():
+            if not isinstance(value, (str, bool, int, float)):
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            otel_span.set_attribute(key, value)
+        if span.status == "error":
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        otel_span.end(end_time=span.start_ns + int(span.duration_ms * 1e6))
+
+
+class Tracer:
+    """span 생성 + sink 내보내기 + span 이름별 히스토그램"""
+
+    def __init__(self, sinks: Optional[List[Any]] = None, enabled: bool = True):
+        """
+        초기화
+
+        Args:
+            sinks: on_start(span) / on_end(span)을 가진 내보내기 대상 (JsonlSink, OpenTelemetrySink)
+            enabled: False면 모든 span이 no-op
+        """
+        self.sinks = sinks or []
+        self.enabled = enabled
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes):
+        """
+        단계 span (with 블록)
+
+        Args:
+            name: 단계 이름 (예: "rag.retrieve", "llm.generate")
+            **attributes: 시작 시점 속성 (끝나기 전에 span.set()으로 추가 가능)
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def _on_start(self, span: Span) -> None:
+        for sink in self.sinks:
+            try:
+                sink.on_start(span)
+            except Exception as e:
+                logger.debug("span 시작 내보내기 실패: %r", e)
+
+    def _on_end(self, span: Span) -> None:
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = LatencyHistogram()
+            histogram.observe(span.duration_ms)
+
+        for sink in self.sinks:
+            try:
+                sink.on_end(span)
+            except Exception as e:
+                logger.debug("span 내보내기 실패: %r", e)
+
+    def histograms(self) -> Dict[str, Dict[str, float]]:
+        """span 이름별 {"count", "mean", "p50", "p95", "p99", "max"} (ms)"""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in self._histograms.items()}
+
+
+_tracer: Optional[Tracer] = None
+_lock = threading.Lock()
+
+
+def tracer_from_env() -> Tracer:
+    """TRACING / TRACE_PATH 환경변수로 Tracer 생성"""
+    mode = os.getenv("TRACING", "").strip().lower()
+
+    if mode == "jsonl":
+        return Tracer([JsonlSink(os.getenv("TRACE_PATH") or DEFAULT_TRACE_PATH)])
+    if mode == "otel":
+        try:
+            return Tracer([OpenTelemetrySink()])
+        except ImportError:
+            logger.warning("opentelemetry-api가 없어 트레이싱을 끕니다 (pip install opentelemetry-api)")
+    elif mode:
+        logger.warning("지원하지 않는 TRACING 값: %s (jsonl | otel)", mode)
+
+    return Tracer(enabled=False)
+
+
+def get_tracer() -> Tracer:
+    """프로세스 전역 Tracer (최초 호출 시 환경변수로 한 번만 생성)"""
+    global _tracer
+
+    if _tracer is None:
+        with _lock:
+            if _tracer is None:
+                _tracer = tracer_from_env()
+
+    return _tracer
+
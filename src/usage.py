@@ -0,0 +1,201 @@
+"""
+토큰 / 비용 집계
+턴마다 상담 LLM, 요약 LLM, 쿼리 임베딩 토큰을 모아 턴 / 세션 / 학교(tenant) 단위로 누적
+
+턴 안의 호출은 usage_scope()로 연 UsageMeter에 모임 (검색 스레드 / asyncio.to_thread도 context를 이어받음).
+턴 밖의 호출(백그라운드 롤링 요약)은 세션 / 학교 누적에만 더함
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, List, Dict, Iterator, Optional
+
+from .config import get_model_price
+from .tokens import EMBEDDING_ENCODING_NAME, count_tokens
+
+USAGE_FIELDS = ("llm_calls", "input_tokens", "cached_tokens", "output_tokens", "embedding_tokens")
+
+_current_meter: ContextVar[Optional["UsageMeter"]] = ContextVar("current_usage_meter", default=None)
+
+
+def empty_usage() -> Dict[str, Any]:
+    """빈 사용량 {"llm_calls", "input_tokens", "cached_tokens", "output_tokens", "embedding_tokens", "cost_usd"}"""
+    usage: Dict[str, Any] = {field: 0 for field in USAGE_FIELDS}
+    usage["cost_usd"] = 0.0
+    return usage
+
+
+def add_usage(total: Dict[str, Any], usage: Dict[str, Any]) -> None:
+    """total에 usage를 더함 (제자리)"""
+    for field in USAGE_FIELDS:
+        total[field] += usage.get(field, 0)
+    total["cost_usd"] += usage.get("cost_usd", 0.0)
+
+
+def llm_usage(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> Dict[str, Any]:
+    """LLM 호출 1회 사용량 + 비용 (캐시 적중 입력 토큰은 cached_input 가격)"""
+    price = get_model_price(model)
+    uncached = input_tokens - cached_tokens
+    cost = (
+        uncached * price.get("input", 0.0)
+        + cached_tokens * price.get("cached_input", price.get("input", 0.0))
+        + output_tokens * price.get("output", 0.0)
+    ) / 1_000_000
+
+    usage = empty_usage()
+    usage.update(
+        llm_calls=1,
+        input_tokens=input_tokens,
+        cached_tokens=cached_tokens,
+        output_tokens=output_tokens,
+        cost_usd=cost
+    )
+    return usage
+
+
+def embedding_usage(model: str, tokens: int) -> Dict[str, Any]:
+    """임베딩 요청 사용량 + 비용"""
+    usage = empty_usage()
+    usage.update(
+        embedding_tokens=tokens,
+        cost_usd=tokens * get_model_price(model).get("input", 0.0) / 1_000_000
+    )
+    return usage
+
+
+class UsageMeter:
+    """턴 하나의 사용량 (여러 스레드에서 더해도 안전)"""
+
+    def __init__(self):
+        self.usage = empty_usage()
+        self._lock = threading.Lock()
+
+    def add(self, usage: Dict[str, Any]) -> None:
+        with self._lock:
+            add_usage(self.usage, usage)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.usage)
+
+
+@contextmanager
+def usage_scope() -> Iterator[UsageMeter]:
+    """이 블록 안의 LLM / 임베딩 사용량을 모을 UsageMeter (턴 단위)"""
+    meter = UsageMeter()
+    token = _current_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        try:
+            _current_meter.reset(token)
+        except ValueError:
+            # 스트리밍 제너레이터를 다른 context에서 닫은 경우
+            _current_meter.set(None)
+
+
+def current_meter() -> Optional[UsageMeter]:
+    """현재 턴의 UsageMeter (턴 밖이면 None)"""
+    return _current_meter.get()
+
+
+def record_embedding(model: str, texts: List[str]) -> None:
+    """
+    쿼리 임베딩 토큰 기록 (CachedEmbeddings가 API로 보낸 캐시 미스분만 호출)
+
+    현재 턴이 없으면(인덱싱 등) 토큰 수도 세지 않음. 토큰 수는 임베딩 모델 토크나이저(cl100k_base) 기준
+    """
+    meter = _current_meter.get()
+    if meter is not None and texts:
+        tokens = sum(count_tokens(text, EMBEDDING_ENCODING_NAME) for text in texts)
+        meter.add(embedding_usage(model, tokens))
+
+
+class UsageStore:
+    """
+    턴 / 세션 / 학교(tenant)별 사용량 누적 (프로세스 전역, 스레드 안전)
+
+    세션은 최근 max_sessions개만 보관 (오래된 세션이 빠져도 학교 / 전체 누적은 유지)
+    """
+
+    def __init__(self, max_sessions: int = 10000, max_turns: int = 200):
+        """
+        초기화
+
+        Args:
+            max_sessions: 보관할 최대 세션 수 (LRU)
+            max_turns: 세션마다 보관할 최근 턴 기록 수
+        """
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tenants: Dict[str, Dict[str, Any]] = {}
+        self._total = empty_usage()
+        self._lock = threading.Lock()
+
+    def _session(self, tenant_id: str, session_id: str) -> Dict[str, Any]:
+        """세션 기록 (없으면 생성, 락 안에서 호출)"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = {
+                "tenant_id": tenant_id,
+                "usage": empty_usage(),
+                "turns": []
+            }
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def add(
+        self,
+        tenant_id: str,
+        session_id: str,
+        usage: Dict[str, Any],
+        turn: Optional[int] = None
+    ) -> None:
+        """
+        사용량 누적
+
+        Args:
+            tenant_id: 학교 id
+            session_id: 세션 id
+            usage: 더할 사용량 (empty_usage() 형식)
+            turn: 턴 번호 (있으면 세션의 턴 기록에도 추가)
+        """
+        with self._lock:
+            session = self._session(tenant_id, session_id)
+            add_usage(session["usage"], usage)
+            if turn is not None:
+                session["turns"].append({"턴": turn, **usage})
+                del session["turns"][:-self.max_turns]
+
+            add_usage(self._tenants.setdefault(tenant_id, empty_usage()), usage)
+            add_usage(self._total, usage)
+
+    def session_usage(self, session_id: str) -> Dict[str, Any]:
+        """세션 누적 사용량 (없으면 빈 사용량)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return dict(session["usage"]) if session is not None else empty_usage()
+
+    def session_turns(self, session_id: str) -> List[Dict[str, Any]]:
+        """세션의 턴별 사용량 (최근 max_turns개)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return [dict(turn) for turn in session["turns"]] if session is not None else []
+
+    def tenant_usage(self, tenant_id: str) -> Dict[str, Any]:
+        """학교 누적 사용량"""
+        with self._lock:
+            return dict(self._tenants.get(tenant_id) or empty_usage())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """전체 / 학교별 누적 + 보관 중인 세션 수"""
+        with self._lock:
+            return {
+                "total": dict(self._total),
+                "tenants": {tenant: dict(usage) for tenant, usage in self._tenants.items()},
+                "sessions": len(self._sessions)
+            }
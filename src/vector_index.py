@@ -0,0 +1,359 @@
+"""
+로컬 벡터 인덱스 (NumPy)
+청크 임베딩을 float32 행렬 하나로 보관하고 정확한 top-k 검색
+(선택) int8 / 1-bit 양자화 벡터 또는 Matryoshka 저차원 벡터로 후보를 먼저 고르고 전체 float 벡터로 재정렬
+"""
+import json
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .config import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, MATRYOSHKA_DIMENSIONS
+
+DEFAULT_INDEX_DIR = Path("data/index")
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.json"
+
+# 1차 검색용 벡터 + 파라미터 (chunk_and_embed.py가 함께 저장)
+INT8_FILE = "embeddings_int8.npy"
+BINARY_FILE = "embeddings_binary.npy"
+PREFIX_FILE = "embeddings_prefix.npy"
+QUANTIZATION_FILE = "quantization.json"
+QUANTIZATION_METHODS = ("int8", "binary", "matryoshka")
+
+# 양자화 검색 시 float 재정렬할 후보 수 = k * RESCORE_FACTOR
+RESCORE_FACTOR = 4
+
+# int8 점수 계산 시 한 번에 float로 바꿀 행 수 (CPU 캐시에 들어가는 크기)
+INT8_BLOCK_ROWS = 256
+
+# 바이트별 1 비트 수 (Hamming 거리 계산용)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def chunk_id(page: int, chunk_index: int) -> str:
+    """청크 고유 id (예: p11-c02)"""
+    return f"p{int(page):02d}-c{int(chunk_index):02d}"
+
+
+def display_text(text: str, page) -> str:
+    """
+    청크 본문 → 프롬프트에 그대로 넣을 표시 형태 (chunk_and_embed.py에서 한 번만 계산)
+
+    순번 없이 페이지만 적어, 같은 청크는 몇 번째로 검색되든 항상 같은 문자열이 됨
+    """
+    # 페이지 헤더 제거
+    content = text.replace("=== 페이지", "\n페이지")
+    content = content.replace("===", "").strip()
+
+    return f"[참고 자료 - 페이지 {page}]\n{content}"
+
+
+def load_chunks(index_dir: Path = DEFAULT_INDEX_DIR) -> Dict:
+    """chunks.json 로드 ({"model", "dimensions", "chunks"})"""
+    with open(Path(index_dir) / CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def chunk_to_document(chunk: Dict) -> Document:
+    """청크 dict → LangChain Document"""
+    return Document(
+        id=chunk["id"],
+        page_content=chunk["text"],
+        metadata={**chunk["metadata"], "chunk_id": chunk["id"]}
+    )
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (코사인 유사도 = 내적)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    차원별 대칭 int8 양자화
+
+    Args:
+        matrix: (청크 수, 차원) 정규화된 float32 행렬
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (int8 코드, 차원별 scale) - 원래 값 ≈ 코드 * scale
+    """
+    scales = np.abs(matrix).max(axis=0) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(matrix: np.ndarray) -> np.ndarray:
+    """1-bit(부호) 양자화 → (청크 수, 차원 / 8) uint8"""
+    return np.packbits(matrix > 0, axis=-1)
+
+
+class LocalVectorIndex:
+    """청크 임베딩 행렬 기반 인메모리 검색기"""
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        chunks: List[Dict],
+        model: str = EMBEDDING_MODEL,
+        dimensions: int = EMBEDDING_DIMENSIONS,
+        quantization: Optional[str] = None,
+        codes: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+        rescore_factor: int = RESCORE_FACTOR
+    ):
+        """
+        초기화
+
+        Args:
+            embeddings: (청크 수, 차원) 정규화된 float32 행렬
+            chunks: 청크 목록 ({"id", "text", "metadata"})
+            model: 임베딩 모델 이름
+            dimensions: 임베딩 차원
+            quantization: None(float 전체 검색) / "int8" / "binary" / "matryoshka"
+            codes: 1차 검색 벡터 (int8: (청크 수, 차원), binary: (청크 수, 차원 / 8) uint8,
+                matryoshka: (청크 수, 앞부분 차원) 재정규화된 float32)
+            scales: int8 차원별 scale
+            rescore_factor: 양자화 검색 시 float 재정렬 후보 배율
+        """
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(chunks):
+            raise ValueError(
+                f"임베딩 행렬 {embeddings.shape}와 청크 수 {len(chunks)}가 맞지 않습니다"
+            )
+        if embeddings.shape[1] != dimensions:
+            raise ValueError(
+                f"임베딩 차원 {embeddings.shape[1]}이 {dimensions}과 다릅니다"
+            )
+
+        self.embeddings = embeddings
+        self.chunks = chunks
+        self.model = model
+        self.dimensions = dimensions
+
+        if quantization not in (None,) + QUANTIZATION_METHODS:
+            raise ValueError(f"지원하지 않는 양자화: {quantization}")
+        if quantization is not None and codes is None:
+            raise ValueError(f"{quantization} 양자화 벡터가 없습니다")
+
+        self.quantization = quantization
+        self.codes = codes
+        self.scales = scales
+        self.rescore_factor = rescore_factor
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @classmethod
+    def load(
+        cls,
+        index_dir: Path = DEFAULT_INDEX_DIR,
+        mmap: bool = True,
+        quantization: Optional[str] = None,
+        rescore_factor: int = RESCORE_FACTOR
+    ) -> "LocalVectorIndex":
+        """
+        인덱스 파일 로드
+
+        Args:
+            index_dir: chunk_and_embed.py가 저장한 인덱스 폴더
+            mmap: True면 float 임베딩 행렬을 메모리 매핑으로 로드
+                (양자화 검색 시 재정렬할 행만 실제로 읽힘)
+            quantization: None / "int8" / "binary" / "matryoshka" (1차 검색 벡터는 메모리에 올림)
+            rescore_factor: 양자화 검색 시 float 재정렬 후보 배율
+
+        Returns:
+            LocalVectorIndex
+        """
+        index_dir = Path(index_dir)
+        meta = load_chunks(index_dir)
+
+        embeddings = np.load(
+            index_dir / EMBEDDINGS_FILE,
+            mmap_mode="r" if mmap else None
+        )
+
+        codes = None
+        scales = None
+        if quantization == "int8":
+            codes = np.load(index_dir / INT8_FILE)
+            with open(index_dir / QUANTIZATION_FILE, 'r', encoding='utf-8') as f:
+                scales = np.asarray(json.load(f)["int8"]["scales"], dtype=np.float32)
+        elif quantization == "binary":
+            codes = np.load(index_dir / BINARY_FILE)
+        elif quantization == "matryoshka":
+            codes = np.load(index_dir / PREFIX_FILE)
+
+        return cls(
+            embeddings=embeddings,
+            chunks=meta["chunks"],
+            model=meta["model"],
+            dimensions=meta["dimensions"],
+            quantization=quantization,
+            codes=codes,
+            scales=scales,
+            rescore_factor=rescore_factor
+        )
+
+    @staticmethod
+    def save(
+        index_dir: Path,
+        embeddings: np.ndarray,
+        chunks: List[Dict],
+        model: str = EMBEDDING_MODEL,
+        dimensions: int = EMBEDDING_DIMENSIONS,
+        prefix_dimensions: int = MATRYOSHKA_DIMENSIONS
+    ) -> None:
+        """
+        인덱스 파일 저장 (정규화된 연속 float32 행렬 + 청크 메타데이터 + 양자화 벡터/파라미터)
+
+        Args:
+            index_dir: 저장할 폴더
+            embeddings: (청크 수, 차원) 임베딩 행렬
+            chunks: 청크 목록 ({"id", "text", "metadata"})
+            model: 임베딩 모델 이름
+            dimensions: 임베딩 차원
+            prefix_dimensions: Matryoshka 1차 검색 차원
+        """
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        matrix = np.ascontiguousarray(normalize_rows(embeddings))
+        np.save(index_dir / EMBEDDINGS_FILE, matrix)
+
+        # int8: 차원별 scale, binary: 부호 비트 (청크당 3072차원 기준 12KB → 3KB / 384B)
+        codes, scales = quantize_int8(matrix)
+        np.save(index_dir / INT8_FILE, codes)
+        np.save(index_dir / BINARY_FILE, quantize_binary(matrix))
+
+        # matryoshka: 앞부분 차원만 잘라 재정규화 (text-embedding-3의 dimensions 축소와 같은 방식)
+        prefix_dimensions = min(prefix_dimensions, matrix.shape[1])
+        np.save(index_dir / PREFIX_FILE, np.ascontiguousarray(normalize_rows(matrix[:, :prefix_dimensions])))
+
+        with open(index_dir / QUANTIZATION_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                "int8": {"scheme": "symmetric-per-dimension", "scales": scales.tolist()},
+                "binary": {"scheme": "sign", "bits": int(matrix.shape[1])},
+                "matryoshka": {"scheme": "prefix-renormalized", "dimensions": prefix_dimensions}
+            }, f)
+
+        with open(index_dir / CHUNKS_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                "model": model,
+                "dimensions": dimensions,
+                "chunks": chunks
+            }, f, ensure_ascii=False, indent=2)
+
+    def search_by_vector(self, vector: List[float], k: int = 3) -> List[Tuple[int, float]]:
+        """
+        top-k 검색
+
+        float 인덱스면 행렬-벡터 곱 1회로 정확히, 그 외에는 1차 검색 벡터(양자화 / Matryoshka)로
+        k * rescore_factor개 후보를 고른 뒤 해당 float 행만 읽어 전체 차원 점수로 재정렬
+
+        Args:
+            vector: 쿼리 임베딩
+            k: 검색할 청크 수
+
+        Returns:
+            List[Tuple[int, float]]: (청크 번호, 코사인 유사도), 유사도 내림차순
+        """
+        return self.search_many_by_vector([vector], k=k)[0]
+
+    def search_many_by_vector(
+        self,
+        vectors: List[List[float]],
+        k: int = 3
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        여러 쿼리 top-k 검색 (쿼리 행렬과의 행렬-행렬 곱 1회)
+
+        Args:
+            vectors: 쿼리 임베딩 목록
+            k: 쿼리별 검색할 청크 수
+
+        Returns:
+            List[List[Tuple[int, float]]]: 쿼리 순서대로의 search_by_vector() 결과
+        """
+        k = min(k, len(self.chunks))
+        if k <= 0 or len(vectors) == 0:
+            return [[] for _ in vectors]
+
+        queries = normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+        if self.quantization is None:
+            # (청크 수, 쿼리 수)
+            scores = self.embeddings @ queries.T
+            return [
+                [(int(i), float(scores[i, j])) for i in _top_indices(scores[:, j], k)]
+                for j in range(len(queries))
+            ]
+
+        n_candidates = min(k * self.rescore_factor, len(self.chunks))
+        approximate = self._approximate_scores(queries)
+
+        results = []
+        for j, query in enumerate(queries):
+            rows = np.sort(_top_indices(approximate[:, j], n_candidates))
+            scores = self.embeddings[rows] @ query
+            results.append([(int(rows[i]), float(scores[i])) for i in _top_indices(scores, k)])
+        return results
+
+    def _approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        """1차 검색 점수 (청크 수, 쿼리 수), 클수록 가까움"""
+        if self.quantization == "matryoshka":
+            return self.codes @ normalize_rows(queries[:, :self.codes.shape[1]]).T
+
+        if self.quantization == "int8":
+            # (코드 * scale) · q == 코드 · (scale * q), 캐시 크기 블록 단위로 float 변환 후 BLAS
+            scaled = (queries * self.scales).T
+            scores = np.empty((len(self.codes), len(queries)), dtype=np.float32)
+            for start in range(0, len(self.codes), INT8_BLOCK_ROWS):
+                block = self.codes[start:start + INT8_BLOCK_ROWS]
+                scores[start:start + len(block)] = block.astype(np.float32) @ scaled
+            return scores
+
+        # binary: 부호가 다른 비트 수(Hamming 거리)가 적을수록 가까움
+        query_codes = quantize_binary(queries)
+        return -np.stack([_hamming(self.codes, code) for code in query_codes], axis=1)
+
+    def memory_bytes(self) -> int:
+        """검색 1차 단계가 읽는 벡터 크기 (양자화 / Matryoshka 시 1차 검색 벡터만)"""
+        if self.quantization is None:
+            return int(self.embeddings.nbytes)
+        return int(self.codes.nbytes)
+
+    def get_document(self, i: int) -> Document:
+        """청크 번호 → LangChain Document"""
+        return chunk_to_document(self.chunks[i])
+
+
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k개 위치 (내림차순)"""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top])]
+
+
+def _hamming(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """packbits 코드 행렬과 쿼리 코드의 Hamming 거리"""
+    xor = np.bitwise_xor(codes, query_code)
+
+    if xor.shape[1] % 8:
+        return _POPCOUNT[xor].sum(axis=1, dtype=np.int32)
+
+    # 64비트 단위 popcount (SWAR)
+    x = np.ascontiguousarray(xor).view(np.uint64)
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+    return x.sum(axis=1, dtype=np.int32)
@@ -0,0 +1,95 @@
+"""RAG 컨텍스트 조립 (MMR, 인접 청크 병합, 토큰 예산)"""
+import numpy as np
+from langchain_core.documents import Document
+
+from src.context_assembler import (
+    MIN_OVERLAP_CHARS, assemble_context, merge_adjacent, merge_overlap, mmr_order, text_similarity_matrix
+)
+
+
+def chunk(page, index, text):
+    return Document(
+        page_content=text,
+        metadata={"page": page, "chunk_index": index, "chunk_id": f"p{page:02d}-c{index:02d}"}
+    )
+
+
+OVERLAP = "위기 학생을 발견하면 담임교사와 상담교사가 함께 면담한다."
+
+
+def test_merge_overlap_removes_shared_text():
+    first = "학교 내 위기 대응 절차는 다음과 같다. " + OVERLAP
+    second = OVERLAP + " 이후 보호자에게 연락한다."
+    assert merge_overlap(first, second) == first + " 이후 보호자에게 연락한다."
+
+
+def test_merge_overlap_ignores_chance_short_match():
+    # "…한다" + "다음은"의 한 글자 일치는 겹침이 아님
+    assert merge_overlap("학생과 먼저 이야기한다", "다음은 보호자 연락") == "학생과 먼저 이야기한다\n다음은 보호자 연락"
+
+
+def test_merge_overlap_minimum_length():
+    shared = ("가나다라마바사아자차카타파하" * 2)[:MIN_OVERLAP_CHARS]
+    assert merge_overlap("앞 " + shared, shared + " 뒤") == "앞 " + shared + " 뒤"
+
+    short = shared[:-1]
+    assert merge_overlap("앞 " + short, short + " 뒤") == "앞 " + short + "\n" + short + " 뒤"
+
+
+def test_mmr_order_prefers_diverse_candidates():
+    relevance = np.array([1.0, 0.9, 0.8], dtype=np.float32)
+    similarity = np.array([
+        [1.0, 1.0, 0.0],
+        [1.0, 1.0, 0.0],
+        [0.0, 0.0, 1.0]
+    ], dtype=np.float32)
+    assert mmr_order(relevance, similarity) == [0, 2, 1]
+
+
+def test_mmr_order_without_diversity_keeps_rank():
+    relevance = np.array([0.2, 1.0, 0.5], dtype=np.float32)
+    assert mmr_order(relevance, np.eye(3, dtype=np.float32), lambda_mult=1.0) == [1, 2, 0]
+    assert mmr_order(np.array([], dtype=np.float32), np.zeros((0, 0))) == []
+
+
+def test_text_similarity_matrix():
+    sim = text_similarity_matrix(["자살 위기 대응", "자살 위기 대응", "급식 메뉴"])
+    assert np.allclose(np.diag(sim), 1.0)
+    assert np.allclose(sim, sim.T)
+    assert sim[0, 1] == 1.0
+    assert sim[0, 2] == 0.0
+
+
+def test_merge_adjacent_joins_consecutive_chunks_on_same_page():
+    docs = [
+        chunk(11, 2, OVERLAP + " 둘째"),
+        chunk(5, 0, "다른 페이지"),
+        chunk(11, 1, "첫째 " + OVERLAP)
+    ]
+    spans = merge_adjacent(docs)
+
+    assert [span.metadata["chunk_id"] for span in spans] == ["p11-c01+p11-c02", "p05-c00"]
+    assert spans[0].page_content == "첫째 " + OVERLAP + " 둘째"
+    assert spans[0].metadata["display"].startswith("[참고 자료 - 페이지 11]")
+
+
+def test_merge_adjacent_keeps_gaps_separate():
+    spans = merge_adjacent([chunk(11, 1, "첫째"), chunk(11, 3, "셋째")])
+    assert [span.metadata["chunk_id"] for span in spans] == ["p11-c01", "p11-c03"]
+
+
+def test_assemble_context_limits_chunks():
+    candidates = [chunk(page, 0, f"페이지 {page} 내용 " * 5) for page in range(1, 6)]
+    spans = assemble_context(candidates, k=2)
+    assert len(spans) == 2
+    assert spans[0].metadata["chunk_id"] == "p01-c00"
+
+
+def test_assemble_context_token_budget_keeps_first_candidate():
+    candidates = [chunk(page, 0, "긴 매뉴얼 본문 " * 50) for page in range(1, 4)]
+    spans = assemble_context(candidates, k=3, token_budget=1)
+    assert [span.metadata["chunk_id"] for span in spans] == ["p01-c00"]
+
+
+def test_assemble_context_empty():
+    assert assemble_context([], k=3) == []
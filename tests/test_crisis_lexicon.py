@@ -0,0 +1,98 @@
+"""위기 키워드 매칭 (정규화, 부정 표현, 활용형, 포함 단어 제외)"""
+import unicodedata
+
+import pytest
+
+from src.crisis_lexicon import CrisisLexicon, normalize
+
+
+@pytest.fixture(scope="module")
+def lexicon():
+    return CrisisLexicon.load()
+
+
+def terms(lexicon, text):
+    return [hit.term for hit in lexicon.match(text)]
+
+
+def test_normalize_removes_spaces_jamo_and_repeats():
+    assert normalize("죽고 싶어어어ㅠㅠ")[0] == "죽고싶어"
+
+
+def test_normalize_positions_point_to_original():
+    normalized, positions = normalize("죽고 싶어")
+    assert normalized == "죽고싶어"
+    assert positions == [0, 1, 3, 4]
+
+
+def test_match_decomposed_input(lexicon):
+    assert "죽고싶" in terms(lexicon, unicodedata.normalize("NFD", "죽고 싶어"))
+
+
+def test_hit_span_in_original_text(lexicon):
+    text = "요즘 정말 죽고 싶어"
+    hit = lexicon.match(text)[0]
+    assert text[hit.start:hit.end] == "죽고 싶"
+
+
+def test_negation_after_term(lexicon):
+    hit = lexicon.match("죽고 싶지는 않아")[0]
+    assert hit.negated
+    assert hit.weight == pytest.approx(2.0 * lexicon.negation_factor)
+
+
+def test_bare_negative_words_do_not_negate(lexicon):
+    # "아니" / "없어"처럼 넓은 표현은 부정으로 보지 않음
+    assert not any(hit.negated for hit in lexicon.match("죽고 싶어 아니 진짜로"))
+    assert not any(hit.negated for hit in lexicon.match("죽고 싶어 희망이 없어"))
+
+
+def test_word_negation_only_at_word_start():
+    lexicon = CrisisLexicon(
+        patterns=[{"term": "자해", "category": "자해", "weight": 2.0, "window": 6}],
+        negations=[],
+        word_negations=["안해"]
+    )
+    assert lexicon.match("자해 안 해")[0].negated
+    assert not lexicon.match("자해편안해")[0].negated
+
+
+@pytest.mark.parametrize("text, term", [
+    ("그냥 다 끝낼 거야", "다끝낼"),
+    ("다 끝내버리고 싶어", "끝내버리"),
+    ("이번 주에 끝내버릴 거야", "끝내버릴"),
+])
+def test_conjugated_stems(lexicon, text, term):
+    assert term in terms(lexicon, text)
+
+
+def test_medicine_requires_context(lexicon):
+    assert "약" in terms(lexicon, "약 모아뒀어")
+    assert "약" not in terms(lexicon, "감기약 먹었어")
+
+
+@pytest.mark.parametrize("text", [
+    "이번 달 약속 모아서 달력에 적었어",
+    "약간 모아둔 용돈이 있어",
+    "병원 예약 잡고 다 먹고 왔어",
+    "약국에서 모아둔 쿠폰 썼어",
+    "다이어트약 다 먹었어",
+])
+def test_medicine_compounds_excluded(lexicon, text):
+    assert "약" not in terms(lexicon, text)
+
+
+def test_context_pattern_rooftop(lexicon):
+    assert "옥상" in terms(lexicon, "옥상에 올라가고 싶어")
+    assert "옥상" not in terms(lexicon, "옥상 정원 예쁘더라")
+
+
+def test_score_takes_category_max(lexicon):
+    hits = lexicon.match("죽고 싶어 정말 죽고 싶어")
+    assert len(hits) == 2
+    assert lexicon.score(hits) == pytest.approx(2.0)
+
+
+def test_is_crisis_threshold(lexicon):
+    assert lexicon.is_crisis(lexicon.match("죽고 싶어"))
+    assert not lexicon.is_crisis(lexicon.match("오늘 급식 맛있었어"))
@@ -0,0 +1,78 @@
+"""Structured Output 스트리밍 파서 (조각 경계, 이스케이프, 깨진 JSON)"""
+import json
+
+import pytest
+
+from src.streaming import StructuredStreamParser
+
+RESPONSE = {
+    "답변": "많이 힘들었겠다.\n천천히 얘기해줘 💙",
+    "자살_신호": "낮음",
+    "정서적_고통": "중간",
+    "종료_판단": False,
+    "점수": 0.5,
+    "키워드": ["친구", "학교"]
+}
+
+
+def feed_all(parser, chunks):
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events
+
+
+def answer_text(events):
+    return "".join(event["text"] for event in events if event["type"] == "token")
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_chunk_boundaries(size, ensure_ascii):
+    # \\n, \\uXXXX, 서로게이트 쌍이 조각 경계에서 잘려도 같은 결과
+    text = json.dumps(RESPONSE, ensure_ascii=ensure_ascii)
+    parser = StructuredStreamParser()
+    events = feed_all(parser, [text[i:i + size] for i in range(0, len(text), size)])
+
+    assert parser.done
+    assert parser.error is None
+    assert parser.fields == RESPONSE
+    assert answer_text(events) == RESPONSE["답변"]
+
+
+def test_field_event_when_value_completes():
+    parser = StructuredStreamParser()
+    parser.feed('{"답변": "응", "자살_신호": "높')
+    assert "자살_신호" not in parser.fields
+
+    events = parser.feed('음", "종료_판단": true}')
+    assert {"type": "field", "name": "자살_신호", "value": "높음"} in events
+    assert {"type": "field", "name": "종료_판단", "value": True} in events
+
+
+def test_tokens_only_for_stream_field():
+    parser = StructuredStreamParser(stream_field="답변")
+    events = parser.feed('{"자살_신호": "낮음", "답변": "안녕"}')
+    assert answer_text(events) == "안녕"
+
+
+def test_incomplete_stream_keeps_partial_fields():
+    parser = StructuredStreamParser()
+    events = parser.feed('{"답변": "끝까지 못')
+
+    assert not parser.done
+    assert answer_text(events) == "끝까지 못"
+    assert "답변" not in parser.fields
+
+
+@pytest.mark.parametrize("text", [
+    '{"답변": "응", "종료_판단": tru}',
+    '{"답변": "\\uZZZZ"}',
+])
+def test_invalid_json_sets_error_instead_of_raising(text):
+    parser = StructuredStreamParser()
+    parser.feed(text)
+
+    assert parser.error is not None
+    assert not parser.done
+    assert parser.feed(', "자살_신호": "낮음"}') == []